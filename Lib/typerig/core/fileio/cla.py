@@ -13,71 +13,113 @@ from datetime import datetime
 from typerig.core.base import message
 
 # - Init -----------------------------
-__version__ = '0.1.0'
+__version__ = '0.2.0'
 
 # - Classes --------------------------
 class CLAparser(object):
-	def __init__(self, file_path, file_mode='r'):
+	'''Buffered reader/writer for DTL Kern class (CLA) files.
+	Reading yields class records (class_name, [class_members]) one at a time;
+	class definitions may span several lines.
+
+	Constructor:
+		CLAparser(file_path, file_mode='r', buffer_size=65536)
+
+	Example:
+		with CLAparser('font.cla') as reader:
+			kern_classes = dict(reader)
+	'''
+	def __init__(self, file_path, file_mode='r', buffer_size=65536):
 		# - File
 		self.__extension = '.cla'
 		self.__path = file_path
 		self.__mode = file_mode
+		self.__buffer_size = buffer_size
 		self.__file_object = None
-		self.__file_data = None
-		
+		self.__reader = None
+
 		if not file_path.endswith(self.__extension):
 			raise NameError('ERROR:\t{} extension missing in file name: {}'.format(self.__extension, file_path))
-		
+
 		# - Vocabulary
 		self.__head_info = 		'# DTL Kern class file (CLA)\n# Generated by TypeRig (www.typerig.com)\n'
 		self.__comment_line = 	'#'
 		self.__end_line = 		';'
 		self.__class_line = 	'@'
 		self.__gen_pattern = 	'@{} = [{}];\n'
-				
+
 	def __enter__(self):
-		self.__file_object = open(self.__path, self.__mode)
+		self.__file_object = open(self.__path, self.__mode, self.__buffer_size)
+
 		if self.__mode not in ('a', 'w'):
-			self.__file_data = iter(self.__file_object.readlines())
+			self.__reader = self.classes()
+
 		return self
 
 	def __exit__(self, type, val, tb):
 		self.__file_object.close()
 
 	def __iter__(self):
-		return self
+		return self.__reader
 
 	def __next__(self):
-		new_line = next(self.__file_data)
-		
-		if self.__file_data is None or new_line == None:
+		if self.__reader is None:
 			raise StopIteration
-		else:
-			if self.__class_line in new_line:
-				class_name, class_members = new_line.strip().split('=')
-				class_name = class_name.strip().replace(self.__class_line, '')
-				class_members = class_members.strip().replace('[', '').replace(']', '').replace(self.__end_line,'').split(' ')
-				return (class_name, class_members)
-			else:
-				return self.__next__()
+
+		return next(self.__reader)
 
 	def next(self):
 		# Python 2 fixup
 		return self.__next__()
 
+	# - Functions --------------------
+	def __parse(self, definition):
+		class_name, class_members = definition.split('=', 1)
+		class_name = class_name.strip().replace(self.__class_line, '')
+		class_members = class_members.replace('[', ' ').replace(']', ' ').replace(self.__end_line, ' ').split()
+		return (class_name, class_members)
+
+	def classes(self):
+		'''Yield class records (class_name, [class_members])'''
+		pending = []
+
+		for line in self.__file_object:
+			line = line.split(self.__comment_line, 1)[0]
+
+			if not pending:
+				if self.__class_line not in line: continue
+				line = line[line.index(self.__class_line):]
+
+			pending.append(line)
+
+			if self.__end_line in line:
+				definition = ' '.join(pending)
+				pending = []
+				if '=' in definition: yield self.__parse(definition)
+
+		# - Unterminated definition at end of file
+		definition = ' '.join(pending)
+		if '=' in definition: yield self.__parse(definition)
+
 	def dump(self, pair_list, user_info=''):
+		'''Write kern classes in one buffered pass.
+
+		Args:
+			pair_list list(tuple(class_name, list(class_members))) or dict(class_name: list(class_members))
+			user_info str: Comment added to file header
+		'''
 		if self.__mode in ('a', 'w'):
 			# - Prepare
+			if isinstance(pair_list, dict): pair_list = pair_list.items()
+
 			user_header = '\n'.join([self.__comment_line + ' ' + info for info in user_info.split('\n')])
 			creation_date = self.__comment_line + ' Created on: ' + datetime.now().strftime('%d/%m/%Y %H:%M:%S') +'\n'
-			
+
 			file_head = self.__head_info + user_header + '\n' +	creation_date + '\n'
-						
-			# - Dump
-			self.__file_object.writelines(file_head)
+			file_body = ''.join([self.__gen_pattern.format(class_name, ' '.join(class_members)) for class_name, class_members in sorted(pair_list)])
 
-			for class_name, class_members in sorted(pair_list):
-				self.__file_object.write(self.__gen_pattern.format(class_name, ' '.join(class_members)))
+			# - Dump
+			self.__file_object.write(file_head)
+			self.__file_object.write(file_body)
 
 		else:
 			warnings.warn('File not in writable mode! Aborting!', message.FileSaveWarning)
@@ -85,17 +127,19 @@ class CLAparser(object):
 
 # - Test -----------------------------
 if __name__ == '__main__':
-	root_dir = os.path.dirname(os.path.dirname(__file__))
-	guz_siti = '1.cla'
-	guz_siti_out = 'test.cla'
-	guz_file = os.path.join(root_dir, krn_siti)
-	guz_file_out = os.path.join(root_dir, krn_filename_out)
-
-	append_glyphs = []
-	with CLAparser(krn_file) as reader:
-		for a in reader:
-			append_glyphs.append(a)
-	
-	with CLAparser(krn_file_out, 'w') as writer:
-		writer.dump(append_glyphs)
-			
\ No newline at end of file
+	import tempfile
+
+	cla_file = os.path.join(tempfile.gettempdir(), 'test.cla')
+	kern_classes = {'O_L': ['O', 'Q', 'C'], 'A_B': ['A', 'Aacute', 'Agrave']}
+
+	with CLAparser(cla_file, 'w') as writer:
+		writer.dump(kern_classes, 'Font: Test')
+
+	with open(cla_file, 'a') as cla_append:
+		cla_append.write('# Multi-line class\n@V_B = [V W\n\tY Yacute]; # trailing comment\n')
+
+	with CLAparser(cla_file) as reader:
+		for class_name, class_members in reader:
+			print(class_name, class_members)
+
+	os.remove(cla_file)
@@ -13,20 +13,48 @@ from datetime import datetime
 from typerig.core.base import message
 
 # - Init -----------------------------
-__version__ = '0.1.0'
+__version__ = '0.2.0'
+
+# - Helpers --------------------------
+def _to_number(value):
+	try:
+		return int(value)
+	except ValueError:
+		return float(value)
+
+def _from_number(value):
+	if isinstance(value, float) and value.is_integer():
+		return str(int(value))
+	return str(value)
 
 # - Classes --------------------------
 class KRNparser(object):
-	def __init__(self, file_path, file_mode='r'):
+	'''Buffered reader/writer for DTL Kern (KRN) files.
+	Reading yields pair records (first, second) or (first, second, value) one at a time,
+	without recursion and without loading the file in memory.
+
+	Constructor:
+		KRNparser(file_path, file_mode='r', buffer_size=65536)
+
+	Example:
+		with KRNparser('font.krn') as reader:
+			for pair in reader: print(pair)
+
+		with KRNparser('font.krn', 'w') as writer:
+			writer.dump({('A', 'V'): -80, ('T', 'o'): -40})
+	'''
+	def __init__(self, file_path, file_mode='r', buffer_size=65536):
 		# - File
 		self.__extension = '.krn'
 		self.__path = file_path
 		self.__mode = file_mode
+		self.__buffer_size = buffer_size
 		self.__file_object = None
-		
+		self.__reader = None
+
 		if not file_path.endswith(self.__extension):
 			raise NameError('ERROR:\t{} extension missing in file name: {}'.format(self.__extension, file_path))
-		
+
 		# - Vocabulary
 		self.__head_info = 		'Comment DTL Kern file (KRN)\nComment Generated by TypeRig (www.typerig.com)\n'
 		self.__comment_line = 	'Comment'
@@ -36,35 +64,63 @@ class KRNparser(object):
 		self.__data_end = 		'EndKernData\n'
 		self.__block_start = 	'StartKernPairs {}\n\n'
 		self.__block_end =  	'EndKernPairs\n'
-		
+
 	def __enter__(self):
-		self.__file_object = open(self.__path, self.__mode)
+		self.__file_object = open(self.__path, self.__mode, self.__buffer_size)
+
+		if self.__mode not in ('a', 'w'):
+			self.__reader = self.pairs()
+
 		return self
 
 	def __exit__(self, type, val, tb):
 		self.__file_object.close()
 
 	def __iter__(self):
-		return self
+		return self.__reader
 
 	def __next__(self):
-		new_line = self.__file_object.readline().strip()
-
-		if self.__file_object is None or new_line == b'':
+		if self.__reader is None:
 			raise StopIteration
-		else:
-			if self.__kern_line in new_line:
-				return tuple(new_line.strip(self.__kern_line).strip().split())
-			else:
-				return self.__next__()
+
+		return next(self.__reader)
 
 	def next(self):
 		# Python 2 fixup
 		return self.__next__()
 
-	def dump(self, pair_list, user_info=''):
+	# - Functions --------------------
+	def pairs(self):
+		'''Yield pair records: (first, second) or (first, second, value) if the file carries values'''
+		kern_line = self.__kern_line
+
+		for line in self.__file_object:
+			if kern_line not in line: continue
+			fields = line.split()
+
+			if len(fields) < 3 or fields[0] != kern_line: continue
+
+			if len(fields) > 3:
+				yield (fields[1], fields[2], _to_number(fields[3]))
+			else:
+				yield (fields[1], fields[2])
+
+	def dump(self, pair_list, user_info='', chunk_size=4096):
+		'''Write a full kerning table in one buffered pass.
+
+		Args:
+			pair_list list(tuple): Pairs (first, second) or (first, second, value);
+				or dict((first, second): value)
+			user_info str: Comment added to file header
+			chunk_size int: Pair lines joined per write call
+		'''
 		if self.__mode in ('a', 'w'):
 			# - Prepare
+			if isinstance(pair_list, dict):
+				pair_list = [(first, second, value) for (first, second), value in pair_list.items()]
+			elif not hasattr(pair_list, '__len__'):
+				pair_list = list(pair_list)
+
 			user_header = '\n'.join([self.__comment_line + ' ' + info for info in user_info.split('\n')])
 			creation_date = self.__comment_line + ' Created on: ' + datetime.now().strftime('%d/%m/%Y %H:%M:%S') +'\n'
 			pairs_start = self.__block_start.format(len(pair_list))
@@ -75,17 +131,28 @@ class KRNparser(object):
 						'\n' + 					\
 						self.__head_start + 	\
 						self.__data_start +		\
-						pairs_start 
+						pairs_start
 
 			file_tail = '\n' + self.__block_end + self.__data_end
 
 			# - Dump
-			self.__file_object.writelines(file_head)
+			write = self.__file_object.write
+			kern_line = self.__kern_line + ' '
+			write(file_head)
+
+			lines = []
+			for pair in pair_list:
+				if len(pair) > 2:
+					lines.append('{}{} {} {}\n'.format(kern_line, pair[0], pair[1], _from_number(pair[2])))
+				else:
+					lines.append('{}{} {}\n'.format(kern_line, pair[0], pair[1]))
 
-			for first, second in pair_list:
-				self.__file_object.write('{} {} {}\n'.format(self.__kern_line, first, second))
+				if len(lines) >= chunk_size:
+					write(''.join(lines))
+					del lines[:]
 
-			self.__file_object.writelines(file_tail)
+			write(''.join(lines))
+			write(file_tail)
 
 		else:
 			warnings.warn('File not in writable mode! Aborting!', message.FileSaveWarning)
@@ -93,17 +160,20 @@ class KRNparser(object):
 
 # - Test -----------------------------
 if __name__ == '__main__':
-	root_dir = os.path.dirname(os.path.dirname(__file__))
-	krn_filename = '1.txt.krn'
-	krn_filename_out = 'test.krn'
-	krn_file = os.path.join(root_dir, krn_filename)
-	krn_file_out = os.path.join(root_dir, krn_filename_out)
+	import tempfile, time
+
+	krn_file = os.path.join(tempfile.gettempdir(), 'test.krn')
+	kern_table = {('glyph{}'.format(idx), '@class{}'.format(idx % 300)): -(idx % 120) for idx in range(100000)}
+
+	start = time.time()
+	with KRNparser(krn_file, 'w') as writer:
+		writer.dump(kern_table, 'Font: Test')
+
+	write_time = time.time() - start
 
-	append_glyphs = []
+	start = time.time()
 	with KRNparser(krn_file) as reader:
-		for a in reader:
-			append_glyphs.append(a)
+		read_pairs = {(first, second): value for first, second, value in reader}
 
-	with KRNparser(krn_file_out, 'w') as writer:
-		writer.dump(append_glyphs)
-			
\ No newline at end of file
+	print('Pairs: {}; Write: {:.3f}s; Read: {:.3f}s; Match: {}'.format(len(read_pairs), write_time, time.time() - start, read_pairs == kern_table))
+	os.remove(krn_file)
@@ -0,0 +1,298 @@
+# MODULE: Typerig / IO / TypeRig Binary Kerning Parser (Objects)
+# -----------------------------------------------------------
+# (C) Vassil Kateliev, 2021 		(http://www.kateliev.com)
+# (C) Karandash Type Foundry 		(http://www.karandash.eu)
+#------------------------------------------------------------
+# www.typerig.com
+
+# No warranties. By using this you agree
+# that you use it at your own risk!
+
+# - Dependencies -------------------------
+from __future__ import print_function
+import os, io, mmap, struct, warnings
+
+from typerig.core.base import message
+
+try: # Optional: vectorized arrays
+	import numpy as np
+except ImportError:
+	np = None
+
+# - Init -----------------------------
+__version__ = '0.1.0'
+
+'''TypeRig binary kerning snapshot (.trk), all values little-endian:
+	Header:		magic '4s' (TRK1), version 'H', reserved 'H', strings 'I', classes 'I', members 'I', masters 'I', pairs 'I'
+	Strings:	offsets 'I' * (strings + 1), UTF-8 blob (glyph, class and master names)
+	Classes:	(name_id 'I', type 'I', member_start 'I', member_count 'I') * classes
+	Members:	string_id 'I' * members
+	Masters:	(name_id 'I', class_start 'I', class_count 'I', pair_start 'I', pair_count 'I') * masters
+	Pairs:		(left_id 'I', right_id 'I', value 'f') * pairs; ids with group_bit set refer to classes (groupMode)
+'''
+trk_magic = b'TRK1'
+trk_version = 1
+trk_header = struct.Struct('<4sHHIIIII')
+trk_class = struct.Struct('<IIII')
+trk_master = struct.Struct('<IIIII')
+trk_pair = struct.Struct('<IIf')
+group_bit = 1 << 31
+id_mask = group_bit - 1
+group_types = ('KernLeft', 'KernRight', 'KernBothSide')
+
+# - Helpers --------------------------
+def _to_value(value):
+	return int(value) if float(value).is_integer() else value
+
+# - Classes --------------------------
+class TRKparser(object):
+	'''Compact binary kerning snapshot: string table of glyph/class/master names,
+	class table and packed (left, right, value) pair arrays per master.
+	Reading memory-maps the file, so only the tables of the masters queried are decoded.
+
+	Constructor:
+		TRKparser(file_path, file_mode='r')
+
+	Methods (read):
+		.masters(): Master names
+		.kerning_dump(master, mark_groups='@', pairs_only=False): Same output as pFont.kerning_dump
+		.kerning_groups(master): Same output as pFont.kerning_groups_to_dict, dict(group: (members, type))
+		.kerning(master): dict((left, right, left_mode, right_mode): value)
+		.array(master): Raw pair array (left_id, right_id, value); NumPy structured array if available
+
+	Methods (write):
+		.dump(master_data): master_data is list or dict of master_name: (kerning_dump, kerning_groups)
+
+	Example:
+		with TRKparser('font.trk') as reader:
+			for master in reader.masters(): print(len(reader.kerning_dump(master)))
+	'''
+	def __init__(self, file_path, file_mode='r'):
+		# - File
+		self.__extension = '.trk'
+		self.__path = file_path
+		self.__mode = file_mode
+		self.__file_object = None
+		self.__map = None
+
+		if not file_path.endswith(self.__extension):
+			raise NameError('ERROR:\t{} extension missing in file name: {}'.format(self.__extension, file_path))
+
+		# - Tables
+		self.__strings = None
+		self.__master_index = {}
+
+	def __enter__(self):
+		if self.__mode in ('a', 'w'):
+			self.__file_object = io.open(self.__path, 'wb')
+		else:
+			self.__file_object = io.open(self.__path, 'rb')
+			self.__map = mmap.mmap(self.__file_object.fileno(), 0, access=mmap.ACCESS_READ)
+			self.__read_header()
+
+		return self
+
+	def __exit__(self, type, val, tb):
+		if self.__map is not None:
+			self.__map.close()
+			self.__map = None
+
+		self.__file_object.close()
+
+	# - Reader -----------------------
+	def __read_header(self):
+		magic, version, reserved, strings, classes, members, masters, pairs = trk_header.unpack_from(self.__map, 0)
+
+		if magic != trk_magic or version > trk_version:
+			raise ValueError('ERROR:\tNot a TypeRig binary kerning file (or newer version): {}'.format(self.__path))
+
+		self.__string_count = strings
+		self.__string_offsets = struct.unpack_from('<{}I'.format(strings + 1), self.__map, trk_header.size)
+		self.__string_data = trk_header.size + 4*(strings + 1)
+		self.__class_data = self.__string_data + self.__string_offsets[-1]
+		self.__member_data = self.__class_data + trk_class.size*classes
+		self.__master_data = self.__member_data + 4*members
+		self.__pair_data = self.__master_data + trk_master.size*masters
+
+		self.__masters = [trk_master.unpack_from(self.__map, self.__master_data + trk_master.size*idx) for idx in range(masters)]
+		self.__master_index = {self.string(master[0]): master for master in self.__masters}
+
+	def __master(self, master):
+		if master is None: return self.__masters[0]
+		if isinstance(master, int): return self.__masters[master]
+		return self.__master_index[master]
+
+	def names(self):
+		'''All names in the string table, decoded once'''
+		if self.__strings is None:
+			blob = self.__map[self.__string_data:self.__string_data + self.__string_offsets[-1]].decode('utf-8')
+			offsets = self.__string_offsets
+
+			if len(blob) == offsets[-1]: # - ASCII only: byte offsets are character offsets
+				self.__strings = [blob[offsets[idx]:offsets[idx + 1]] for idx in range(self.__string_count)]
+			else:
+				raw = self.__map[self.__string_data:self.__string_data + offsets[-1]]
+				self.__strings = [raw[offsets[idx]:offsets[idx + 1]].decode('utf-8') for idx in range(self.__string_count)]
+
+		return self.__strings
+
+	def string(self, string_id):
+		'''Name from the string table (group_bit is ignored)'''
+		return self.names()[string_id & id_mask]
+
+	def masters(self):
+		return [self.string(master[0]) for master in self.__masters]
+
+	def kerning_groups(self, master=None):
+		name_id, class_start, class_count, pair_start, pair_count = self.__master(master)
+		names, groups = self.names(), {}
+
+		for idx in range(class_start, class_start + class_count):
+			class_name, class_type, member_start, member_count = trk_class.unpack_from(self.__map, self.__class_data + trk_class.size*idx)
+			member_ids = struct.unpack_from('<{}I'.format(member_count), self.__map, self.__member_data + 4*member_start)
+			groups[names[class_name]] = ([names[member] for member in member_ids], group_types[class_type])
+
+		return groups
+
+	def array(self, master=None):
+		name_id, class_start, class_count, pair_start, pair_count = self.__master(master)
+		offset = self.__pair_data + trk_pair.size*pair_start
+
+		if np is not None:
+			# - Copy out of the map (a single memcpy), so the file can be closed while arrays are alive
+			return np.frombuffer(self.__map, dtype=[('left', '<u4'), ('right', '<u4'), ('value', '<f4')], count=pair_count, offset=offset).copy()
+
+		values = struct.unpack_from('<' + 'IIf'*pair_count, self.__map, offset)
+		return list(zip(values[0::3], values[1::3], values[2::3]))
+
+	def __columns(self, master, glyph_names, group_names):
+		'''Decode pair array to (left, right, value) columns, ids are looked up
+		in glyph_names or group_names by their mode'''
+		pair_array = self.array(master)
+
+		if np is not None:
+			glyph_lookup = np.array(glyph_names, dtype=object)
+			group_lookup = np.array(group_names, dtype=object)
+			columns = []
+
+			for side in ('left', 'right'):
+				ids = pair_array[side]
+				columns.append(np.where(ids >= group_bit, group_lookup[ids & id_mask], glyph_lookup[ids & id_mask]).tolist())
+
+			values = pair_array['value'].astype(float)
+			integral = values == np.floor(values)
+			values = values.astype(object)
+			values[integral] = pair_array['value'][integral].astype(int).astype(object)
+			columns.append(values.tolist())
+			return columns
+
+		pick = lambda string_id: group_names[string_id & id_mask] if string_id >= group_bit else glyph_names[string_id]
+		return ([pick(left) for left, right, value in pair_array], [pick(right) for left, right, value in pair_array], [_to_value(value) for left, right, value in pair_array])
+
+	def kerning(self, master=None):
+		names = self.names()
+		glyph_mode = [(name, 'glyphMode') for name in names]
+		group_mode = [(name, 'groupMode') for name in names]
+		left, right, values = self.__columns(master, glyph_mode, group_mode)
+		return {left_item + right_item: value for left_item, right_item, value in zip(left, right, values)}
+
+	def kerning_dump(self, master=None, mark_groups='@', pairs_only=False):
+		names = self.names()
+		left, right, values = self.__columns(master, names, [mark_groups + name for name in names])
+
+		if pairs_only:
+			return list(zip(left, right))
+
+		return list(zip(zip(left, right), values))
+
+	# - Writer -----------------------
+	def dump(self, master_data, mark_groups='@'):
+		'''Write kerning snapshot.
+
+		Args:
+			master_data list(tuple(master_name, (kerning_dump, kerning_groups))) or dict(master_name: (kerning_dump, kerning_groups)):
+				kerning_dump as returned by pFont.kerning_dump (groups marked with mark_groups),
+				kerning_groups as returned by pFont.kerning_groups_to_dict.
+			mark_groups (String): Group mark used in kerning_dump
+		'''
+		if self.__mode not in ('a', 'w'):
+			warnings.warn('File not in writable mode! Aborting!', message.FileSaveWarning)
+			return
+
+		if isinstance(master_data, dict): master_data = sorted(master_data.items())
+
+		# - Init
+		strings, string_ids = [], {}
+		class_table, member_table, master_table, pair_table = [], [], [], []
+		mark_len = len(mark_groups)
+
+		def string_id(name):
+			if name not in string_ids:
+				string_ids[name] = len(strings)
+				strings.append(name)
+
+			return string_ids[name]
+
+		def pair_id(name):
+			if mark_len and name.startswith(mark_groups):
+				return string_id(name[mark_len:]) | group_bit
+
+			return string_id(name)
+
+		# - Build tables
+		for master_name, (kern_pairs, kern_groups) in master_data:
+			class_start, pair_start = len(class_table), len(pair_table)
+
+			for group_name, (group_members, group_type) in sorted(kern_groups.items()):
+				class_table.append((string_id(group_name), group_types.index(group_type), len(member_table), len(group_members)))
+				member_table.extend([string_id(member) for member in group_members])
+
+			for (left, right), value in kern_pairs:
+				pair_table.append((pair_id(left), pair_id(right), value))
+
+			master_table.append((string_id(master_name), class_start, len(class_table) - class_start, pair_start, len(pair_table) - pair_start))
+
+		encoded = [item.encode('utf-8') for item in strings]
+		offsets = [0]
+		for item in encoded: offsets.append(offsets[-1] + len(item))
+
+		# - Dump
+		write = self.__file_object.write
+		write(trk_header.pack(trk_magic, trk_version, 0, len(strings), len(class_table), len(member_table), len(master_table), len(pair_table)))
+		write(struct.pack('<{}I'.format(len(offsets)), *offsets))
+		write(b''.join(encoded))
+		write(b''.join([trk_class.pack(*item) for item in class_table]))
+		write(struct.pack('<{}I'.format(len(member_table)), *member_table))
+		write(b''.join([trk_master.pack(*item) for item in master_table]))
+
+		if np is not None:
+			write(np.array(pair_table, dtype=[('left', '<u4'), ('right', '<u4'), ('value', '<f4')]).tobytes())
+		else:
+			write(b''.join([trk_pair.pack(*item) for item in pair_table]))
+
+
+# - Test -----------------------------
+if __name__ == '__main__':
+	import tempfile, time, random
+
+	trk_file = os.path.join(tempfile.gettempdir(), 'test.trk')
+	glyph_names = ['glyph{}'.format(idx) for idx in range(1000)]
+	kern_groups = {'class{}'.format(idx): (glyph_names[idx*5:idx*5 + 5], group_types[idx % 3]) for idx in range(150)}
+	master_data = []
+
+	for master in range(12):
+		kern_pairs = [((random.choice(glyph_names), '@' + random.choice(list(kern_groups.keys()))), random.randint(-150, 50)) for idx in range(100000)]
+		master_data.append(('Master {}'.format(master), (kern_pairs, kern_groups)))
+
+	start = time.time()
+	with TRKparser(trk_file, 'w') as writer:
+		writer.dump(master_data)
+
+	write_time = time.time() - start
+
+	start = time.time()
+	with TRKparser(trk_file) as reader:
+		read_data = [(master, (reader.kerning_dump(master), reader.kerning_groups(master))) for master in reader.masters()]
+
+	print('Size: {} KB; Write: {:.3f}s; Read: {:.3f}s; Match: {}'.format(os.path.getsize(trk_file)//1024, write_time, time.time() - start, read_data == master_data))
+	os.remove(trk_file)
@@ -0,0 +1,376 @@
+# MODULE: Typerig / IO / VFJ Stream Parser (Objects)
+# -----------------------------------------------------------
+# (C) Vassil Kateliev, 2020 		(http://www.kateliev.com)
+# (C) Karandash Type Foundry 		(http://www.karandash.eu)
+#------------------------------------------------------------
+# www.typerig.com
+
+# No warranties. By using this you agree
+# that you use it at your own risk!
+
+# - Dependencies -------------------------
+from __future__ import print_function
+import os, io, json, hashlib
+
+from typerig.core.objects.collection import jsontree
+
+# - Init -----------------------------
+__version__ = '0.2.1'
+
+# - Classes --------------------------
+class VFJparser(object):
+	'''Incremental (streaming) reader for VFJ (Fontlab JSON Font format) files.
+	Yields (key, value) records in file order: top level and font members as
+	a whole, while the members listed in stream_keys (masters, glyphs) are
+	yielded one element at a time. Only the current record and a read buffer
+	are kept in memory.
+
+	Constructor:
+		VFJparser(file_path, stream_keys=('masters', 'glyphs'), chunk_size=65536)
+
+	Example:
+		with VFJparser('font.vfj') as reader:
+			for key, value in reader:
+				if key == 'glyphs': print(value.name)
+	'''
+	def __init__(self, file_path, stream_keys=('masters', 'glyphs'), chunk_size=65536):
+		# - File
+		self.__extension = '.vfj'
+		self.__path = file_path
+		self.__file_object = None
+		self.__chunk_size = chunk_size
+		self.__stream_keys = stream_keys
+
+		if not file_path.endswith(self.__extension):
+			raise NameError('ERROR:\t{} extension missing in file name: {}'.format(self.__extension, file_path))
+
+		# - Buffer
+		self.__buffer = ''
+		self.__pos = 0
+		self.__eof = False
+
+		# - Byte offset tracking: absolute byte offset of buffer[mark]
+		self.__mark = 0
+		self.__mark_offset = 0
+		self.__decoder = json.JSONDecoder(object_hook=jsontree)
+
+		# - Vocabulary
+		self.__font_key = 'font'
+		self.__whitespace = ' \t\n\r'
+
+	def __enter__(self):
+		# - No newline translation, so that byte offsets match the file
+		self.__file_object = io.open(self.__path, 'r', encoding='utf-8', newline='')
+		self.__buffer, self.__pos, self.__eof = '', 0, False
+		self.__mark, self.__mark_offset = 0, 0
+		return self
+
+	def __exit__(self, type, val, tb):
+		self.__file_object.close()
+
+	def __iter__(self):
+		return self.__records()
+
+	# - Buffer -----------------------
+	def __fill(self, size=None):
+		'''Read more data, dropping the consumed part of the buffer. Returns False on EOF.'''
+		if self.__eof: return False
+		chunk = self.__file_object.read(size or self.__chunk_size)
+
+		if not chunk:
+			self.__eof = True
+			return False
+
+		self.__offset()
+		self.__buffer = self.__buffer[self.__pos:] + chunk
+		self.__pos = self.__mark = 0
+		return True
+
+	def __offset(self):
+		'''Absolute byte offset of the current position. Encodes only the text consumed since the last call.'''
+		if self.__pos > self.__mark:
+			self.__mark_offset += len(self.__buffer[self.__mark:self.__pos].encode('utf-8'))
+			self.__mark = self.__pos
+
+		return self.__mark_offset
+
+	def __peek(self):
+		'''Skip whitespace and return next character ('' on EOF)'''
+		while True:
+			while self.__pos < len(self.__buffer) and self.__buffer[self.__pos] in self.__whitespace:
+				self.__pos += 1
+
+			if self.__pos < len(self.__buffer):
+				return self.__buffer[self.__pos]
+
+			if not self.__fill():
+				return ''
+
+	def __expect(self, chars):
+		char = self.__peek()
+
+		if char not in chars or not char:
+			raise ValueError('ERROR:\tMalformed VFJ: expected {} got {} in {}'.format(repr(chars), repr(char), self.__path))
+
+		self.__pos += 1
+		return char
+
+	def __decode(self):
+		'''Decode a single JSON value at the current position, reading more data as needed'''
+		self.__peek()
+
+		while True:
+			try:
+				value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+
+				# - A value touching the end of buffer might be incomplete (ex. numbers)
+				if end < len(self.__buffer) or self.__eof:
+					self.__pos = end
+					return value
+
+			except ValueError:
+				if self.__eof: raise
+
+			# - Grow reads geometrically to keep re-parsing linear
+			self.__fill(max(self.__chunk_size, len(self.__buffer) - self.__pos))
+
+	# - Walkers ----------------------
+	def __members(self):
+		'''Walk members of an object: yields keys, values are consumed by the caller'''
+		self.__expect('{')
+		if self.__peek() == '}':
+			self.__pos += 1
+			return
+
+		while True:
+			key = self.__decode()
+			self.__expect(':')
+			yield key
+
+			if self.__expect(',}') == '}':
+				return
+
+	def __elements(self):
+		'''Walk an array yielding (element, (byte_offset, byte_length)) one by one'''
+		self.__expect('[')
+		if self.__peek() == ']':
+			self.__pos += 1
+			return
+
+		while True:
+			self.__peek()
+			start = self.__offset()
+			element = self.__decode()
+			yield element, (start, self.__offset() - start)
+
+			if self.__expect(',]') == ']':
+				return
+
+	def __records(self, spans=False):
+		for key in self.__members():
+			if key == self.__font_key and self.__peek() == '{':
+				for font_key in self.__members():
+					if font_key in self.__stream_keys and self.__peek() == '[':
+						for element, span in self.__elements():
+							yield (font_key, element, span) if spans else (font_key, element)
+					else:
+						value = self.__decode()
+						yield (font_key, value, None) if spans else (font_key, value)
+			else:
+				value = self.__decode()
+				yield (key, value, None) if spans else (key, value)
+
+	# - Functions --------------------
+	def glyphs(self):
+		'''Yield glyphs only'''
+		for key, value in self:
+			if key == 'glyphs': yield value
+
+	def spans(self):
+		'''Yield (key, value, span) records, where span is the (byte_offset, byte_length)
+		of the streamed elements in the file and None for all other records.'''
+		return self.__records(spans=True)
+
+	@staticmethod
+	def read_span(file_path, span):
+		'''Deserialize a single record stored at span (byte_offset, byte_length) of file_path'''
+		offset, length = span
+
+		with io.open(file_path, 'rb') as vfj_file:
+			vfj_file.seek(offset)
+			data = vfj_file.read(length).decode('utf-8')
+
+		return json.loads(data, object_hook=jsontree)
+
+
+class VFJindex(object):
+	'''Random access glyph index for VFJ files. Keeps a sidecar file (file_path + '.idx')
+	mapping glyph names and unicodes to the byte spans of the glyph records in the VFJ,
+	so that single glyphs can be deserialized without parsing the whole file.
+	The sidecar is rebuilt only when the size/modification time AND the hash of the VFJ change.
+
+	Constructor:
+		VFJindex(file_path, index_path=None, autoupdate=True)
+
+	Methods:
+		.update(force=False): Validate sidecar index, rebuild if stale; returns True if rebuilt
+		.build(): Build index by streaming the VFJ and save the sidecar
+		.locate(glyph_name): Byte span (offset, length) of glyph record
+		.name_of(unicode): Glyph name by unicode (INT or hex STR)
+		.glyph(glyph_name): Deserialize a single glyph
+		.glyph_by_unicode(unicode): Deserialize a single glyph by unicode
+		.glyphs(glyph_names): Deserialize glyphs, returned in glyph_names order (records read in file order)
+
+	Example:
+		index = VFJindex('font.vfj')
+		glyph = index.glyph('A')
+	'''
+	def __init__(self, file_path, index_path=None, autoupdate=True):
+		self.path = file_path
+		self.index_path = index_path or file_path + '.idx'
+		self.stamp = {}
+		self.names = {}		# name: (byte_offset, byte_length)
+		self.unicodes = {}	# unicode (INT): name
+		self.order = []		# names in file order
+
+		if autoupdate: self.update()
+
+	def __len__(self):
+		return len(self.order)
+
+	def __contains__(self, glyph_name):
+		return glyph_name in self.names
+
+	def __repr__(self):
+		return '<{}: {}, Glyphs: {}>'.format(self.__class__.__name__, self.path, len(self))
+
+	# - Internals --------------------
+	def __file_hash(self, block_size=1 << 20):
+		file_hash = hashlib.sha1()
+
+		with io.open(self.path, 'rb') as vfj_file:
+			for block in iter(lambda: vfj_file.read(block_size), b''):
+				file_hash.update(block)
+
+		return file_hash.hexdigest()
+
+	def __file_stat(self):
+		stat = os.stat(self.path)
+		return {'mtime': stat.st_mtime, 'size': stat.st_size}
+
+	@staticmethod
+	def __parse_unicodes(value):
+		'''VFJ glyphs store unicodes as hex strings ('0041' or '0041,0061') or integers'''
+		if value is None: return []
+		if isinstance(value, int): return [value]
+		if isinstance(value, (list, tuple)): return [u for item in value for u in VFJindex.__parse_unicodes(item)]
+		return [int(item, 16) for item in str(value).replace(' ', ',').split(',') if item]
+
+	def __load(self):
+		with io.open(self.index_path, 'r', encoding='utf-8') as index_file:
+			data = json.load(index_file)
+
+		self.stamp = data['stamp']
+		self.order = data['order']
+		self.names = dict((name, tuple(span)) for name, span in zip(self.order, data['spans']))
+		self.unicodes = dict((int(uni), name) for uni, name in data['unicodes'].items())
+
+	def __save(self):
+		data = {'version': __version__,
+				'stamp': self.stamp,
+				'order': self.order,
+				'spans': [self.names[name] for name in self.order],
+				'unicodes': dict((str(uni), name) for uni, name in self.unicodes.items())}
+
+		with open(self.index_path, 'w') as index_file:
+			json.dump(data, index_file)
+
+	# - Functions --------------------
+	def build(self):
+		self.names, self.unicodes, self.order = {}, {}, []
+
+		with VFJparser(self.path, stream_keys=('glyphs',)) as reader:
+			for key, value, span in reader.spans():
+				if key != 'glyphs': continue
+				self.names[value.name] = span
+				self.order.append(value.name)
+
+				for uni in self.__parse_unicodes(value.get('unicode')):
+					self.unicodes.setdefault(uni, value.name)
+
+		self.stamp = self.__file_stat()
+		self.stamp['hash'] = self.__file_hash()
+		self.__save()
+
+	def update(self, force=False):
+		if not force and not self.stamp and os.path.isfile(self.index_path):
+			try:
+				self.__load()
+			except (IOError, OSError, ValueError, KeyError, TypeError):
+				self.stamp = {}
+
+		if not force and self.stamp:
+			stat = self.__file_stat()
+			
+			# - Fast path: nothing touched the file
+			if all(self.stamp.get(key) == value for key, value in stat.items()):
+				return False
+
+			# - File touched but not changed: refresh stamp only
+			if self.stamp.get('size') == stat['size'] and self.stamp.get('hash') == self.__file_hash():
+				self.stamp.update(stat)
+				self.__save()
+				return False
+
+		self.build()
+		return True
+
+	def locate(self, glyph_name):
+		return self.names[glyph_name]
+
+	def name_of(self, unicode):
+		if not isinstance(unicode, int): unicode = int(unicode, 16)
+		return self.unicodes[unicode]
+
+	def glyph(self, glyph_name):
+		return VFJparser.read_span(self.path, self.locate(glyph_name))
+
+	def glyph_by_unicode(self, unicode):
+		return self.glyph(self.name_of(unicode))
+
+	def glyphs(self, glyph_names):
+		glyph_names = list(glyph_names)
+		spans = sorted(set((self.locate(name), name) for name in glyph_names)) # Raises KeyError for unknown names, as .glyph()
+		glyphs = {}
+		
+		with io.open(self.path, 'rb') as vfj_file:
+			for (offset, length), name in spans:
+				vfj_file.seek(offset)
+				glyphs[name] = json.loads(vfj_file.read(length).decode('utf-8'), object_hook=jsontree)
+
+		return [glyphs[name] for name in glyph_names]
+
+
+# - Test -----------------------------
+if __name__ == '__main__':
+	import os, tempfile
+
+	test_vfj = {'version': 8, 'type': 'font', 'font': {	'upm': 1000,
+														'glyphsCount': 2,
+														'glyphs': [{'name': 'A', 'unicode': '0041'}, {'name': 'B', 'unicode': '0042'}],
+														'masters': [{'fontMaster': {'name': 'Regular'}}],
+														'info': {'tfn': 'Test'}}}
+
+	test_path = os.path.join(tempfile.gettempdir(), 'test.vfj')
+	with open(test_path, 'w') as test_file:
+		json.dump(test_vfj, test_file, indent=1)
+
+	with VFJparser(test_path, chunk_size=16) as reader:
+		for key, value in reader:
+			print(key, value)
+
+	index = VFJindex(test_path)
+	print(index, index.locate('B'), index.glyph('B'), index.glyph_by_unicode('0041'))
+	print([glyph.name for glyph in index.glyphs(['B', 'A'])])
+	print('Rebuilt:', index.update())
+	os.remove(index.index_path)
@@ -13,7 +13,7 @@ from __future__ import absolute_import, print_function, division
 import math
 
 # - Init --------------------------------
-__version__ = '0.26.3'
+__version__ = '0.26.4'
 
 # - Functions ---------------------------
 # -- Point ------------------------------
@@ -228,15 +228,16 @@ def checkInnerOuter(firstAngle, lastAngle):
 	if dirAngle <= 0:	return False
 
 # - Ploygons ----------------------------------------
-def poly_area(vertices):
+def poly_area(vertices, signed=False):
+	'''Polygon area by the shoelace formula. Signed area is positive for counter clockwise polygons'''
 	corners = len(vertices) 
 	area = 0.0
 	
 	for i in range(corners):
 		j = (i + 1) % corners
-		area += abs(vertices[i][0]*vertices[j][1] - vertices[j][0]*vertices[i][1])
+		area += vertices[i][0]*vertices[j][1] - vertices[j][0]*vertices[i][1]
 
-	return area*0.5
+	return area*0.5 if signed else abs(area)*0.5
 
 if __name__ == '__main__':
 	A = (0,0); B = (0,200); C = (200,200); D = (200,0)
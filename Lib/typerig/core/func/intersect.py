@@ -0,0 +1,261 @@
+# MODULE: TypeRig / Core / Curve-line intersection (Functions)
+# -----------------------------------------------------------
+# (C) Vassil Kateliev, 2015-2021 	(http://www.kateliev.com)
+# (C) Karandash Type Foundry 		(http://www.karandash.eu)
+#------------------------------------------------------------
+# www.typerig.com
+
+# No warranties. By using this you agree
+# that you use it at your own risk!
+
+# - Dependencies ------------------------
+from __future__ import absolute_import, print_function, division
+import math
+
+try: # Optional: vectorized arrays
+	import numpy as np
+except ImportError:
+	np = None
+
+# - Init --------------------------------
+__version__ = '0.1.0'
+root_epsilon = 1e-12	# Relative size of a vanishing coefficient/discriminant
+time_epsilon = 1e-9		# Tolerance for roots at the ends of [0, 1]
+
+# - Functions ---------------------------
+# -- Polynomials ------------------------
+def _polish(a, b, c, d, t, iterations=2):
+	'''Newton polish a root of a*t^3 + b*t^2 + c*t + d'''
+	for i in range(iterations):
+		slope = (3.*a*t + 2.*b)*t + c
+		if slope == 0.: break
+		t -= (((a*t + b)*t + c)*t + d)/slope
+
+	return t
+
+def solve_cubic(a, b, c, d, t_min=0., t_max=1.):
+	'''Real roots of a*t^3 + b*t^2 + c*t + d within [t_min, t_max], sorted and unique.
+	Degenerates to quadratic and linear solutions for vanishing leading coefficients;
+	near double (tangent) roots are kept by treating tiny discriminants as zero.
+	'''
+	scale = max(abs(a), abs(b), abs(c), abs(d))
+	if scale == 0.: return []
+
+	eps = root_epsilon*scale
+	roots = []
+
+	if abs(a) > eps:
+		A, B, C = b/a, c/a, d/a
+		p = B - A*A/3.
+		q = 2.*A*A*A/27. - A*B/3. + C
+		q2, p3 = q/2., p/3.
+		discriminant = q2*q2 + p3*p3*p3
+
+		if discriminant > root_epsilon*max(q2*q2, abs(p3*p3*p3), root_epsilon):
+			sd = math.sqrt(discriminant)
+			u, v = -q2 + sd, -q2 - sd
+			roots = [math.copysign(abs(u)**(1./3.), u) + math.copysign(abs(v)**(1./3.), v) - A/3.]
+
+		elif p3 < 0.:
+			r = math.sqrt(-p3)
+			phi = math.acos(max(-1., min(1., -q2/(r*r*r))))
+			roots = [2.*r*math.cos((phi + 2.*math.pi*k)/3.) - A/3. for k in range(3)]
+
+		else: # Triple root
+			roots = [-A/3.]
+
+		roots = [_polish(a, b, c, d, t) for t in roots]
+
+	elif abs(b) > eps:
+		discriminant = c*c - 4.*b*d
+
+		if discriminant >= -eps*abs(c):
+			sd = math.sqrt(max(discriminant, 0.))
+			q = -.5*(c + math.copysign(sd, c))
+			roots = [q/b] + ([d/q] if q != 0. else [])
+
+	elif abs(c) > eps:
+		roots = [-d/c]
+
+	# - Clamp to range and remove duplicates
+	result = []
+	for t in sorted(roots):
+		if t_min - time_epsilon <= t <= t_max + time_epsilon:
+			t = min(max(t, t_min), t_max)
+			if not result or abs(t - result[-1]) > time_epsilon: result.append(t)
+
+	return result
+
+def bezier_coeffs(p0, p1, p2, p3):
+	'''Power basis coefficients (a, b, c, d) of a one dimensional cubic Bezier'''
+	return (-p0 + 3.*p1 - 3.*p2 + p3, 3.*p0 - 6.*p1 + 3.*p2, -3.*p0 + 3.*p1, p0)
+
+# -- Intersection -----------------------
+def _line_frames(lines):
+	'''Line origin, direction and squared length'''
+	frames = []
+	for (x0, y0), (x1, y1) in lines:
+		dx, dy = x1 - x0, y1 - y0
+		frames.append((x0, y0, dx, dy, dx*dx + dy*dy))
+
+	return frames
+
+def _is_line(item):
+	return len(item) == 2 and not hasattr(item[0][0], '__len__')
+
+def curve_line_intersections(curves, lines, segment=True):
+	'''Batched curve-line intersection: all crossings of cubic Beziers with one or many lines.
+
+	Args:
+		curves list(tuple((x0,y0), (x1,y1), (x2,y2), (x3,y3))): Cubic control polygons
+		lines tuple((x0,y0), (x1,y1)) or list(lines): Line(s) as point pairs
+		segment (bool): Keep only hits within the line segments, otherwise lines are infinite
+
+	Returns:
+		list(tuple(curve_index, line_index, t, x, y)): Hits sorted by curve, line and time
+	'''
+	if _is_line(lines): lines = [lines]
+	if not len(curves) or not len(lines): return []
+
+	if np is not None:
+		return _intersections_vectorized(curves, lines, segment)
+
+	hits = []
+	frames = _line_frames(lines)
+
+	for curve_index, ((x0, y0), (x1, y1), (x2, y2), (x3, y3)) in enumerate(curves):
+		ax, bx, cx, dx = bezier_coeffs(x0, x1, x2, x3)
+		ay, by, cy, dy = bezier_coeffs(y0, y1, y2, y3)
+
+		for line_index, (lx, ly, ux, uy, length) in enumerate(frames):
+			if length == 0.: continue
+
+			# - Signed distances of control points to the line (scaled by line length)
+			dist = [(x - lx)*uy - (y - ly)*ux for x, y in ((x0, y0), (x1, y1), (x2, y2), (x3, y3))]
+
+			# - Convex hull culling
+			if min(dist) > 0. or max(dist) < 0.: continue
+
+			for t in solve_cubic(*bezier_coeffs(*dist)):
+				x = ((ax*t + bx)*t + cx)*t + dx
+				y = ((ay*t + by)*t + cy)*t + dy
+
+				if segment:
+					u = ((x - lx)*ux + (y - ly)*uy)/length
+					if not -time_epsilon <= u <= 1. + time_epsilon: continue
+
+				hits.append((curve_index, line_index, t, x, y))
+
+	return hits
+
+def _intersections_vectorized(curves, lines, segment):
+	'''NumPy kernel of curve_line_intersections: all curve/line pairs solved at once'''
+	P = np.asarray(curves, dtype=float).reshape(-1, 4, 2)
+	L = np.asarray(lines, dtype=float).reshape(-1, 2, 2)
+	origin, direction = L[:, 0], L[:, 1] - L[:, 0]
+	length = (direction**2).sum(axis=1)
+
+	# - Signed distances of control points to the lines: (curves, lines, 4)
+	rel_x = P[:, None, :, 0] - origin[None, :, None, 0]
+	rel_y = P[:, None, :, 1] - origin[None, :, None, 1]
+	dist = rel_x*direction[None, :, None, 1] - rel_y*direction[None, :, None, 0]
+
+	# - Convex hull culling
+	keep = (dist.min(axis=2) <= 0.) & (dist.max(axis=2) >= 0.) & (length[None, :] > 0.)
+	curve_idx, line_idx = np.nonzero(keep)
+	if not len(curve_idx): return []
+
+	d0, d1, d2, d3 = [dist[curve_idx, line_idx, k] for k in range(4)]
+	a, b, c, d = bezier_coeffs(d0, d1, d2, d3)
+	roots = _solve_cubic_vectorized(a, b, c, d)
+
+	# - Hits
+	rows, cols = np.nonzero(~np.isnan(roots))
+	t = np.clip(roots[rows, cols], 0., 1.)
+	hit_curve, hit_line = curve_idx[rows], line_idx[rows]
+
+	mt = 1. - t
+	bernstein = np.stack((mt*mt*mt, 3.*mt*mt*t, 3.*mt*t*t, t*t*t), axis=1)
+	points = np.einsum('nk,nkd->nd', bernstein, P[hit_curve])
+
+	if segment:
+		u = ((points - origin[hit_line])*direction[hit_line]).sum(axis=1)/length[hit_line]
+		valid = (u >= -time_epsilon) & (u <= 1. + time_epsilon)
+		hit_curve, hit_line, t, points = hit_curve[valid], hit_line[valid], t[valid], points[valid]
+
+	order = np.lexsort((t, hit_line, hit_curve))
+	return list(zip(hit_curve[order].tolist(), hit_line[order].tolist(), t[order].tolist(), points[order, 0].tolist(), points[order, 1].tolist()))
+
+def _solve_cubic_vectorized(a, b, c, d):
+	'''Roots of many cubics in [0, 1]: array (n, 3), NaN where no root. Same cases as solve_cubic.'''
+	n = len(a)
+	roots = np.full((n, 3), np.nan)
+	scale = np.maximum(np.maximum(abs(a), abs(b)), np.maximum(abs(c), abs(d)))
+	eps = root_epsilon*scale
+
+	with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+		# - Cubic
+		cubic = abs(a) > eps
+		A, B, C = b/a, c/a, d/a
+		p3 = (B - A*A/3.)/3.
+		q2 = (2.*A*A*A/27. - A*B/3. + C)/2.
+		discriminant = q2*q2 + p3*p3*p3
+		single = cubic & (discriminant > root_epsilon*np.maximum(np.maximum(q2*q2, abs(p3*p3*p3)), root_epsilon))
+		triple = cubic & ~single & (p3 >= 0.)
+		three = cubic & ~single & ~triple
+
+		sd = np.sqrt(np.where(single, discriminant, 0.))
+		roots[single, 0] = (np.cbrt(-q2 + sd) + np.cbrt(-q2 - sd) - A/3.)[single]
+		roots[triple, 0] = (-A/3.)[triple]
+
+		r = np.sqrt(np.where(three, -p3, 1.))
+		phi = np.arccos(np.clip(-q2/(r*r*r), -1., 1.))
+		for k in range(3):
+			roots[three, k] = (2.*r*np.cos((phi + 2.*np.pi*k)/3.) - A/3.)[three]
+
+		# - Newton polish on the original polynomial
+		for i in range(2):
+			slope = (3.*a[:, None]*roots + 2.*b[:, None])*roots + c[:, None]
+			value = ((a[:, None]*roots + b[:, None])*roots + c[:, None])*roots + d[:, None]
+			step = np.where(cubic[:, None] & (slope != 0.), value/slope, 0.)
+			roots = roots - step
+
+		# - Quadratic
+		quadratic = ~cubic & (abs(b) > eps)
+		discriminant = c*c - 4.*b*d
+		quadratic &= discriminant >= -eps*abs(c)
+		q = -.5*(c + np.copysign(np.sqrt(np.maximum(discriminant, 0.)), c))
+		roots[quadratic, 0] = (q/b)[quadratic]
+		roots[quadratic & (q != 0.), 1] = (d/q)[quadratic & (q != 0.)]
+
+		# - Linear
+		linear = ~cubic & ~(abs(b) > eps) & (abs(c) > eps)
+		roots[linear, 0] = (-d/c)[linear]
+
+	# - Range and duplicates
+	roots[(roots < -time_epsilon) | (roots > 1. + time_epsilon)] = np.nan
+	roots = np.sort(np.clip(roots, 0., 1.), axis=1)
+	roots[:, 1:][np.abs(np.diff(roots, axis=1)) <= time_epsilon] = np.nan
+
+	return roots
+
+
+# - Test ----------------------------
+if __name__ == '__main__':
+	import random, time
+
+	print(solve_cubic(1., -1.5, .75, -.125))	# Triple root at .5
+	print(solve_cubic(0., 1., -1., .24))		# Quadratic: .4, .6
+	print(solve_cubic(0., 0., 2., -1.))			# Linear: .5
+
+	curve = ((0, 0), (0, 100), (100, 100), (100, 0))
+	print(curve_line_intersections([curve], ((-10, 50), (110, 50))))
+	print(curve_line_intersections([curve], ((-10, 75), (110, 75))))	# Tangent at the top
+
+	random.seed(1)
+	curves = [tuple((random.uniform(0, 1000), random.uniform(0, 1000)) for i in range(4)) for n in range(2000)]
+	lines = [((0, y), (1000, y)) for y in range(0, 1000, 10)]
+
+	start = time.time()
+	hits = curve_line_intersections(curves, lines)
+	print('Curves: {}; Lines: {}; Hits: {}; Time: {:.3f}s'.format(len(curves), len(lines), len(hits), time.time() - start))
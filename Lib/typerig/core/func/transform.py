@@ -13,8 +13,13 @@ from __future__ import absolute_import, print_function, division, unicode_litera
 
 import math
 
+try: # Optional: vectorized arrays
+	import numpy as np
+except ImportError:
+	np = None
+
 # - Init --------------------------------
-__version__ = '0.26.6'
+__version__ = '0.27.0'
 
 # - Functions ---------------------------
 def lerp(t0, t1, t):
@@ -161,6 +166,48 @@ def adaptive_scale_array(a, s, d, t, c, i, st):
 	'''
 	return list(map(lambda a_i: adaptive_scale(a_i, s, d, t, c, i, st), a))
 
+def adaptive_scale_numeric(x, y, s, d, t, c, i):
+	'''Perform adaptive scaling by keeping the stem/stroke weights on whole coordinate arrays at once (requires NumPy)
+	Args:
+		x(x0, x1, stx0, stx1) -> numpy.ndarray(N, 4) : Joined X coordinates and X stems for both weights
+		y(y0, y1, sty0, sty1) -> numpy.ndarray(N, 4) : Joined Y coordinates and Y stems for both weights
+		s(sx, sy) -> tuple((float, float) : Scale factors (X, Y)
+		d(dx, dy) -> tuple((float, float) : Translate values (X, Y) 
+		t(tx, ty) -> tuple((float, float) : Interpolation times (anisotropic X, Y) 
+		c(cx, cy) -> tuple((float, float) : Compensation factor 0.0 (no compensation) to 1.0 (full compensation) (X,Y)
+		i -> (radians) : Angle of sharing (for italic designs)  
+
+	Returns:
+		tuple(numpy.ndarray, numpy.ndarray): Transformed X and Y coordinates
+	'''
+	# - Helper
+	def compensator_numeric(sf, cf, st0, st1):
+		b = st1/st0
+		q = np.zeros_like(b)
+		np.divide(float(sf**(cf - 1.)) - b, 1. - b, out=q, where=b != 1.)
+		return q
+
+	# - Init
+	sx, sy = s
+	dx, dy = d
+	tx, ty = t
+	cx, cy = c
+
+	# - Calculate
+	vtx = lerp(x[:,0], x[:,1], tx)
+	vty = lerp(y[:,0], y[:,1], ty)
+
+	cstx = lerp(x[:,2], x[:,3], tx)
+	csty = lerp(y[:,2], y[:,3], ty)
+
+	qx = compensator_numeric(sx, cx, cstx, x[:,3])
+	qy = compensator_numeric(sy, cy, csty, y[:,3])
+
+	ry = sy*(qy*vty + (1 - qy)*y[:,1]) + dy
+	rx = sx*(qx*(vtx - vty*i) + (1 - qx)*(x[:,1] - y[:,1]*i)) + ry*i + dx
+
+	return rx, ry
+
 def target_scale_array(a, w, h, d, t, c, i, st):
 	'''Perform adaptive scaling by keeping the stem/stroke weights
 	Args:
@@ -16,13 +16,19 @@ try: # Py3+
 except ImportError: # Py2+
 	from collections import Sequence
 
+try: # Optional: vectorized arrays
+	import numpy as np
+except ImportError:
+	np = None
+
 from typerig.core.func.utils import isMultiInstance
 from typerig.core.objects.collection import CustomList
 from typerig.core.objects.point import Point, Void
 from typerig.core.objects.line import Line
+from typerig.core.objects.transform import Transform, identity
 
 # - Init -------------------------------
-__version__ = '0.26.8'
+__version__ = '0.27.0'
 
 # - Classes -----------------------------
 # -- Point Collections ------------------
@@ -143,4 +149,181 @@ class PointArray(CustomList):
 
 	def doTransform(self, transform=None):
 		for item in self.data:
-			item.doTransform(transform)
\ No newline at end of file
+			item.doTransform(transform)
+
+	def to_numeric(self):
+		'''Return a NumPy backed copy of the array (see NumPointArray)'''
+		return NumPointArray(self.tuple)
+
+class NumPointArray(Sequence):
+	'''Point array backed by a contiguous (N,2) float64 NumPy buffer.
+	Mirrors the PointArray API, but all arithmetic, bounds and transformations
+	are vectorized. Requires NumPy.
+
+	Constructor:
+		NumPointArray(ndarray): Wraps the given (N,2) float64 array without copying
+		NumPointArray(PointArray or list(Point) or list(tuple(x,y)))
+	'''
+	def __init__(self, data, transform=None):
+		if np is None: raise ImportError('ERROR:\tNumPy is required for <{}>!'.format(self.__class__.__name__))
+
+		if isinstance(data, self.__class__):
+			data = data.data
+
+		elif isinstance(data, PointArray) or (not isinstance(data, np.ndarray) and len(data) and isinstance(data[0], Point)):
+			data = [item.tuple for item in data]
+
+		self.data = np.asarray(data, dtype=np.float64).reshape(-1, 2)
+		self.transform = transform if transform is not None else identity
+
+	# - Internals
+	def __cast(self, other):
+		if isinstance(other, self.__class__):
+			return other.data
+
+		if isinstance(other, PointArray):
+			return np.asarray(other.tuple, dtype=np.float64)
+
+		if isinstance(other, Point):
+			return np.array(other.tuple, dtype=np.float64)
+
+		return other # Scalars and (x, y) tuples broadcast as they are
+
+	def __getitem__(self, i):
+		if isinstance(i, slice):
+			return self.__class__(self.data[i])
+
+		return Point(*self.data[i].tolist())
+
+	def __setitem__(self, i, item):
+		self.data[i] = item.tuple if isinstance(item, Point) else item
+
+	def __len__(self):
+		return self.data.shape[0]
+
+	def __iter__(self):
+		for x, y in self.data.tolist():
+			yield Point(x, y)
+
+	def __eq__(self, other):
+		return isinstance(other, (self.__class__, PointArray)) and len(self) == len(other) and bool(np.all(self.data == self.__cast(other)))
+
+	def __ne__(self, other):
+		return not self.__eq__(other)
+
+	__hash__ = None
+
+	def __add__(self, other):
+		return self.__class__(self.data + self.__cast(other))
+
+	__radd__ = __add__
+
+	def __sub__(self, other):
+		return self.__class__(self.data - self.__cast(other))
+
+	def __rsub__(self, other):
+		return self.__class__(self.__cast(other) - self.data)
+
+	def __mul__(self, other):
+		if isinstance(other, (self.__class__, PointArray)): # Complex product as in Point
+			a = np.ascontiguousarray(self.data).view(np.complex128)
+			b = np.ascontiguousarray(self.__cast(other)).view(np.complex128)
+			return self.__class__((a*b).view(np.float64))
+
+		return self.__class__(self.data * self.__cast(other))
+
+	__rmul__ = __mul__
+
+	def __div__(self, other):
+		if isinstance(other, (self.__class__, PointArray)): # Complex division as in Point
+			a = np.ascontiguousarray(self.data).view(np.complex128)
+			b = np.ascontiguousarray(self.__cast(other)).view(np.complex128)
+			return self.__class__((a/b).view(np.float64))
+
+		return self.__class__(self.data / self.__cast(other))
+
+	__truediv__ = __div__
+
+	def __neg__(self):
+		return self.__class__(-self.data)
+
+	def __repr__(self):
+		return '<Numeric Point Array: {}>'.format(self.data.tolist())
+
+	# - Properties
+	@property
+	def tuple(self):
+		return tuple(map(tuple, self.data.tolist()))
+
+	@property
+	def x_tuple(self):
+		return tuple(self.data[:,0].tolist())
+
+	@property
+	def y_tuple(self):
+		return tuple(self.data[:,1].tolist())
+
+	@property
+	def x_array(self):
+		'''Zero-copy view of X coordinates'''
+		return self.data[:,0]
+
+	@property
+	def y_array(self):
+		'''Zero-copy view of Y coordinates'''
+		return self.data[:,1]
+
+	@property
+	def x(self):
+		return float(self.data[:,0].min())
+
+	@property
+	def y(self):
+		return float(self.data[:,1].min())
+
+	@property
+	def height(self):
+		return float(np.ptp(self.data[:,1]))
+
+	@property
+	def width(self):
+		return float(np.ptp(self.data[:,0]))
+
+	@property
+	def center(self):
+		x_min, y_min = self.data.min(axis=0).tolist()
+		x_max, y_max = self.data.max(axis=0).tolist()
+		return ((x_max - x_min)/2 + x_min, (y_max - y_min)/2 + y_min)
+
+	@property
+	def bounds(self):
+		x_min, y_min = self.data.min(axis=0).tolist()
+		x_max, y_max = self.data.max(axis=0).tolist()
+		return (x_min, y_min, x_max - x_min, y_max - y_min)
+
+	@property
+	def diffs(self):
+		return np.hypot(*np.diff(self.data, axis=0).T).tolist()
+
+	@property
+	def angles(self):
+		# - Same convention as Point.angle_to(other, add=90)
+		delta = np.diff(self.data, axis=0)
+		with np.errstate(invalid='ignore'):
+			angles = np.arctan2(delta[:,1], delta[:,0]) % (2*np.pi) + np.pi/2
+		angles[np.hypot(delta[:,0], delta[:,1]) == 0] = np.nan
+		return angles.tolist()
+
+	# - Functions
+	def copy(self):
+		return self.__class__(self.data.copy(), transform=self.transform)
+
+	def to_points(self):
+		'''Return a regular PointArray of Point objects'''
+		return PointArray(self.tuple)
+
+	def doTransform(self, transform=None):
+		'''Apply affine transformation in place'''
+		if transform is None: transform = self.transform
+		xx, xy, yx, yy, dx, dy = [float(item) for item in transform]
+		self.data[:] = self.data.dot(np.array(((xx, xy), (yx, yy)))) + (dx, dy)
\ No newline at end of file
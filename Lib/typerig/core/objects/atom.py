@@ -11,12 +11,25 @@
 
 # - Dependencies ------------------------
 from __future__ import absolute_import, print_function, division
-import copy, uuid
+import copy, uuid, itertools, functools, operator
 
 from typerig.core.objects.collection import CustomList
 
 # - Init -------------------------------
-__version__ = '0.2.1'
+__version__ = '0.4.2'
+
+# - UID allocation modes:
+# -- 'uuid': uuid4 on construction;
+# -- 'lazy': uuid4 on first use (hash, .uid) - default;
+# -- 'counter': cheap monotonic integers, unique within the current process only.
+uid_modes = ('uuid', 'lazy', 'counter')
+uid_mode = 'lazy'
+uid_counter = itertools.count(1)
+
+# - Edit versions: an edit stamps the container and its parents with the current edit epoch;
+# -- observing a version that equals the epoch advances the epoch, so the next edit changes it.
+# -- Bursts of edits between observations stop climbing at the first container already stamped.
+edit_epoch = 1
 
 # - Keep compatibility for basestring checks
 try:
@@ -24,6 +37,67 @@ try:
 except NameError:
 	basestring = (str, bytes)
 
+# - Functions --------------------------
+def set_uid_mode(mode):
+	'''Set how Member and Container uids are allocated (see uid_modes)'''
+	global uid_mode
+	assert mode in uid_modes, 'ERROR:\tUnknown uid mode: {}! Use one of {}'.format(mode, uid_modes)
+	uid_mode = mode
+
+def new_uid():
+	return next(uid_counter) if uid_mode == 'counter' else uuid.uuid4()
+
+def touch(item):
+	'''Mark Container item and all of its parents as edited'''
+	epoch = edit_epoch
+
+	while isinstance(item, Container) and getattr(item, '_version', None) != epoch:
+		object.__setattr__(item, '_version', epoch)
+		item = getattr(item, 'parent', None)
+
+def get_version(item):
+	'''Edit version of Container item: any later edit of item or its members changes it'''
+	global edit_epoch
+	version = item._version
+
+	if version == edit_epoch:
+		edit_epoch += 1
+
+	return version
+
+def versioned(slot):
+	'''Property over a Member slot: assignment marks the parent container as edited (see touch)'''
+	def setter(self, value):
+		object.__setattr__(self, slot, value)
+		touch(getattr(self, 'parent', None))
+
+	return property(operator.attrgetter(slot), setter)
+
+def memoized(method):
+	'''Decorator: cache the result of a Container method without arguments 
+	until the container or any of its members is edited (see touch).
+	Cached results are shared between calls: cache immutable values (tuples, numbers)
+	and build new mutable objects from them on every read. Query structures that are 
+	only read (ex. SegmentBVH) may be cached as they are, documented as shared.
+	Proxy containers (host application objects) are never cached.
+	'''
+	name = method.__name__
+
+	@functools.wraps(method)
+	def wrapper(self):
+		cache = self._cache
+		if cache is None: return method(self)
+
+		version = get_version(self)
+		entry = cache.get(name)
+		if entry is not None and entry[0] == version: return entry[1]
+
+		value = method(self)
+		cache[name] = (version, value)
+		return value
+
+	return wrapper
+
 # - Objects ----------------------------
 class Atom(object):
 	'''Sentinel'''
@@ -32,23 +106,62 @@ class Atom(object):
 	def __init__(self, *args, **kwargs):
 		pass
 
+def member_index(member):
+	'''Position of a Member/Container within its parent. 
+	Uses the index cached on the member (O(1)) and falls back to reindexing
+	the parent once if the cache is stale (ex. parent.data was replaced).
+	'''
+	parent = member.parent
+	if parent is None: raise AttributeError('Orphan {}: Cannot find index!'.format(member.__class__.__name__))
+	data = getattr(parent, 'data', parent)
+	
+	for attempt in range(2):
+		try:
+			if data[member._idx] is member: 
+				return member._idx
+		
+		except (IndexError, TypeError):
+			pass
+
+		if attempt or not isinstance(parent, Container): break
+		parent.reindex()
+
+	for idx, item in enumerate(data):
+		if item is member:
+			member._idx = idx
+			return idx
+
+	raise ValueError('{} is not in {}'.format(member, parent.__class__.__name__))
+
 class Member(Atom):
 	''' A primitive that is a member of a sequence. '''
-	__slots__ = ('uid', 'identifier', 'parent', 'lib')
+	__slots__ = ('_uid', 'identifier', 'parent', 'lib', '_idx')
 
 	def __init__(self, *args, **kwargs):
-		self.uid = uuid.uuid4()
+		self._uid = new_uid() if uid_mode != 'lazy' else None
 		self.parent = kwargs.pop('parent', None)
 		self.identifier = kwargs.get('identifier', None)
+		self._idx = None
 
 	# - Internals -----------------------
 	def __hash__(self):
 		return hash(self.uid)
 
 	# - Properties -----------------------	
+	@property
+	def uid(self):
+		if self._uid is None:
+			self._uid = new_uid()
+
+		return self._uid
+
+	@uid.setter
+	def uid(self, value):
+		self._uid = value
+
 	@property
 	def idx(self):
-		return self.parent.index(self)
+		return member_index(self)
 	
 	@property
 	def next(self):
@@ -77,17 +190,23 @@ class Member(Atom):
 		return copy.deepcopy(self)
 
 class Container(CustomList, Atom):
-	''' A primitive that is a member of a sequence and sequence of its own. '''
-	__slots__ = ('data', 'uid', 'identifier', 'parent', 'lib', '_lock', '_subclass')
+	''' A primitive that is a member of a sequence and sequence of its own. 
+	Every edit (of members, member geometry or versioned attributes) bumps .version 
+	of the container and its parents, invalidating values cached by memoized.
+	'''
+	__slots__ = ('data', '_uid', 'identifier', 'parent', 'lib', '_lock', '_subclass', '_idx', '_version', '_cache')
+	_versioned = frozenset(('data',)) # Attributes that change the geometry (see touch)
 
 	def __init__(self, data=None, **kwargs):
 		super(Container, self).__init__(data, **kwargs)
 
 		# - Init
-		self.uid = uuid.uuid4()
+		self._cache = {} if not kwargs.get('proxy', False) else None # Host objects can change behind our back
+		self._uid = new_uid() if uid_mode != 'lazy' else None
 		self.parent = kwargs.pop('parent', None)
 		self._lock = kwargs.pop('locked', False)
 		self._subclass = kwargs.pop('default_factory', self.__class__)
+		self._idx = None
 
 		# - Process data
 		if len(self.data):
@@ -99,6 +218,8 @@ class Container(CustomList, Atom):
 				# -- Cache to _subclass or on demand casting (might will reduce overheat).
 				elif not isinstance(self.data[idx], (int, float, basestring)):
 					self.data[idx] = self._subclass(self.data[idx], parent=self)
+
+			self.reindex()
 				
 	# - Internals ----------------------
 	def __hash__(self):
@@ -107,6 +228,7 @@ class Container(CustomList, Atom):
 	def __getitem__(self, i):
 		if not isinstance(self.data[i], self._subclass):
 			self.data[i] = self._subclass(self.data[i], parent=self)
+			self.data[i]._idx = i % len(self.data)
 
 		return self.data[i]
 
@@ -115,14 +237,42 @@ class Container(CustomList, Atom):
 			item = self._subclass(item, parent=self)
 
 		self.data[i] = item
+		touch(self)
+		
+		if isinstance(item, (Member, Container)):
+			item._idx = i % len(self.data)
+
+	def __delitem__(self, i):
+		del self.data[i]
+		touch(self)
+
+	def __setattr__(self, name, value):
+		object.__setattr__(self, name, value)
+		if name in self._versioned: touch(self)
 
 	def __repr__(self):
 		return '<{}: {}>'.format(self.__class__.__name__, repr(self.data))
 
 	# - Properties -----------------------	
+	@property
+	def version(self):
+		'''Edit version: changes whenever the container or any of its members is edited'''
+		return get_version(self)
+
+	@property
+	def uid(self):
+		if self._uid is None:
+			self._uid = new_uid()
+
+		return self._uid
+
+	@uid.setter
+	def uid(self, value):
+		self._uid = value
+
 	@property
 	def idx(self):
-		return self.parent.index(self)
+		return member_index(self)
 	
 	@property
 	def next(self):
@@ -147,6 +297,14 @@ class Container(CustomList, Atom):
 			return None
 
 	# - Methods ------------------------
+	def reindex(self, start=0):
+		'''Refresh cached member positions (from start onward)'''
+		data = self.data
+
+		for idx in range(start, len(data)):
+			if isinstance(data[idx], (Member, Container)):
+				data[idx]._idx = idx
+
 	def insert(self, i, item):
 		if not self._lock:
 			if isinstance(item, self._subclass):
@@ -156,13 +314,24 @@ class Container(CustomList, Atom):
 				item = self._subclass(item, parent=self) 
 
 			self.data.insert(i, item)
+			self.reindex(max(0, min(i, len(self.data) - 1) if i >= 0 else len(self.data) + i - 1))
+			touch(self)
 
 	def pop(self, i=-1): 
-		if not self._lock:
-			if isinstance(item, self._subclass):
+		item = self.data.pop(i)
+		touch(self)
+		start = i if i >= 0 else len(self.data) + 1 + i
+		
+		if start < len(self.data): 
+			self.reindex(start)
+
+		if isinstance(item, (Member, Container)):
+			if not self._lock and isinstance(item, self._subclass):
 				item.parent = None
 
-		return self.data.pop(i)
+			item._idx = None
+
+		return item
 
 	def append(self, item):
 		if not self._lock:
@@ -173,6 +342,26 @@ class Container(CustomList, Atom):
 				item = self._subclass(item, parent=self)
 
 			self.data.append(item)
+			touch(self)
+
+			if isinstance(item, (Member, Container)):
+				item._idx = len(self.data) - 1
+
+	def remove(self, item):
+		self.data.remove(item)
+		touch(self)
+
+	def extend(self, other):
+		super(Container, self).extend(other)
+		touch(self)
+
+	def reverse(self):
+		self.data.reverse()
+		touch(self)
+
+	def sort(self, *args, **kwds):
+		self.data.sort(*args, **kwds)
+		touch(self)
 
 	# - Functions ----------------------
 	def clone(self):
@@ -253,4 +442,26 @@ if __name__ == "__main__":
 	dc = Container([ac, bc, cc, (20,30)])
 	print(cc.next.next)
 
+	# - Benchmark: full traversal via .next should scale linearly
+	from timeit import default_timer as timer
+	
+	for count in (1000, 2000, 4000, 8000, 16000):
+		container = Container([(i, i) for i in range(count)], default_factory=Member)
+		member = container[0]
+		start = timer()
+
+		for i in range(count):
+			member = member.next
+
+		print('Traverse {} members: {:.4f} sec'.format(count, timer() - start))
+
+	# - Benchmark: bulk construction per uid mode
+	for mode in uid_modes:
+		set_uid_mode(mode)
+		start = timer()
+		container = Container([(i, i) for i in range(100000)], default_factory=Member)
+		print('Build 100000 members, uid mode {}: {:.4f} sec'.format(mode, timer() - start))
+
+	set_uid_mode('lazy')
+
 
@@ -0,0 +1,265 @@
+# MODULE: TypeRig / Core / Bounding volume hierarchy (Object)
+# -----------------------------------------------------------
+# (C) Vassil Kateliev, 2017-2021 	(http://www.kateliev.com)
+# (C) Karandash Type Foundry 		(http://www.karandash.eu)
+#------------------------------------------------------------
+# www.typerig.com
+
+# No warranties. By using this you agree
+# that you use it at your own risk!
+
+# - Dependencies ------------------------
+from __future__ import absolute_import, print_function, division
+import math, heapq
+
+from typerig.core.objects.point import Point
+from typerig.core.objects.line import Line
+from typerig.core.objects.cubicbezier import CubicBezier
+from typerig.core.func.intersect import curve_line_intersections, time_epsilon
+
+# - Init -------------------------------
+__version__ = '0.1.0'
+
+# - Functions ---------------------------
+def segment_box(segment):
+	'''Tight axis aligned bounding box (xmin, ymin, xmax, ymax) of Line or CubicBezier: ends and extremes'''
+	if isinstance(segment, CubicBezier):
+		points = [segment.p0.tuple, segment.p3.tuple] + [point.tuple for point, time in segment.solve_extremes()]
+	else:
+		points = [segment.p0.tuple, segment.p1.tuple]
+
+	xs, ys = [x for x, y in points], [y for x, y in points]
+	return (min(xs), min(ys), max(xs), max(ys))
+
+def box_distance(box, x, y):
+	'''Distance from point to box (0 inside)'''
+	dx = max(box[0] - x, 0., x - box[2])
+	dy = max(box[1] - y, 0., y - box[3])
+	return math.hypot(dx, dy)
+
+def box_line_overlap(box, x0, y0, x1, y1):
+	'''Line segment vs box test by slab clipping (Liang-Barsky)'''
+	t_enter, t_exit = 0., 1.
+
+	for origin, delta, low, high in ((x0, x1 - x0, box[0], box[2]), (y0, y1 - y0, box[1], box[3])):
+		if delta == 0.:
+			if origin < low or origin > high: return False
+			continue
+
+		t_low, t_high = (low - origin)/delta, (high - origin)/delta
+		if t_low > t_high: t_low, t_high = t_high, t_low
+
+		t_enter, t_exit = max(t_enter, t_low), min(t_exit, t_high)
+		if t_enter > t_exit: return False
+
+	return True
+
+def closest_time(segment, x, y, samples=16, iterations=4):
+	'''Time and distance of the point on segment closest to (x, y)'''
+	if isinstance(segment, Line):
+		x0, y0 = segment.p0.tuple
+		dx, dy = segment.p1.x - x0, segment.p1.y - y0
+		length = dx*dx + dy*dy
+		t = min(max(((x - x0)*dx + (y - y0)*dy)/length, 0.), 1.) if length else 0.
+		return t, math.hypot(x0 + dx*t - x, y0 + dy*t - y)
+
+	# - Cubic: coarse sampling, then Newton on d/dt |B(t) - P|^2
+	(x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment.tuple
+	ax, bx, cx, dx = -x0 + 3.*x1 - 3.*x2 + x3, 3.*x0 - 6.*x1 + 3.*x2, -3.*x0 + 3.*x1, x0 - x
+	ay, by, cy, dy = -y0 + 3.*y1 - 3.*y2 + y3, 3.*y0 - 6.*y1 + 3.*y2, -3.*y0 + 3.*y1, y0 - y
+	position = lambda t: (((ax*t + bx)*t + cx)*t + dx, ((ay*t + by)*t + cy)*t + dy)
+
+	best_t = min((idx/samples for idx in range(samples + 1)), key=lambda t: math.hypot(*position(t)))
+
+	for i in range(iterations):
+		px, py = position(best_t)
+		d1x, d1y = (3.*ax*best_t + 2.*bx)*best_t + cx, (3.*ay*best_t + 2.*by)*best_t + cy
+		d2x, d2y = 6.*ax*best_t + 2.*bx, 6.*ay*best_t + 2.*by
+		slope = d1x*d1x + d1y*d1y + px*d2x + py*d2y
+		if slope == 0.: break
+		best_t = min(max(best_t - (px*d1x + py*d1y)/slope, 0.), 1.)
+
+	return best_t, math.hypot(*position(best_t))
+
+# - Classes -----------------------------
+class SegmentBVH(object):
+	'''Bounding volume hierarchy over outline segments (Line, CubicBezier),
+	built top-down by median split of segment boxes along the longer axis.
+
+	Constructor:
+		SegmentBVH(segments, keys=None, leaf_size=4)
+
+	Args:
+		segments list(Line or CubicBezier): Segments to index
+		keys list: Key reported for every segment, segment index if None
+
+	Methods:
+		.query_box(box): Segments whose boxes overlap box (xmin, ymin, xmax, ymax)
+		.query_line(line): Segments whose boxes are crossed by line segment
+		.intersect_line(line): Exact line crossings of candidate segments
+		.nearest(point): Nearest segment to point
+
+	Results are lists of (key, segment) or hit tuples starting with key.
+	'''
+	def __init__(self, segments, keys=None, leaf_size=4):
+		self.segments = list(segments)
+		self.keys = list(keys) if keys is not None else list(range(len(self.segments)))
+		self.boxes = [segment_box(segment) for segment in self.segments]
+		self.leaf_size = leaf_size
+
+		# - Flat node arrays: box, children (left, right) or leaf item range (start, count)
+		self.__node_box = []
+		self.__node_data = []
+		self.__items = list(range(len(self.segments)))
+		if len(self.segments): self.__build()
+
+	def __len__(self):
+		return len(self.segments)
+
+	def __repr__(self):
+		return '<{}: Segments={}, Nodes={}>'.format(self.__class__.__name__, len(self.segments), len(self.__node_box))
+
+	# - Internals ---------------------------
+	def __new_node(self, start, end):
+		boxes = [self.boxes[item] for item in self.__items[start:end]]
+		self.__node_box.append((min(box[0] for box in boxes), min(box[1] for box in boxes), max(box[2] for box in boxes), max(box[3] for box in boxes)))
+		self.__node_data.append(None)
+		return len(self.__node_box) - 1
+
+	def __build(self):
+		items, boxes = self.__items, self.boxes
+		stack = [(self.__new_node(0, len(items)), 0, len(items))]
+
+		while stack:
+			node, start, end = stack.pop()
+
+			if end - start <= self.leaf_size:
+				self.__node_data[node] = (False, start, end - start)
+				continue
+
+			# - Median split by box centers along the longer axis
+			xmin, ymin, xmax, ymax = self.__node_box[node]
+			axis = 0 if xmax - xmin >= ymax - ymin else 1
+			items[start:end] = sorted(items[start:end], key=lambda item: boxes[item][axis] + boxes[item][axis + 2])
+			mid = (start + end)//2
+
+			left, right = self.__new_node(start, mid), self.__new_node(mid, end)
+			self.__node_data[node] = (True, left, right)
+			stack.append((left, start, mid))
+			stack.append((right, mid, end))
+
+	def __traverse(self, overlap):
+		'''Yield items of leaves whose boxes pass the overlap test'''
+		if not self.segments: return
+		stack = [0]
+
+		while stack:
+			node = stack.pop()
+			if not overlap(self.__node_box[node]): continue
+
+			is_branch, first, second = self.__node_data[node]
+			if is_branch:
+				stack.append(first)
+				stack.append(second)
+			else:
+				for item in self.__items[first:first + second]:
+					if overlap(self.boxes[item]): yield item
+
+	# - Queries -----------------------------
+	def query_box(self, box):
+		xmin, ymin, xmax, ymax = (box.x, box.y, box.xmax, box.ymax) if hasattr(box, 'xmax') else box
+		overlap = lambda other: other[0] <= xmax and other[2] >= xmin and other[1] <= ymax and other[3] >= ymin
+		return [(self.keys[item], self.segments[item]) for item in self.__traverse(overlap)]
+
+	def query_line(self, line):
+		(x0, y0), (x1, y1) = line.tuple if isinstance(line, Line) else line
+		overlap = lambda box: box_line_overlap(box, x0, y0, x1, y1)
+		return [(self.keys[item], self.segments[item]) for item in self.__traverse(overlap)]
+
+	def intersect_line(self, line):
+		'''Exact crossings of line segment with candidate segments: list((key, time, x, y)) sorted by key order and time'''
+		line = line.tuple if isinstance(line, Line) else tuple(line)
+		(x0, y0), (x1, y1) = line
+		candidates = list(self.__traverse(lambda box: box_line_overlap(box, x0, y0, x1, y1)))
+		curves = [item for item in candidates if isinstance(self.segments[item], CubicBezier)]
+		hits = []
+
+		# - Curves: batched kernel
+		for curve_index, line_index, time, x, y in curve_line_intersections([self.segments[item].tuple for item in curves], [line]):
+			hits.append((curves[curve_index], time, x, y))
+
+		# - Lines: direct solution
+		dx, dy = x1 - x0, y1 - y0
+		for item in candidates:
+			segment = self.segments[item]
+			if not isinstance(segment, Line): continue
+
+			(sx0, sy0), (sx1, sy1) = segment.tuple
+			ex, ey = sx1 - sx0, sy1 - sy0
+			denominator = ex*dy - ey*dx
+			if denominator == 0.: continue
+
+			time = ((x0 - sx0)*dy - (y0 - sy0)*dx)/denominator
+			u = ((x0 - sx0)*ey - (y0 - sy0)*ex)/denominator
+
+			if -time_epsilon <= time <= 1. + time_epsilon and -time_epsilon <= u <= 1. + time_epsilon:
+				time = min(max(time, 0.), 1.)
+				hits.append((item, time, sx0 + ex*time, sy0 + ey*time))
+
+		return [(self.keys[item], time, x, y) for item, time, x, y in sorted(hits)]
+
+	def nearest(self, point, max_distance=float('inf')):
+		'''Nearest segment to point: (key, segment, time, distance), None if nothing within max_distance'''
+		if not self.segments: return
+		x, y = point.tuple if isinstance(point, Point) else point
+		best = None
+		heap = [(box_distance(self.__node_box[0], x, y), 0)]
+
+		# - Best first search: visit nodes by box distance, stop when no box can be closer
+		while heap:
+			distance, node = heapq.heappop(heap)
+			if distance > max_distance: break
+
+			is_branch, first, second = self.__node_data[node]
+			if is_branch:
+				for child in (first, second):
+					child_distance = box_distance(self.__node_box[child], x, y)
+					if child_distance <= max_distance: heapq.heappush(heap, (child_distance, child))
+				continue
+
+			for item in self.__items[first:first + second]:
+				if box_distance(self.boxes[item], x, y) > max_distance: continue
+				time, item_distance = closest_time(self.segments[item], x, y)
+
+				if item_distance <= max_distance:
+					max_distance = item_distance
+					best = (self.keys[item], self.segments[item], time, item_distance)
+
+		return best
+
+
+# - Test ----------------------------
+if __name__ == '__main__':
+	import random, time
+
+	random.seed(1)
+	segments = []
+	for idx in range(2000):
+		x, y = random.uniform(0, 1000), random.uniform(0, 1000)
+		if idx % 2:
+			segments.append(Line((x, y), (x + random.uniform(-30, 30), y + random.uniform(-30, 30))))
+		else:
+			segments.append(CubicBezier((x, y), (x + 10, y + 20), (x + 20, y + 20), (x + 30, y)))
+
+	start = time.time()
+	tree = SegmentBVH(segments)
+	print(tree, 'Build: {:.3f}s'.format(time.time() - start))
+
+	start = time.time()
+	for idx in range(1000): tree.nearest((random.uniform(0, 1000), random.uniform(0, 1000)))
+	print('1000 nearest: {:.3f}s'.format(time.time() - start))
+
+	start = time.time()
+	for idx in range(1000): tree.intersect_line(((0, random.uniform(0, 1000)), (1000, random.uniform(0, 1000))))
+	print('1000 line crossings: {:.3f}s'.format(time.time() - start))
+	print(len(tree.query_box((100, 100, 200, 200))), tree.nearest((500, 500)))
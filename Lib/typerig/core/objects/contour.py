@@ -10,33 +10,37 @@
 
 # - Dependencies ------------------------
 from __future__ import absolute_import, print_function, division
+import json
+import xml.etree.ElementTree as ET
 
 from typerig.core.objects.point import Point
 from typerig.core.objects.line import Line
 from typerig.core.objects.array import PointArray
 from typerig.core.objects.cubicbezier import CubicBezier
-from typerig.core.objects.transform import Transform
+from typerig.core.objects.transform import Transform, identity
 from typerig.core.objects.utils import Bounds
+from typerig.core.objects.bvh import SegmentBVH
 
 from typerig.core.func.utils import isMultiInstance
 from typerig.core.func.transform import adaptive_scale, lerp
 from typerig.core.func.math import zero_matrix, solve_equations, hobby_control_points
 
-from typerig.core.objects.atom import Container
-from typerig.core.objects.node import Node, Knot
+from typerig.core.objects.atom import Container, memoized
+from typerig.core.objects.node import Node, Knot, node_types
 
 # - Init -------------------------------
-__version__ = '0.3.8'
+__version__ = '0.4.5'
 
 # - Classes -----------------------------
 class Contour(Container): 
 	__slots__ = ('name', 'closed', 'clockwise', 'transform', 'parent', 'lib')
+	_versioned = frozenset(('data', 'closed'))
 
 	def __init__(self, data=None, **kwargs):
 		factory = kwargs.pop('default_factory', Node)
 		super(Contour, self).__init__(data, default_factory=factory, **kwargs)
 		
-		self.transform = kwargs.pop('transform', Transform())
+		self.transform = kwargs.pop('transform', identity)
 		
 		# - Metadata
 		if not kwargs.pop('proxy', False): # Initialize in proxy mode
@@ -58,7 +62,7 @@ class Contour(Container):
 			for item in other:
 				if not isinstance(item, self._subclass):
 					item = self._subclass(item, parent=self)
-					self.data.append(item)
+					self.append(item) # Container.append: member index and edit version
 
 	@property
 	def selected_nodes(self):
@@ -69,9 +73,21 @@ class Contour(Container):
 		return [idx for idx in range(len(self.nodes)) if self.nodes[idx].selected]
 	
 	@property
-	def bounds(self):
+	@memoized
+	def _box(self):
 		assert len(self.data) > 0, 'Cannot return bounds for <{}> with length {}'.format(self.__class__.__name__, len(self.data))
-		return Bounds([node.point.tuple for node in self.data])
+		bounds = Bounds([node.tuple for node in self.data])
+		return ((bounds.x, bounds.y), (bounds.xmax, bounds.ymax))
+
+	@property
+	def bounds(self):
+		return Bounds(list(self._box))
+
+	@property
+	@memoized
+	def area(self):
+		'''Contour area using on curve points only (signed, positive for clockwise)'''
+		return self.get_on_area()
 
 	@property
 	def node_segments(self):
@@ -102,9 +118,14 @@ class Contour(Container):
 
 		return obj_segments
 
+	@property
+	@memoized
+	def _point_tuples(self):
+		return tuple(node.tuple for node in self.nodes)
+
 	@property
 	def point_array(self):
-		return PointArray([node.point for node in self.nodes])
+		return PointArray(self._point_tuples)
 
 	@point_array.setter
 	def point_array(self, other):
@@ -114,14 +135,38 @@ class Contour(Container):
 			for idx in range(len(contour_nodes)):
 				contour_nodes[idx].point = other[idx]
 		
+	@property
+	@memoized
+	def bvh(self):
+		'''Segment bounding volume hierarchy (see core.objects.bvh), keys are segment indices.
+		Built on first use and rebuilt only after the contour has been edited.
+		The index is shared between callers: query it, do not modify it.'''
+		return SegmentBVH(self.segments if len(self.data) > 1 else [])
+
 	# -- Functions ------------------------------
+	def query_box(self, box):
+		'''Segments whose bounds overlap box (xmin, ymin, xmax, ymax) or Bounds: list((segment_index, segment))'''
+		return self.bvh.query_box(box)
+
+	def query_line(self, line):
+		'''Segments whose bounds are crossed by line: list((segment_index, segment))'''
+		return self.bvh.query_line(line)
+
+	def intersect_line(self, line):
+		'''Crossings of contour with line: list((segment_index, time, x, y))'''
+		return self.bvh.intersect_line(line)
+
+	def nearest_segment(self, point, max_distance=float('inf')):
+		'''Nearest segment to point: (segment_index, segment, time, distance)'''
+		return self.bvh.nearest(point, max_distance)
+
 	def set_start(self, index):
 		index = self.nodes[index].prev_on.idx if not self.nodes[index].is_on else index
 		self.data = self.data[index:] + self.data[:index] 
 
 	def get_winding(self):
 		'''Check if contour has clockwise winding direction'''
-		return self.get_on_area() > 0
+		return self.area > 0
 
 	def get_on_area(self):
 		'''Get contour area using on curve points only'''
@@ -253,20 +298,75 @@ class Contour(Container):
 		return func
 
 	# -- IO Format ------------------------------
-	def to_VFJ(self):
-		raise NotImplementedError
+	def __VFJ_strings(self):
+		'''Nodes packed as FontLab VFJ node strings: curve handles go with the on-curve node 
+		ending their segment; for closed contours the handles of the closing segment go with the first node'''
+		strings, handles = [], []
+
+		for node in self.data:
+			if node.type == node_types['curve']:
+				handles.append(node.string)
+				continue
+
+			strings.append('  '.join(handles + [node.to_VFJ()]))
+			handles = []
+
+		if len(handles):
+			if self.closed and len(strings):
+				strings[0] = '  '.join(handles + [strings[0]])
+			else:
+				strings += [handle + ' o' for handle in handles]
+
+		return strings
 
 	@staticmethod
-	def from_VFJ(string):
-		raise NotImplementedError
+	def __VFJ_nodes(strings, closed):
+		'''Nodes from FontLab VFJ node strings (see Node.nodes_from_VFJ): handles
+		of the first node close the contour, so they go to its end'''
+		groups = [Node.nodes_from_VFJ(string) for string in strings]
+
+		if closed and len(groups) and len(groups[0]) > 1:
+			groups.append(groups[0][:-1])
+			groups[0] = groups[0][-1:]
+
+		return [node for group in groups for node in group]
+
+	def to_VFJ(self):
+		contour_data = {'nodes': self.__VFJ_strings()}
+		if not self.closed: contour_data['open'] = True
+		if self.name: contour_data['name'] = self.name
+		
+		return contour_data
 
 	@staticmethod
+	def from_VFJ(data):
+		if not isinstance(data, dict): data = json.loads(data)
+		
+		closed = not data.get('open', False)
+
+		return Contour(Contour.__VFJ_nodes(data['nodes'], closed),
+						closed=closed,
+						name=data.get('name', ''))
+
 	def to_XML(self):
-		raise NotImplementedError
+		element = ET.Element('contour')
+		if self.closed: element.set('closed', '1')
+		if self.name: element.set('name', self.name)
+		
+		for string in self.__VFJ_strings():
+			ET.SubElement(element, 'node').text = string
+
+		return element
 
 	@staticmethod
-	def from_XML(string):
-		raise NotImplementedError
+	def from_XML(element):
+		if not ET.iselement(element): element = ET.fromstring(element)
+		
+		closed = element.get('closed') == '1'
+
+		return Contour(Contour.__VFJ_nodes([child.text for child in element], closed),
+						closed=closed,
+						name=element.get('name', ''))
 
 class HobbySpline(Container): 
 	'''Adapted from mp2tikz.py (c) 2012 JL Diaz'''
@@ -279,7 +379,7 @@ class HobbySpline(Container):
 		
 		# - Metadata
 		self.tension = kwargs.pop('tension', 1.)
-		self.transform = kwargs.pop('transform', Transform())
+		self.transform = kwargs.pop('transform', identity)
 		self.name = kwargs.pop('name', '')
 		self.closed = kwargs.pop('closed', False)
 		self.clockwise = kwargs.pop('clockwise', self.get_winding())
@@ -444,7 +544,7 @@ class HobbySpline(Container):
 			for item in other:
 				if not isinstance(item, self._subclass):
 					item = self._subclass(item, parent=self)
-					self.data.append(item)
+					self.append(item) # Container.append: member index and edit version
 
 	@property
 	def knot_count(self):
@@ -617,3 +717,9 @@ if __name__ == '__main__':
 
 	
 	
+
+	print(section('FontLab VFJ'))
+	fontlab_data = {'nodes': ['200 0  0 0  0 200 s', '0 400  50 700  200 700 s', '400 700', '400 0']}
+	fontlab_contour = Contour.from_VFJ(fontlab_data)
+	print([node.type for node in fontlab_contour.nodes])
+	print(fontlab_contour.to_VFJ() == fontlab_data, Contour.from_XML(fontlab_contour.to_XML()).to_VFJ() == fontlab_data)
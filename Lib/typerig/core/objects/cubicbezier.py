@@ -15,12 +15,18 @@ import math
 from typerig.core.func.math import linInterp as lerp
 from typerig.core.func.math import ratfrac
 from typerig.core.func.utils import isMultiInstance
-from typerig.core.objects.transform import Transform
+from typerig.core.func.intersect import solve_cubic, curve_line_intersections
+from typerig.core.objects.transform import Transform, identity
 from typerig.core.objects.point import Point
 from typerig.core.objects.line import Line
 
 # - Init -------------------------------
-__version__ = '0.28.0'
+__version__ = '0.29.1'
+
+# - Gauss-Legendre quadrature: (abscissa, weight) on [-1, 1]
+gauss_legendre = (	(0., 0.5688888888888889),
+					(-0.5384693101056831, 0.4786286704993665), (0.5384693101056831, 0.4786286704993665),
+					(-0.9061798459386640, 0.2369268850561891), (0.9061798459386640, 0.2369268850561891))
 
 # - Classes -----------------------------
 class CubicBezier(object):
@@ -44,7 +50,9 @@ class CubicBezier(object):
 			if isMultiInstance(argv, (float, int)):
 				self.p0, self.p1, self.p2, self.p3 = [Point(argv[i], argv[i+1]) for i in range(len(argv)-1)]
 
-		self.transform = Transform()
+		self.transform = identity
+		self.__lut_key = None
+		self.__lut = None
 								
 	def __add__(self, other):
 		return self.__class__([p + other for p in self.points])
@@ -70,6 +78,11 @@ class CubicBezier(object):
 		return '<{}: {},{},{},{}>'.format(self.__class__.__name__, self.p0.tuple, self.p1.tuple, self.p2.tuple, self.p3.tuple)
 
 	# -- Properties
+	@property
+	def length(self):
+		'''Arc length of the curve'''
+		return self.get_lut()[-1]
+
 	@property
 	def tuple(self):
 		return (self.p0.tuple, self.p1.tuple, self.p2.tuple, self.p3.tuple)
@@ -147,72 +160,11 @@ class CubicBezier(object):
 		Adapted from bezier.js library by Pomax : https://github.com/Pomax/bezierjs
 		'''
 		
-		# - Helpers
-		def crt(v):
-			# A real-cuberoots-only helper function
-			if v < 0: 
-				return -math.pow(-v, 1./3.)
-			return math.pow(v, 1./3.)
-
-		def root_dim(a, b, c, d):
-			# Finds roots in one dimension
-			if d == 0: return []
-
-			a /= d
-			b /= d
-			c /= d
-
-			p = (3.*b - a*a)/3.
-			p3 = p/3.
-			q = (2.*a*a*a - 9.*a*b + 27.*c) / 27.
-			q2 = q/2.
-			discriminant = q2*q2 + p3*p3*p3
-
-			if discriminant < 0:
-				mp3 = -p/3.
-				mp33 = mp3*mp3*mp3
-				r = math.sqrt(mp33)
-				t = -q/(2*r)
-				
-				if t < -1:
-					cosphi = -1
-				elif t > 1:
-					cosphi = 1
-				else:
-					cosphi = t
-
-				phi = math.acos(cosphi)
-				crtr = crt(r)
-				
-				t1 = 2.*crtr
-				x1 = t1*math.cos(phi/3.) - a/3.
-				x2 = t1*math.cos((phi + tau)/3.) - a/3.
-				x3 = t1*math.cos((phi + 2.*tau)/3.) - a/3.
-				
-				return [x for x in [x1, x2, x3] if 0 <= x <= 1.]
-
-			elif discriminant == 0:
-				u1 = crt(-q2) if q2 < 0 else -crt(q2)
-				x1 = 2.*u1 - a/3.
-				x2 = -u1 - a/3.
-				
-				return [x for x in [x1, x2] if 0 <= x <= 1.]
-
-			else:
-				sd = math.sqrt(discriminant)
-				u1 = crt(-q2 + sd)
-				v1 = crt(q2 + sd)
-				res = u1 - v1 - a/3
-				
-				return [res] if 0 <= res <= 1. else []
-
 		# - Init
-		pi = math.pi
-		tau = 2 * pi
-		d, a, b, c = self.find_coeffs()
+		a, b, c, d = self.find_coeffs()
 		
-		# - Calculate
-		return root_dim(a.x, b.x, c.x, d.x), root_dim(a.y, b.y, c.y, d.y)
+		# - Calculate (robust to vanishing leading coefficients and tangent roots)
+		return solve_cubic(a.x, b.x, c.x, d.x), solve_cubic(a.y, b.y, c.y, d.y)
 		
 	def intersect_line(self, other_line):
 		'''Find Curve and line intersection
@@ -227,6 +179,21 @@ class CubicBezier(object):
 		
 		return (intersect_times_x, intersect_times_y), (intersect_points_x, intersect_points_y)
 
+	def intersect_lines(self, lines, segment=True):
+		'''Find all intersections of curve with one or many lines (see core.func.intersect).
+		Args:
+			lines (Line or list(Line)): Lines or point pairs ((x0,y0), (x1,y1))
+			segment (bool): Keep only hits within line segments
+
+		Returns:
+			list(tuple(line_index, time, x, y))
+		'''
+		if isinstance(lines, Line) or (len(lines) == 2 and not isinstance(lines[0], Line) and not hasattr(lines[0][0], '__len__')): 
+			lines = [lines]
+
+		lines = [item.tuple if isinstance(item, Line) else item for item in lines]
+		return [hit[1:] for hit in curve_line_intersections([self.tuple], lines, segment)]
+
 	def solve_point(self, time):
 		'''Find point on cubic bezier at given time '''
 		rtime = 1 - time
@@ -291,39 +258,96 @@ class CubicBezier(object):
 		
 		return slices
 
-	def solve_distance_start(self, distance, timeStep = .01):
-		'''Returns time at which the given distance to beginning of bezier is met. 
-		Probing is executed withing timeStep in range from 0 to 1. The finer the step the preciser the results.
-		'''
-		measure = 0
-		time = 0
-
-		while measure < distance and time < 1.:
-			cNode = self.solve_point(time)
-			measure = math.hypot(-self.p0.x + cNode.x, -self.p0.y + cNode.y)
-			time += timeStep
+	# -- Arc length
+	def __speed(self):
+		'''Speed function |B'(t)| built from the polynomial coefficients'''
+		(x0, y0), (x1, y1), (x2, y2), (x3, y3) = self.tuple
+		ax, ay = 3.*(-x0 + 3.*x1 - 3.*x2 + x3), 3.*(-y0 + 3.*y1 - 3.*y2 + y3)
+		bx, by = 6.*(x0 - 2.*x1 + x2), 6.*(y0 - 2.*y1 + y2)
+		cx, cy = 3.*(x1 - x0), 3.*(y1 - y0)
+		return lambda t: math.hypot((ax*t + bx)*t + cx, (ay*t + by)*t + cy)
+
+	@staticmethod
+	def __integrate(speed, t0, t1):
+		'''Gauss-Legendre integral of speed over [t0, t1]'''
+		half, mid = .5*(t1 - t0), .5*(t1 + t0)
+		return half*sum(weight*speed(mid + half*node) for node, weight in gauss_legendre)
+
+	def get_lut(self, steps=16):
+		'''Cumulative arc length at times i/steps (i = 0...steps). 
+		Cached per curve and rebuilt only if control points change.'''
+		lut_key = (self.tuple, steps)
+
+		if self.__lut_key != lut_key:
+			speed = self.__speed()
+			lut, total = [0.], 0.
+
+			for idx in range(steps):
+				total += self.__integrate(speed, idx/steps, (idx + 1)/steps)
+				lut.append(total)
+
+			self.__lut_key, self.__lut = lut_key, lut
+
+		return self.__lut
+
+	def get_arc_length(self, time=1.):
+		'''Arc length from start of curve to given time'''
+		lut = self.get_lut()
+		steps = len(lut) - 1
+		idx = min(int(time*steps), steps - 1)
+		return lut[idx] + self.__integrate(self.__speed(), idx/steps, time)
+
+	def solve_time_at_length(self, length, tolerance=1e-6):
+		'''Time at which given arc length from start of curve is met: 
+		Newton iterations on the arc length, bracketed by the length lookup table.'''
+		lut = self.get_lut()
+		steps = len(lut) - 1
+
+		if length <= 0.: return 0.
+		if length >= lut[-1]: return 1.
+
+		# - Bracket and initial guess from lookup table
+		idx = 0
+		while lut[idx + 1] < length: idx += 1
+
+		low, high = idx/steps, (idx + 1)/steps
+		base, start = lut[idx], low
+		span = lut[idx + 1] - base
+		time = low + (length - base)/span/steps if span > 0 else low
+		speed = self.__speed()
+
+		for iteration in range(16):
+			error = base + self.__integrate(speed, start, time) - length
+			if abs(error) < tolerance: break
+
+			# - Shrink bracket
+			if error > 0: high = time
+			else: low = time
+
+			# - Newton step, bisection if it leaves the bracket
+			velocity = speed(time)
+			time = time - error/velocity if velocity > 0 else -1.
+			if not (low < time < high): time = .5*(low + high)
 
 		return time
 
-	def solve_distance_end(self, distance, timeStep = .01 ):
-		'''Returns time at which the given distance to end of bezier is met. 
-		Probing is executed withing timeStep in range from 0 to 1. The finer the step the preciser the results.
+	def solve_distance_start(self, distance, timeStep=None):
+		'''Returns time at which the given arc length distance from the beginning of bezier is met.
+		timeStep is kept for compatibility only: the solution is exact within tolerance.
 		'''
-		measure = 0
-		time = 1
+		return self.solve_time_at_length(distance)
 
-		while measure < distance and time > 0:
-			cNode = self.solve_point(time)
-			measure = math.hypot(-self.p3.x + cNode.x, -self.p3.y + cNode.y)
-			time -= timeStep
-
-		return time
+	def solve_distance_end(self, distance, timeStep=None):
+		'''Returns time at which the given arc length distance from the end of bezier is met.
+		timeStep is kept for compatibility only: the solution is exact within tolerance.
+		'''
+		return self.solve_time_at_length(self.length - distance)
 
-	def solve_slice_distance(self, distance, from_start=True, timeStep = .001):
-		'''Slices bezier at time which the given distance is met. 
+	def solve_slice_distance(self, distance, from_start=True, timeStep=None):
+		'''Slices bezier at time which the given arc length distance is met. 
 		Output: list [(Start), (Start_BCP_out), (Slice_BCP_in), (Slice), (Slice_BCP_out), (End_BCP_in), (End)] of tuples (x,y)
 		'''
-		slice_time = self.solve_distance_start(distance, timeStep) if from_start else self.solve_distance_end(distance, timeStep)
+		slice_time = self.solve_distance_start(distance) if from_start else self.solve_distance_end(distance)
 		return self.solve_slice(slice_time)
 
 	def solve_extremes(self):
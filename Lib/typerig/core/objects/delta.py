@@ -19,12 +19,55 @@ try: #Py3+
 except ImportError: #Py2+
 	from collections import Sequence
 
+try: # Optional: vectorized arrays
+	import numpy as np
+except ImportError:
+	np = None
+
 import typerig.core.func.transform as utils
 from typerig.core.objects.point import Point, Void
-from typerig.core.objects.array import PointArray
+from typerig.core.objects.array import PointArray, NumPointArray
 
 # - Init -------------------------------
-__version__ = '0.10.9'
+__version__ = '0.11.1'
+
+# - Functions ----------------------------------
+def delta_timer(global_time, intervals, extrapolate=False):
+	'''Split global time into interval indexes and local times.
+	Args:
+		global_time -> float or tuple(float, float) : Global time (anisotropic X, Y)
+		intervals -> int : Number of intervals (masters - 1)
+		extrapolate -> bool : Allow local times outside (0 .. 1)
+
+	Returns:
+		tuple(int, int, float, float): Interval indexes and local times ix, iy, tx, ty
+	'''
+	if isinstance(global_time, tuple):
+		gx, gy = global_time
+	else:
+		gx = gy = global_time
+
+	ix, tx = divmod(gx, 1)
+	iy, ty = divmod(gy, 1)
+
+	ix = int(ix)
+	iy = int(iy)
+
+	if ix > intervals - 1:
+		tx = ix - intervals + 1 + tx if extrapolate else 1.
+		ix = intervals - 1
+	elif ix < 0:
+		tx = ix + tx if extrapolate else 0.
+		ix = 0
+
+	if iy > intervals - 1:
+		ty = iy - intervals + 1 + ty if extrapolate else 1.
+		iy = intervals - 1
+	elif iy < 0:
+		ty = iy + ty if extrapolate else 0.
+		iy = 0
+
+	return ix, iy, tx, ty
 
 # - Objects ------------------------------------
 # -- Interpolation -----------------------------
@@ -55,14 +98,10 @@ class DeltaArray(Sequence):
 		'''Linear interpolation (LERP) with optional extrapolation.
 		Interval (-inf) <-- (0 .. len(array)-1) --> (+inf) (supports negative indexing).
 		'''
-		points = []
-		ln = len(self.data[0])
 		ix, iy, tx, ty = self.timer(global_time, extrapolate)
-			
-		for row in range(ln):
-			x = utils.lerp(self.data[ix].x_tuple[row], self.data[ix+1].x_tuple[row], tx)
-			y = utils.lerp(self.data[iy].y_tuple[row], self.data[iy+1].y_tuple[row], ty)
-			points.append((x,y))
+		x0, x1 = self.data[ix].x_tuple, self.data[ix+1].x_tuple
+		y0, y1 = self.data[iy].y_tuple, self.data[iy+1].y_tuple
+		points = [(utils.lerp(x0[row], x1[row], tx), utils.lerp(y0[row], y1[row], ty)) for row in range(len(x0))]
 
 		return PointArray(points)
 
@@ -73,7 +112,6 @@ class DeltaArray(Sequence):
 		else:
 			gx = gy = global_time
 
-		p0, p1 = [], []
 		ln = len(self.data)
 		ix = int(divmod(gx, 1)[0])
 		iy = int(divmod(gy, 1)[0])
@@ -81,45 +119,130 @@ class DeltaArray(Sequence):
 		if ix >= ln - 1: ix = ln - 2
 		if iy >= ln - 1: iy = ln - 2
 
-		for row in range(len(self.data[0])):
-			x0 = self.data[ix].x_tuple[row]
-			y0 = self.data[iy].y_tuple[row]
-			x1 = self.data[ix+1].x_tuple[row]
-			y1 = self.data[iy+1].y_tuple[row]
-			
-			p0.append((x0, y0))
-			p1.append((x1, y1))
+		p0 = list(zip(self.data[ix].x_tuple, self.data[iy].y_tuple))
+		p1 = list(zip(self.data[ix+1].x_tuple, self.data[iy+1].y_tuple))
 
 		return PointArray(p0), PointArray(p1)
 
 	def timer(self, global_time, extrapolate=False):
-		if isinstance(global_time, tuple):
-			gx, gy = global_time
-		else:
-			gx = gy = global_time
+		return delta_timer(global_time, len(self.data) - 1, extrapolate)
+
+
+class DeltaBatch(object):
+	'''Batched linear interpolation of many glyphs sharing the same masters.
+	Master arrays of all glyphs are stacked into a single (masters, points, 2) 
+	buffer, so a whole list of (glyph, time) requests is evaluated in one 
+	vectorized pass. Falls back to plain Python if NumPy is not available.
+
+	Constructor:
+		DeltaBatch(): Empty batch, populate with .add()
+		DeltaBatch(dict(key: DeltaArray or list(point arrays per master)))
+	'''
+	def __init__(self, data=None):
+		self.keys = []
+		self.masters = None
+		self.__arrays = {}
+		self.__offsets = {}
+		self.__stack = None
+		self.__count = 0
+
+		if data is not None:
+			for key, arrays in data.items():
+				self.add(key, arrays)
 
-		ln = len(self.data[0])
-		ix, tx = divmod(gx, 1)
-		iy, ty = divmod(gy, 1)
+	# - Internals
+	def __len__(self):
+		return len(self.keys)
 
-		ix = int(ix)
-		iy = int(iy)
+	def __contains__(self, key):
+		return key in self.__offsets
 
-		if ix > ln - 1:
-			tx = ix - ln + 1 + tx if extrapolate else 1.
-			ix = ln - 1
-		elif ix < 0:
-			tx = ix + 1 + tx if extrapolate else 0.
-			ix = 0
+	def __repr__(self):
+		return '<Delta Batch: Glyphs={}, Masters={}, Points={}>'.format(len(self.keys), self.masters, self.__count)
 
-		if iy > ln - 1:
-			ty = iy - ln + 1 + ty if extrapolate else 1.
-			iy = ln - 1
-		elif iy < 0:
-			ty = iy + 1 + ty if extrapolate else 0.		
-			iy = 0
+	def __call__(self, requests, extrapolate=False, as_points=False):
+		'''Evaluate a list of (key, global_time) requests in a single pass.
+		Args:
+			requests -> list(tuple(key, float or tuple(float, float))) : Glyph keys and interpolation times
+			extrapolate -> bool : Allow extrapolation beyond the masters
+			as_points -> bool : Return PointArray even if NumPy is available
 
-		return ix, iy, tx, ty
+		Returns:
+			list(NumPointArray or PointArray): Interpolated arrays in the order of the requests
+		'''
+		requests = list(requests)
+		if not len(requests): return []
+
+		timers = [delta_timer(global_time, self.masters - 1, extrapolate) for key, global_time in requests]
+		
+		if np is None:
+			return [self.__lerp(key, timer) for (key, global_time), timer in zip(requests, timers)]
+
+		stack = self.stack
+		spans = [self.__offsets[key] for key, global_time in requests]
+		lengths = [end - start for start, end in spans]
+		
+		rows = np.concatenate([np.arange(start, end) for start, end in spans])
+		ix, iy, tx, ty = [np.repeat(np.array(item), lengths) for item in zip(*timers)]
+		
+		x0, x1 = stack[ix, rows, 0], stack[ix + 1, rows, 0]
+		y0, y1 = stack[iy, rows, 1], stack[iy + 1, rows, 1]
+		result = np.empty((len(rows), 2))
+		result[:,0] = (x1 - x0)*tx + x0
+		result[:,1] = (y1 - y0)*ty + y0
+		
+		result = [NumPointArray(item) for item in np.split(result, np.cumsum(lengths)[:-1])]
+		return [item.to_points() for item in result] if as_points else result
+
+	def __lerp(self, key, timer):
+		ix, iy, tx, ty = timer
+		arrays = self.__arrays[key]
+		x0, x1 = arrays[ix].x_tuple, arrays[ix+1].x_tuple
+		y0, y1 = arrays[iy].y_tuple, arrays[iy+1].y_tuple
+
+		return PointArray([(utils.lerp(x0[row], x1[row], tx), utils.lerp(y0[row], y1[row], ty)) for row in range(len(x0))])
+
+	# - Properties
+	@property
+	def stack(self):
+		'''Stacked (masters, points, 2) buffer of all glyphs, built on demand.'''
+		if self.__stack is None and np is not None:
+			self.__stack = np.stack([np.concatenate([np.asarray(self.__arrays[key][m].tuple, dtype=np.float64).reshape(-1, 2) for key in self.keys]) for m in range(self.masters)])
+
+		return self.__stack
+
+	# - Functions
+	def add(self, key, arrays):
+		'''Add glyph master arrays to the batch.
+		Args:
+			key -> hashable : Glyph identifier (e.g. glyph name)
+			arrays -> DeltaArray or list(point arrays) : One point array per master
+		'''
+		if not isinstance(arrays, DeltaArray):
+			arrays = DeltaArray(arrays)
+
+		if self.masters is None: self.masters = len(arrays)
+		assert len(arrays) == self.masters, 'ERROR:\tMaster count mismatch for <{}>! Expected {}'.format(key, self.masters)
+
+		if key in self.__offsets: self.remove(key)
+
+		ln = len(arrays[0])
+		self.keys.append(key)
+		self.__arrays[key] = arrays
+		self.__offsets[key] = (self.__count, self.__count + ln)
+		self.__count += ln
+		self.__stack = None
+
+	def remove(self, key):
+		self.keys.remove(key)
+		del self.__arrays[key]
+		self.__offsets, self.__count = {}, 0
+		self.__stack = None
+
+		for other in self.keys:
+			ln = len(self.__arrays[other][0])
+			self.__offsets[other] = (self.__count, self.__count + ln)
+			self.__count += ln
 
 
 class DeltaScale(Sequence):
@@ -127,6 +250,7 @@ class DeltaScale(Sequence):
 	def __init__(self, *argv):
 		# - Init
 		self.x, self.y, self.stems = [], [], []
+		self.__numeric = {}
 		
 		if len(argv) == 1 and isinstance(argv[0], self.__class__): # Clone
 			self.load(argv[0])
@@ -206,7 +330,17 @@ class DeltaScale(Sequence):
 		ix, _iy, ntx, _ty = self.__timer(tx, extrapolate)
 		_ix, iy, _tx, nty = self.__timer(ty, extrapolate)
 
-		return self.x[ix], self.y[iy], ntx, nty
+		return ix, iy, ntx, nty
+
+	def __numeric_array(self, axis, index):
+		'''Cached NumPy copy of self.x or self.y interval data (dropped on .load())'''
+		key = (axis, index)
+		
+		if key not in self.__numeric:
+			source = self.x if axis == 0 else self.y
+			self.__numeric[key] = np.asarray(source[index], dtype=np.float64).reshape(-1, 4)
+
+		return self.__numeric[key]
 
 	def __delta_scale(self, x, y, tx, ty, sx, sy, cx, cy, dx, dy, i):
 		return utils.adaptive_scale(((x[0],y[0]), (x[1],y[1])), (sx, sy), (dx, dy), (tx, ty), (cx,cy), i, (x[2], x[3], y[2], y[3]))
@@ -236,18 +370,24 @@ class DeltaScale(Sequence):
 		return self.x, self.y, self.stems
 	
 	def load(self, other):
+		self.__numeric = {}
+
 		if isinstance(other, self.__class__):
 			self.x, self.y, self.stems = other.dump()
 		elif isinstance(other, (tuple, list)) and len(other) == 3:
 			self.x, self.y, self.stems = other
 
 	# - Process ----------------------------------
-	def scale_by_time(self, time, scale_or_dimension, compensation, shift, italic_angle, extrapolate=False, to_dimension=False):
+	def scale_by_time(self, time, scale_or_dimension, compensation, shift, italic_angle, extrapolate=False, to_dimension=False, numeric=None):
+		'''Adaptive scaling at given interpolation time.
+		The vectorized (numeric) engine is used by default if NumPy is available; 
+		pass numeric=False to force the scalar path. Both return list(tuple(x, y)).
+		'''
 		cx, cy = compensation
 		dx, dy = shift
 		i = italic_angle
-		a0, a1, ntx, nty = self.__mixer(time[0], time[1], extrapolate)
-		process_array = zip(a0, a1)
+		ix, iy, ntx, nty = self.__mixer(time[0], time[1], extrapolate)
+		a0, a1 = self.x[ix], self.y[iy]
 
 		if not to_dimension:
 			sx, sy = scale_or_dimension
@@ -258,17 +398,24 @@ class DeltaScale(Sequence):
 			h1 = max(a1, key= lambda i: i[1])[1] - min(a0, key= lambda i: i[1])[1]
 			sx, sy = utils.adjuster(((w0, w1), (h0, h1)), scale_or_dimension, (ntx, nty), (dx, dy), (a0[0][2], a0[0][3], a1[0][2], a1[0][3]))
 
+		if numeric is None: numeric = np is not None
+
+		if numeric:
+			rx, ry = utils.adaptive_scale_numeric(self.__numeric_array(0, ix), self.__numeric_array(1, iy), (sx, sy), (dx, dy), (ntx, nty), (cx, cy), i)
+			return list(zip(rx.tolist(), ry.tolist()))
+
+		process_array = zip(a0, a1)
 		result = map(lambda arr: self.__delta_scale(arr[0], arr[1], ntx, nty, sx, sy, cx, cy, dx, dy, i), process_array)
-		return result
+		return list(result)
 
-	def scale_by_stem(self, stem, scale_or_dimension, compensation, shift, italic_angle, extrapolate=False, to_dimension=False):
+	def scale_by_stem(self, stem, scale_or_dimension, compensation, shift, italic_angle, extrapolate=False, to_dimension=False, numeric=None):
 		stx, sty = stem
 		cx, cy = compensation
 		dx, dy = shift
 		i = italic_angle
 
 		tx, ty = self._stem_for_time(stx, sty, extrapolate)
-		result = self.scale_by_time((tx, ty), scale_or_dimension, compensation, shift, italic_angle, extrapolate, to_dimension)
+		result = self.scale_by_time((tx, ty), scale_or_dimension, compensation, shift, italic_angle, extrapolate, to_dimension, numeric)
 		
 		return result
 
@@ -0,0 +1,286 @@
+# MODULE: TypeRig / Core / Diff (Objects)
+# -----------------------------------------------------------
+# (C) Vassil Kateliev, 2022 		(http://www.kateliev.com)
+# (C) Karandash Type Foundry 		(http://www.karandash.eu)
+#------------------------------------------------------------
+# www.typerig.com
+
+# No warranties. By using this you agree
+# that you use it at your own risk!
+
+# - Dependencies ------------------------
+from __future__ import absolute_import, print_function, division
+import math, json, multiprocessing
+
+# - Init --------------------------------
+__version__ = '0.1.1'
+
+# - Tolerances: deltas up to the given amount (font units) are ignored
+diff_tolerances = {'nodes': 0., 'metrics': 0., 'anchors': 0.}
+node_codes = {'on': 'o', 'off': 'f', 'curve': 'c', 'move': 'm'} # Node types in structure records
+
+'''Report records (JSON Lines, one record per changed glyph):
+	{"glyph": name, "status": "modified" | "added" | "removed", "layers": [layer records]}
+
+Layer records:
+	{"layer": name, "status": "modified" | "incompatible" | "added" | "removed",
+	 "shift": [dx, dy]						- all nodes moved by the same vector, or
+	 "nodes": [[contour, node, dx, dy]]		- node deltas beyond tolerance,
+	 "structure": [[contours, nodes, types] for A and B]	- incompatible layers only,
+	 "metrics": {"advanceWidth" | "advanceHeight" | "LSB" | "RSB": delta},
+	 "anchors": {name: [dx, dy] or null (missing in B)}, "anchors_added": [names]}
+'''
+
+# - Functions ---------------------------
+# -- Snapshots: plain data, cheap to compare and to send to worker processes
+def layer_snapshot(layer):
+	'''Plain data copy of core Layer: (contours, metrics, anchors)'''
+	contours = tuple((contour.closed, tuple((node.x, node.y, node.type) for node in contour.data)) for contour in layer.contours)
+	anchors = tuple(sorted(tuple(anchor) for anchor in getattr(layer, 'anchors', [])))
+
+	return (contours, (layer.advance_width, layer.advance_height), anchors)
+
+def glyph_snapshot(glyph, layer_names=None):
+	'''Plain data copy of core Glyph: dict(layer_name: layer_snapshot)'''
+	return {layer.name: layer_snapshot(layer) for layer in glyph.layers if layer_names is None or layer.name in layer_names}
+
+def _metrics(snapshot):
+	contours, (advance_width, advance_height), anchors = snapshot
+	xs = [x for closed, nodes in contours for x, y, node_type in nodes]
+	metrics = {'advanceWidth': advance_width, 'advanceHeight': advance_height}
+
+	if len(xs):
+		metrics['LSB'] = min(xs)
+		metrics['RSB'] = advance_width - max(xs)
+
+	return metrics
+
+def _structure(snapshot):
+	contours = snapshot[0]
+	return [len(contours), sum(len(nodes) for closed, nodes in contours), ''.join(node_codes.get(node_type, '?') for closed, nodes in contours for x, y, node_type in nodes)]
+
+# -- Diff
+def diff_layers(snapshot_a, snapshot_b, tolerances=diff_tolerances):
+	'''Differences between two layer snapshots: layer record without name, None if equal within tolerances'''
+	if snapshot_a == snapshot_b: return None
+	record = {}
+
+	# - Outline
+	contours_a, contours_b = snapshot_a[0], snapshot_b[0]
+	structure_a, structure_b = _structure(snapshot_a), _structure(snapshot_b)
+
+	if structure_a != structure_b or [closed for closed, nodes in contours_a] != [closed for closed, nodes in contours_b]:
+		record['status'] = 'incompatible'
+		record['structure'] = [structure_a, structure_b]
+
+	else:
+		tolerance = tolerances.get('nodes', 0.)
+		node_deltas, shifts = [], set()
+
+		for cid, ((closed_a, nodes_a), (closed_b, nodes_b)) in enumerate(zip(contours_a, contours_b)):
+			for nid, ((xa, ya, type_a), (xb, yb, type_b)) in enumerate(zip(nodes_a, nodes_b)):
+				dx, dy = xb - xa, yb - ya
+				shifts.add((dx, dy))
+
+				if math.hypot(dx, dy) > tolerance:
+					node_deltas.append([cid, nid, dx, dy])
+
+		if len(node_deltas):
+			if len(shifts) == 1:
+				record['shift'] = list(shifts.pop())
+			else:
+				record['nodes'] = node_deltas
+
+	# - Metrics
+	tolerance = tolerances.get('metrics', 0.)
+	metrics_a, metrics_b = _metrics(snapshot_a), _metrics(snapshot_b)
+	metric_deltas = {}
+
+	for key, value in metrics_a.items():
+		if key in metrics_b and abs(metrics_b[key] - value) > tolerance:
+			metric_deltas[key] = metrics_b[key] - value
+
+	if len(metric_deltas): record['metrics'] = metric_deltas
+
+	# - Anchors
+	tolerance = tolerances.get('anchors', 0.)
+	anchors_a = {name: (x, y) for name, x, y in snapshot_a[2]}
+	anchors_b = {name: (x, y) for name, x, y in snapshot_b[2]}
+	anchor_deltas = {}
+
+	for name, (xa, ya) in anchors_a.items():
+		if name not in anchors_b:
+			anchor_deltas[name] = None
+			continue
+
+		dx, dy = anchors_b[name][0] - xa, anchors_b[name][1] - ya
+		if math.hypot(dx, dy) > tolerance: anchor_deltas[name] = [dx, dy]
+
+	anchors_added = sorted(name for name in anchors_b if name not in anchors_a)
+
+	if len(anchor_deltas): record['anchors'] = anchor_deltas
+	if len(anchors_added): record['anchors_added'] = anchors_added
+
+	if not record: return None
+	record.setdefault('status', 'modified')
+	return record
+
+def diff_glyphs(glyph_name, layers_a, layers_b, tolerances=diff_tolerances):
+	'''Differences between two glyph snapshots (dict(layer_name: layer_snapshot)): glyph record, None if equal'''
+	if layers_a is None: return {'glyph': glyph_name, 'status': 'added', 'layers': []}
+	if layers_b is None: return {'glyph': glyph_name, 'status': 'removed', 'layers': []}
+
+	layer_records = []
+
+	for layer_name in sorted(set(layers_a) | set(layers_b), key=str):
+		if layer_name not in layers_b:
+			layer_records.append({'layer': layer_name, 'status': 'removed'})
+
+		elif layer_name not in layers_a:
+			layer_records.append({'layer': layer_name, 'status': 'added'})
+
+		else:
+			layer_record = diff_layers(layers_a[layer_name], layers_b[layer_name], tolerances)
+
+			if layer_record is not None:
+				layer_record['layer'] = layer_name
+				layer_records.append(layer_record)
+
+	if not layer_records: return None
+	return {'glyph': glyph_name, 'status': 'modified', 'layers': layer_records}
+
+def _diff_task(task):
+	# Worker pool entry: task is (glyph_name, layers_a, layers_b, tolerances), None for identical glyphs
+	return diff_glyphs(*task) if task is not None else None
+
+# - Classes -----------------------------
+class FontDiff(object):
+	'''Diff engine for core Font objects: compares glyphs by name and
+	streams one report record per changed glyph (see record layout above).
+
+	Constructor:
+		FontDiff(font_a, font_b, layer_names=None, tolerances=None, workers=1, chunk_size=32)
+
+	Args:
+		font_a, font_b (Font): Fonts to compare, A is the reference
+		layer_names list(str): Layers to compare, all if None
+		tolerances dict: Overrides for diff_tolerances (nodes, metrics, anchors)
+		workers (int): Worker processes for the deep diff, 1 runs in process
+		chunk_size (int): Glyphs sent to a worker at once
+
+	Methods:
+		.records(): Generator of glyph records (in font A order, glyphs added in B last)
+		.write(file_object): Write records as JSON Lines, returns the summary
+		.summary: Counts of glyphs by status (after a run)
+
+	Example:
+		with open('report.jsonl', 'w') as report:
+			FontDiff(Font.read_VFJ('a.vfj'), Font.read_VFJ('b.vfj'), workers=4).write(report)
+	'''
+	def __init__(self, font_a, font_b, layer_names=None, tolerances=None, workers=1, chunk_size=32):
+		self.font_a = font_a
+		self.font_b = font_b
+		self.layer_names = set(layer_names) if layer_names is not None else None
+		self.tolerances = dict(diff_tolerances, **(tolerances or {}))
+		self.workers = workers
+		self.chunk_size = chunk_size
+		self.summary = {}
+
+	def __repr__(self):
+		return '<{}: A={}, B={}, Workers={}>'.format(self.__class__.__name__, self.font_a, self.font_b, self.workers)
+
+	# - Internals --------------------
+	def __tasks(self):
+		'''Yield snapshot pairs that differ, None for identical glyphs (no deep diff).
+		Runs in the pool feeder thread when workers > 1: no shared state is changed here.'''
+		glyphs_b = {glyph.name: glyph for glyph in self.font_b.glyphs}
+		names_a = set()
+
+		for glyph in self.font_a.glyphs:
+			names_a.add(glyph.name)
+			layers_a = glyph_snapshot(glyph, self.layer_names)
+			layers_b = glyph_snapshot(glyphs_b[glyph.name], self.layer_names) if glyph.name in glyphs_b else None
+
+			yield (glyph.name, layers_a, layers_b, self.tolerances) if layers_a != layers_b else None
+
+		for glyph in self.font_b.glyphs:
+			if glyph.name not in names_a:
+				yield (glyph.name, None, {}, self.tolerances)
+
+	# - Functions --------------------
+	def records(self):
+		self.summary = {}
+
+		if self.workers > 1:
+			pool = multiprocessing.Pool(self.workers)
+
+			try:
+				results = pool.imap(_diff_task, self.__tasks(), self.chunk_size)
+				for record in self.__count(results): yield record
+
+			finally:
+				pool.terminate()
+		else:
+			for record in self.__count(_diff_task(task) for task in self.__tasks()):
+				yield record
+
+	def __count(self, results):
+		for record in results:
+			status = record['status'] if record is not None else 'unchanged'
+			self.summary[status] = self.summary.get(status, 0) + 1
+			if record is not None: yield record
+
+	def write(self, file_object):
+		for record in self.records():
+			file_object.write(json.dumps(record) + '\n')
+
+		return self.summary
+
+	def changed_glyphs(self):
+		'''Names of glyphs that differ (ex. to open in FontLab)'''
+		return [record['glyph'] for record in self.records()]
+
+
+# - Test ----------------------------
+if __name__ == '__main__':
+	import io, time, random
+	from typerig.core.objects.node import Node
+	from typerig.core.objects.contour import Contour
+	from typerig.core.objects.shape import Shape
+	from typerig.core.objects.layer import Layer
+	from typerig.core.objects.glyph import Glyph
+	from typerig.core.objects.font import Font
+	from typerig.core.objects.diff import FontDiff # Importable worker entry (pickling)
+
+	def make_font(glyph_count, masters):
+		glyphs = []
+		for gid in range(glyph_count):
+			layers = []
+			for master in masters:
+				contours = [Contour([Node(x + cid*10, y, type='on') for x, y in ((0, 0), (0, 700), (500, 700), (500, 0))], closed=True) for cid in range(3)]
+				layers.append(Layer([Shape(contours)], name=master, width=600, anchors=[('top', 250, 700)]))
+			glyphs.append(Glyph(layers, name='glyph{}'.format(gid)))
+
+		return Font(glyphs)
+
+	masters = ['Master {}'.format(idx) for idx in range(8)]
+	font_a, font_b = make_font(2000, masters), make_font(2000, masters)
+	random.seed(1)
+
+	# - Small change: a few glyphs edited
+	for glyph in random.sample(font_b.glyphs, 20):
+		layer = glyph.layers[0]
+		layer.nodes[0].x += 3
+		layer.advance_width += 10
+		layer.anchors = [('top', 260, 700)]
+
+	font_b.glyphs[1].layers[1].shift(15, 0)
+	font_b.glyphs[2].layers[2].nodes[1].x += .2
+
+	for workers in (1, 2):
+		report = io.StringIO()
+		start = time.time()
+		summary = FontDiff(font_a, font_b, tolerances={'nodes': .5}, workers=workers).write(report)
+		print('Workers: {}; Time: {:.3f}s; Summary: {}'.format(workers, time.time() - start, summary))
+
+	print(report.getvalue().splitlines()[0])
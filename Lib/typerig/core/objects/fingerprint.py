@@ -0,0 +1,183 @@
+# MODULE: TypeRig / Core / Fingerprint (Objects)
+# -----------------------------------------------------------
+# (C) Vassil Kateliev, 2022 		(http://www.kateliev.com)
+# (C) Karandash Type Foundry 		(http://www.karandash.eu)
+#------------------------------------------------------------
+# www.typerig.com
+
+# No warranties. By using this you agree
+# that you use it at your own risk!
+
+# - Dependencies ------------------------
+from __future__ import absolute_import, print_function, division
+import os, io, json, hashlib
+
+# - Init --------------------------------
+__version__ = '0.1.1'
+
+# - Fingerprint fields:
+# -- 'outline': contours as node coordinates (contour structure included);
+# -- 'shape': outline moved to the origin (same shape, different position);
+# -- 'anchors': anchor names and positions;
+# -- 'metrics': advance width and height.
+fingerprint_fields = ('outline', 'shape', 'anchors', 'metrics')
+fingerprint_format = 1
+
+# - Functions ---------------------------
+def _number(value, precision):
+	value = float(value) + 0. # No negative zero
+	return round(value, precision) + 0. if precision is not None else value
+
+def digest(data):
+	'''Stable short hash of JSON serializable data'''
+	return hashlib.sha1(json.dumps(data, separators=(',', ':')).encode('utf-8')).hexdigest()[:20]
+
+def layer_fingerprint(contours, anchors=(), metrics=(), precision=None):
+	'''Fingerprint of a glyph layer: one digest per fingerprint_fields.
+
+	Args:
+		contours list(list(tuple(x, y))): Node coordinates per contour
+		anchors list(tuple(name, x, y)): Anchors
+		metrics tuple(float): Metrics (ex. advance width, advance height)
+		precision int: Round coordinates to given decimals, None for exact values
+
+	Returns:
+		tuple(str): Digests in fingerprint_fields order
+	'''
+	outline = [[(_number(x, precision), _number(y, precision)) for x, y in contour] for contour in contours]
+	points = [point for contour in outline for point in contour]
+
+	if len(points):
+		min_x, min_y = min(x for x, y in points), min(y for x, y in points)
+		shape = [[(x - min_x + 0., y - min_y + 0.) for x, y in contour] for contour in outline]
+	else:
+		shape = []
+
+	anchors = sorted([(name, _number(x, precision), _number(y, precision)) for name, x, y in anchors])
+	metrics = [_number(value, precision) for value in metrics]
+
+	return (digest(outline), digest(shape), digest(anchors), digest(metrics))
+
+def fingerprint_diff(fingerprint_a, fingerprint_b, fields=fingerprint_fields):
+	'''Names of the fingerprint fields that differ; all fields if any of the fingerprints is missing'''
+	if fingerprint_a is None or fingerprint_b is None:
+		return list(fields)
+
+	return [field for field in fields if fingerprint_a[fingerprint_fields.index(field)] != fingerprint_b[fingerprint_fields.index(field)]]
+
+# - Classes -----------------------------
+class FingerprintCache(object):
+	'''Persistent store of per glyph, per layer fingerprints.
+	Every glyph record carries a stamp (ex. the glyph modification time):
+	a record is valid only while the glyph stamp is unchanged, so glyphs
+	untouched since the previous run are not read again.
+
+	Constructor:
+		FingerprintCache(file_path): JSON file, loaded if present; None keeps records in memory only
+
+	Methods:
+		.get(glyph_name, stamp, layer_name): Fingerprint, None if missing or stale
+		.set(glyph_name, stamp, layer_name, fingerprint)
+		.prune(glyph_names): Drop records of glyphs not in glyph_names
+		.save(): Write changes (if any)
+
+	Example:
+		with FingerprintCache('font.fingerprints.json') as cache:
+			fingerprint = cache.get('A', stamp, 'Regular')
+	'''
+	def __init__(self, file_path):
+		self.path = file_path
+		self.changed = False
+		self.__glyphs = {}
+
+		if file_path is not None and os.path.isfile(file_path):
+			try:
+				with io.open(file_path, 'r', encoding='utf-8') as cache_file:
+					data = json.load(cache_file)
+
+				if data.get('format') == fingerprint_format:
+					self.__glyphs = data.get('glyphs', {})
+
+			except (ValueError, IOError):
+				self.changed = True # Corrupt or unreadable: rebuild
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, type, val, tb):
+		self.save()
+
+	def __len__(self):
+		return len(self.__glyphs)
+
+	def __contains__(self, glyph_name):
+		return glyph_name in self.__glyphs
+
+	def __repr__(self):
+		return '<{}: Glyphs={}, Path={}>'.format(self.__class__.__name__, len(self.__glyphs), self.path)
+
+	# - Functions --------------------
+	def get(self, glyph_name, stamp, layer_name):
+		record = self.__glyphs.get(glyph_name)
+		if record is None or record[0] != stamp: return None
+
+		fingerprint = record[1].get(layer_name)
+		return tuple(fingerprint) if fingerprint is not None else None
+
+	def set(self, glyph_name, stamp, layer_name, fingerprint):
+		record = self.__glyphs.get(glyph_name)
+
+		if record is None or record[0] != stamp:
+			record = self.__glyphs[glyph_name] = [stamp, {}]
+
+		record[1][layer_name] = list(fingerprint)
+		self.changed = True
+
+	def prune(self, glyph_names):
+		glyph_names = set(glyph_names)
+
+		for glyph_name in [name for name in self.__glyphs if name not in glyph_names]:
+			del self.__glyphs[glyph_name]
+			self.changed = True
+
+	def save(self):
+		if not self.changed or self.path is None: return
+		folder = os.path.dirname(self.path)
+
+		if folder and not os.path.isdir(folder):
+			os.makedirs(folder)
+
+		with io.open(self.path, 'w', encoding='utf-8') as cache_file:
+			cache_file.write(json.dumps({'format': fingerprint_format, 'glyphs': self.__glyphs}, separators=(',', ':'), ensure_ascii=False))
+
+		self.changed = False
+
+
+# - Test ----------------------------
+if __name__ == '__main__':
+	import tempfile, time
+
+	contours = [[(0, 0), (0, 700), (500, 700), (500, 0)], [(100, 100), (100, 600), (400, 600), (400, 100)]]
+	shifted = [[(x + 50, y) for x, y in contour] for contour in contours]
+
+	fp_a = layer_fingerprint(contours, [('top', 250, 700)], (600, 1000))
+	fp_b = layer_fingerprint(shifted, [('top', 250, 700)], (600, 1000))
+	print(fingerprint_diff(fp_a, fp_b))	# Outline differs, same shape
+
+	cache_file = os.path.join(tempfile.gettempdir(), 'test.fingerprints.json')
+	glyph_count, layer_names = 5000, ['Master {}'.format(idx) for idx in range(8)]
+
+	start = time.time()
+	with FingerprintCache(cache_file) as cache:
+		for idx in range(glyph_count):
+			for layer_name in layer_names:
+				cache.set('glyph{}'.format(idx), 1, layer_name, fp_a)
+
+	write_time = time.time() - start
+
+	start = time.time()
+	with FingerprintCache(cache_file) as cache:
+		hits = sum(cache.get('glyph{}'.format(idx), 1, layer_name) == fp_a for idx in range(glyph_count) for layer_name in layer_names)
+
+	print('Records: {}; Write: {:.3f}s; Read: {:.3f}s; Hits: {}'.format(glyph_count*len(layer_names), write_time, time.time() - start, hits))
+	os.remove(cache_file)
@@ -10,6 +10,8 @@
 
 # - Dependencies ------------------------
 from __future__ import absolute_import, print_function, division
+import json
+import xml.etree.ElementTree as ET
 
 from typerig.core.objects.transform import Transform
 from typerig.core.objects.utils import Bounds
@@ -18,9 +20,20 @@ from typerig.core.objects.delta import DeltaScale
 from typerig.core.objects.atom import Container
 from typerig.core.objects.layer import Layer
 from typerig.core.objects.glyph import Glyph
+from typerig.core.fileio.vfj import VFJparser
 
 # - Init -------------------------------
-__version__ = '0.1.1'
+__version__ = '0.1.2'
+vfj_version = 8
+
+# - Helpers -----------------------------
+def _as_set(values):
+	'''Restore designspace collections: sets if members are hashable, lists otherwise'''
+	try:
+		return set(values)
+	except TypeError:
+		return list(values)
+
 
 # - Classes -----------------------------
 class FontInfo(object):
@@ -125,6 +138,31 @@ class FontInfo(object):
 				'year'
 				)
 
+	def __init__(self, **kwargs):
+		for key in self.__slots__:
+			setattr(self, key, kwargs.pop(key, None))
+
+	def __repr__(self):
+		return '<{}: {}>'.format(self.__class__.__name__, self.to_VFJ())
+
+	# -- IO Format ------------------------------
+	def to_VFJ(self):
+		return {key: getattr(self, key) for key in self.__slots__ if getattr(self, key) is not None}
+
+	@staticmethod
+	def from_VFJ(data):
+		if not isinstance(data, dict): data = json.loads(data)
+		return FontInfo(**{key: value for key, value in data.items() if key in FontInfo.__slots__})
+
+	def to_XML(self):
+		'''Values are stored JSON encoded as they are not always strings'''
+		return ET.Element('info', {key: json.dumps(value) for key, value in self.to_VFJ().items()})
+
+	@staticmethod
+	def from_XML(element):
+		if not ET.iselement(element): element = ET.fromstring(element)
+		return FontInfo.from_VFJ({key: json.loads(value) for key, value in element.attrib.items()})
+
 class Font(Container): 
 	__slots__ = ('info', 'axes', 'masters', 'instances', 'features', 'classes', 'kerning', 'identifier')
 
@@ -137,7 +175,7 @@ class Font(Container):
 			self.identifier = kwargs.pop('identifier', None)
 
 			# - Basic
-			self.info = kwargs.pop('info', FontInfo())
+			self.info = kwargs.pop('info', FontInfo(familyName=kwargs.pop('name', None)))
 
 			# - Designspace
 			self.axes = kwargs.pop('axes', set())
@@ -186,20 +224,148 @@ class Font(Container):
 		return [glyph for glyph in self.glyphs if glyph.unicode in search_unicodes]
 
 	# -- IO Format ------------------------------
+	def __font_data(self):
+		'''Font level data without glyphs'''
+		return {'upm': self.info.unitsPerEm,
+				'glyphsCount': len(self.glyphs),
+				'info': self.info.to_VFJ(),
+				'axes': list(self.axes),
+				'masters': list(self.masters),
+				'instances': list(self.instances),
+				'features': self.features,
+				'classes': self.classes,
+				'kerning': self.kerning}
+
+	def __set_font_data(self, key, value):
+		if key == 'info':
+			self.info = FontInfo.from_VFJ(value)
+
+		elif key in ('axes', 'masters', 'instances'):
+			setattr(self, key, _as_set(value))
+		
+		elif key in ('features', 'classes', 'kerning'):
+			setattr(self, key, value)
+
 	def to_VFJ(self):
-		raise NotImplementedError
+		font_data = self.__font_data()
+		font_data['glyphs'] = [glyph.to_VFJ() for glyph in self.glyphs]
+		
+		return {'version': vfj_version, 'type': 'font', 'font': font_data}
 
 	@staticmethod
-	def from_VFJ(string):
-		raise NotImplementedError
+	def from_VFJ(data):
+		if not isinstance(data, dict): data = json.loads(data)
+		font_data = data.get('font', data)
+		
+		new_font = Font([Glyph.from_VFJ(glyph_data) for glyph_data in font_data.get('glyphs', [])])
+		
+		for key, value in font_data.items():
+			new_font.__set_font_data(key, value)
+
+		return new_font
+
+	def write_VFJ(self, file_object):
+		'''Write VFJ straight to a text file object, serializing one glyph at a time'''
+		file_object.write('{{"version": {}, "type": "font", "font": {{'.format(vfj_version))
+
+		for key, value in self.__font_data().items():
+			file_object.write('{}: {},\n'.format(json.dumps(key), json.dumps(value)))
+
+		file_object.write('"glyphs": [\n')
+
+		for idx, glyph in enumerate(self.glyphs):
+			if idx: file_object.write(',\n')
+			file_object.write(json.dumps(glyph.to_VFJ()))
+
+		file_object.write('\n]}}\n')
 
 	@staticmethod
+	def read_VFJ(file_path):
+		'''Read VFJ file incrementally, deserializing one glyph at a time'''
+		new_font = Font()
+
+		with VFJparser(file_path, stream_keys=('glyphs',)) as reader:
+			for key, value in reader:
+				if key == 'glyphs':
+					new_font.append(Glyph.from_VFJ(value))
+				else:
+					new_font.__set_font_data(key, value)
+
+		return new_font
+
 	def to_XML(self):
-		raise NotImplementedError
+		element = ET.Element('font', version=str(vfj_version))
+		element.extend(self.__XML_data())
+		element.extend([glyph.to_XML() for glyph in self.glyphs])
+		
+		return element
+
+	def __XML_data(self):
+		font_data = self.__font_data()
+		data_elements = [self.info.to_XML()]
+
+		for key in ('axes', 'masters', 'instances', 'features', 'classes', 'kerning'):
+			data_element = ET.Element('data', key=key)
+			data_element.text = json.dumps(font_data[key])
+			data_elements.append(data_element)
+
+		return data_elements
+
+	def __set_XML_data(self, element):
+		if element.tag == 'info':
+			self.info = FontInfo.from_XML(element)
+
+		elif element.tag == 'data':
+			self.__set_font_data(element.get('key'), json.loads(element.text))
+
+	@staticmethod
+	def from_XML(element):
+		if not ET.iselement(element): element = ET.fromstring(element)
+		new_font = Font()
+
+		for child in element:
+			if child.tag == 'glyph':
+				new_font.append(Glyph.from_XML(child))
+			else:
+				new_font.__set_XML_data(child)
+
+		return new_font
+
+	def write_XML(self, file_object):
+		'''Write XML straight to a text file object, serializing one glyph at a time'''
+		file_object.write('<?xml version="1.0" encoding="utf-8"?>\n<font version="{}">\n'.format(vfj_version))
+
+		for element in self.__XML_data():
+			file_object.write(ET.tostring(element, encoding='utf-8').decode('utf-8') + '\n')
+
+		for glyph in self.glyphs:
+			file_object.write(ET.tostring(glyph.to_XML(), encoding='utf-8').decode('utf-8') + '\n')
+
+		file_object.write('</font>\n')
 
 	@staticmethod
-	def from_XML(string):
-		raise NotImplementedError
+	def read_XML(file_path):
+		'''Read XML file incrementally, deserializing one glyph at a time'''
+		new_font = Font()
+		depth, root = 0, None
+
+		for event, element in ET.iterparse(file_path, events=('start', 'end')):
+			if event == 'start':
+				if root is None: root = element
+				depth += 1
+				continue
+
+			depth -= 1
+			if depth != 1: continue
+
+			if element.tag == 'glyph':
+				new_font.append(Glyph.from_XML(element))
+			else:
+				new_font.__set_XML_data(element)
+			
+			root.clear() # Drop processed records
+
+		return new_font
 
 
 if __name__ == '__main__':
@@ -228,6 +394,29 @@ if __name__ == '__main__':
 	f = Font([g], name='Test')
 	print(f)
 
+	# - Round trip: VFJ and XML serialization
+	import os, io, time, tempfile
+	print(section('Round trip'))
+	print(Glyph.from_VFJ(g.to_VFJ()).layers[0].node_array == g.layers[0].node_array)
+	print(Glyph.from_XML(ET.tostring(g.to_XML())).layers[0].node_array == g.layers[0].node_array)
+
+	# - Benchmark: headless round trip of a larger font
+	big = Font([Glyph([Layer([[test]], name='Regular', width=960.), Layer([[test]], name='Bold', width=1000.)], name='g{}'.format(gid), unicodes=[0xE000 + gid]) for gid in range(2000)], name='Test')
+	
+	for ext, writer, reader in (('.vfj', big.write_VFJ, Font.read_VFJ), ('.xml', big.write_XML, Font.read_XML)):
+		test_path = os.path.join(tempfile.gettempdir(), 'test_core_font' + ext)
+		start = time.time()
+		
+		with io.open(test_path, 'w', encoding='utf-8') as test_file:
+			writer(test_file)
+		
+		written = time.time()
+		loaded = reader(test_path)
+		done = time.time()
+		os.remove(test_path)
+
+		print('{}: {} glyphs; write {:.2f}s; read {:.2f}s; match {}'.format(ext, len(loaded.glyphs), written - start, done - written, loaded.glyphs[-1].layers[1].node_array == big.glyphs[-1].layers[1].node_array))
+
 
 	
 
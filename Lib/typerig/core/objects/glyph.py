@@ -10,6 +10,8 @@
 
 # - Dependencies ------------------------
 from __future__ import absolute_import, print_function, division
+import json
+import xml.etree.ElementTree as ET
 
 from typerig.core.objects.transform import Transform
 from typerig.core.objects.utils import Bounds
@@ -19,7 +21,7 @@ from typerig.core.objects.atom import Container
 from typerig.core.objects.layer import Layer
 
 # - Init -------------------------------
-__version__ = '0.1.6'
+__version__ = '0.1.7'
 
 # - Classes -----------------------------
 class Glyph(Container): 
@@ -93,7 +95,7 @@ class Glyph(Container):
 	@unicode.setter
 	def unicode(self, value):
 		try:
-			self.unicodes[0] = values
+			self.unicodes[0] = value
 		except (IndexError, AttributeError):
 			self.unicodes = [value]
 
@@ -110,19 +112,42 @@ class Glyph(Container):
 
 	# -- IO Format ------------------------------
 	def to_VFJ(self):
-		raise NotImplementedError
+		glyph_data = {'name': self.name, 'layers': [layer.to_VFJ() for layer in self.layers]}
+		if self.unicodes: glyph_data['unicode'] = ','.join('{:04X}'.format(uni) for uni in self.unicodes)
+		if self.mark: glyph_data['mark'] = self.mark
+		if self.identifier is not None: glyph_data['identifier'] = self.identifier
+		
+		return glyph_data
 
 	@staticmethod
-	def from_VFJ(string):
-		raise NotImplementedError
+	def from_VFJ(data):
+		if not isinstance(data, dict): data = json.loads(data)
+		unicodes = data.get('unicode', '')
+		
+		return Glyph([Layer.from_VFJ(layer_data) for layer_data in data.get('layers', [])],
+						name=data.get('name', None),
+						unicodes=[int(uni, 16) for uni in unicodes.split(',') if uni] if not isinstance(unicodes, int) else [unicodes],
+						mark=data.get('mark', 0),
+						identifier=data.get('identifier', None))
 
-	@staticmethod
 	def to_XML(self):
-		raise NotImplementedError
+		element = ET.Element('glyph', name=str(self.name))
+		if self.unicodes: element.set('unicodes', ' '.join('{:04X}'.format(uni) for uni in self.unicodes))
+		if self.mark: element.set('mark', str(self.mark))
+		if self.identifier is not None: element.set('identifier', str(self.identifier))
+		element.extend([layer.to_XML() for layer in self.layers])
+
+		return element
 
 	@staticmethod
-	def from_XML(string):
-		raise NotImplementedError
+	def from_XML(element):
+		if not ET.iselement(element): element = ET.fromstring(element)
+
+		return Glyph([Layer.from_XML(child) for child in element],
+						name=element.get('name', None),
+						unicodes=[int(uni, 16) for uni in element.get('unicodes', '').split()],
+						mark=int(element.get('mark', 0)),
+						identifier=element.get('identifier', None))
 
 
 if __name__ == '__main__':
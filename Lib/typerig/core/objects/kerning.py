@@ -0,0 +1,317 @@
+# MODULE: TypeRig / Core / Kerning (Object)
+# -----------------------------------------------------------
+# (C) Vassil Kateliev, 2018-2021 	(http://www.kateliev.com)
+# (C) Karandash Type Foundry 		(http://www.karandash.eu)
+#------------------------------------------------------------
+# www.typerig.com
+
+# No warranties. By using this you agree
+# that you use it at your own risk!
+
+# - Dependencies ------------------------
+from __future__ import absolute_import, print_function, division
+
+try: # Optional: vectorized arrays
+	import numpy as np
+except ImportError:
+	np = None
+
+# - Init -------------------------------
+__version__ = '0.2.1'
+kern_group_types = ('KernLeft', 'KernRight', 'KernBothSide')
+
+# - Functions ---------------------------
+def group_index(groups):
+	'''Reverse maps from glyph to its left and right kern group.
+
+	Args:
+		groups dict(group_name: (list(glyph_names), group_type)): Kern groups, group_type in kern_group_types
+
+	Returns:
+		tuple({glyph_name: left_group}, {glyph_name: right_group}): First matching group wins,
+		left and right groups take precedence over groups kerning on both sides.
+	'''
+	members = {group_type:{} for group_type in kern_group_types}
+
+	for group_name, (glyph_names, group_type) in groups.items():
+		if group_type not in members: continue
+		for glyph_name in glyph_names:
+			members[group_type].setdefault(glyph_name, group_name)
+
+	left_index = dict(members['KernBothSide'])
+	left_index.update(members['KernLeft'])
+	right_index = dict(members['KernBothSide'])
+	right_index.update(members['KernRight'])
+
+	return left_index, right_index
+
+def kerning_mismatch(sources, delta=0, missing_only=False):
+	'''Pairs that differ between kerning sources (masters or fonts).
+
+	Args:
+		sources list(tuple(label, dict(pair: value))) or dict(label: dict(pair: value)): Kerning sources to compare
+		delta (int/float): Value tolerance
+		missing_only (bool): Report only pairs not present in all sources
+
+	Returns:
+		labels list, dict(pair: list(values)): Values in labels order, None where the pair is missing
+	'''
+	if isinstance(sources, dict): sources = sorted(sources.items())
+	labels = [label for label, kerning in sources]
+	tables = [kerning for label, kerning in sources]
+	mismatch = {}
+
+	all_pairs = set()
+	for kerning in tables: all_pairs.update(kerning)
+
+	for pair in all_pairs:
+		values = [kerning.get(pair) for kerning in tables]
+
+		if None in values:
+			mismatch[pair] = values
+
+		elif not missing_only and max(values) - min(values) > delta:
+			mismatch[pair] = values
+
+	return labels, mismatch
+
+# - Classes -----------------------------
+class KerningResolver(object):
+	'''Flattened kerning: resolves the effective kern value of any glyph pair
+	by the standard precedence: glyph-glyph, glyph-class, class-glyph, class-class.
+
+	Constructor:
+		KerningResolver(pairs, groups, default=None)
+
+	Args:
+		pairs dict((left, right): value): Kern pairs, left and right are glyph or group names
+		groups dict(group_name: (list(glyph_names), group_type)): Kern groups
+		default: Value for pairs without kerning
+
+	Methods:
+		.resolve(pair): Effective value for glyph pair (left, right)
+		.source(pair): Kern pair (glyph or class) defining the value of glyph pair
+		.resolve_pairs(pairs): Effective values for a list of glyph pairs
+		.expand(pair): Glyph pairs covered by a kern pair (class to glyph expansion)
+		.flatten(): Yield every effective glyph pair and its value
+		.matrix(left_names, right_names=None): Dense matrix of effective values
+	'''
+	def __init__(self, pairs, groups, default=None):
+		self.pairs = dict(pairs)
+		self.groups = groups
+		self.default = default
+		self.left_index, self.right_index = group_index(groups)
+
+		# - Class to glyph expansion cache
+		self.__left_members = None
+		self.__right_members = None
+
+	def __repr__(self):
+		return '<{}: Pairs={}, Groups={}>'.format(self.__class__.__name__, len(self.pairs), len(self.groups))
+
+	def __getitem__(self, pair):
+		return self.resolve(pair)
+
+	# - Internals ---------------------------
+	def __members(self):
+		if self.__left_members is None:
+			self.__left_members, self.__right_members = {}, {}
+
+			for glyph_name, group_name in self.left_index.items():
+				self.__left_members.setdefault(group_name, []).append(glyph_name)
+
+			for glyph_name, group_name in self.right_index.items():
+				self.__right_members.setdefault(group_name, []).append(glyph_name)
+
+		return self.__left_members, self.__right_members
+
+	# - Functions ---------------------------
+	def kind(self, pair):
+		'''Kern pair kind: 0 - glyph-glyph, 1 - glyph-class, 2 - class-glyph, 3 - class-class'''
+		left, right = pair
+		return 2*(left in self.groups) + (right in self.groups)
+
+	def source(self, pair):
+		left, right = pair
+		pairs = self.pairs
+		left_group = self.left_index.get(left)
+		right_group = self.right_index.get(right)
+
+		for candidate in ((left, right), (left, right_group), (left_group, right), (left_group, right_group)):
+			if candidate in pairs and None not in candidate:
+				return candidate
+
+	def resolve(self, pair):
+		pair_source = self.source(pair)
+		return self.pairs[pair_source] if pair_source is not None else self.default
+
+	def resolve_pairs(self, pairs):
+		return [self.resolve(pair) for pair in pairs]
+
+	def expand(self, pair):
+		'''Class to glyph expansion: all glyph pairs covered by kern pair (including overridden ones)'''
+		left, right = pair
+		left_members, right_members = self.__members()
+		left_glyphs = left_members.get(left, []) if left in self.groups else [left]
+		right_glyphs = right_members.get(right, []) if right in self.groups else [right]
+
+		return [(left_glyph, right_glyph) for left_glyph in left_glyphs for right_glyph in right_glyphs]
+
+	def flatten(self):
+		'''Yield ((left_glyph, right_glyph), value) for every glyph pair with kerning, once'''
+		for pair, value in self.pairs.items():
+			for glyph_pair in self.expand(pair):
+				if self.source(glyph_pair) == pair:
+					yield glyph_pair, value
+
+	def matrix(self, left_names, right_names=None, fill=0):
+		'''Dense matrix of effective values for a glyph subset: rows left_names, columns right_names.
+		Kern pairs are overlaid from lowest to highest precedence, so cost depends on pairs and matrix size only.
+		Returns NumPy array if available, list of lists otherwise.
+		'''
+		if right_names is None: right_names = left_names
+		row_of = {name: idx for idx, name in enumerate(left_names)}
+		col_of = {name: idx for idx, name in enumerate(right_names)}
+
+		# - Rows/columns of every group
+		group_rows, group_cols = {}, {}
+		for name, idx in row_of.items():
+			if name in self.left_index: group_rows.setdefault(self.left_index[name], []).append(idx)
+
+		for name, idx in col_of.items():
+			if name in self.right_index: group_cols.setdefault(self.right_index[name], []).append(idx)
+
+		# - Bucket pairs by kind
+		buckets = ([], [], [], [])
+		for pair, value in self.pairs.items():
+			buckets[self.kind(pair)].append((pair, value))
+
+		if np is not None:
+			result = np.full((len(left_names), len(right_names)), fill, dtype=float)
+		else:
+			result = [[fill]*len(right_names) for name in left_names]
+
+		# - Overlay: class-class, class-glyph, glyph-class, glyph-glyph
+		for kind in (3, 2, 1, 0):
+			for (left, right), value in buckets[kind]:
+				rows = group_rows.get(left, []) if kind & 2 else ([row_of[left]] if left in row_of else [])
+				cols = group_cols.get(right, []) if kind & 1 else ([col_of[right]] if right in col_of else [])
+				if not len(rows) or not len(cols): continue
+
+				if np is not None:
+					result[np.ix_(rows, cols)] = value
+				else:
+					for row in rows:
+						result_row = result[row]
+						for col in cols:
+							result_row[col] = value
+
+		return result
+
+class KerningAnalyzer(KerningResolver):
+	'''Kerning exception and redundancy analysis built on the indexes of KerningResolver:
+	every query is a pass over the pairs with constant time lookups per pair.
+
+	Constructor:
+		KerningAnalyzer(pairs, groups, default=None)
+
+	Methods:
+		.fallback(pair, class_only=False): Kern pair that would apply to an exception if it was removed
+		.exceptions(delta=0, kinds=(0, 1, 2), class_only=False): Redundant exceptions, within delta from their fallback
+		.flats(): Glyph pairs of grouped glyphs without class kerning (could be extended to class kerning)
+		.orphans(glyph_names): Pairs referencing glyphs missing from glyph_names
+		.orphan_members(glyph_names): Group members missing from glyph_names
+	'''
+	def fallback(self, pair, class_only=False):
+		'''Kern pair that takes over if exception pair is removed: next source by precedence for
+		glyph-glyph pairs, the class-class pair for glyph-class and class-glyph pairs.
+		If class_only, the class-class pair is the only fallback considered.'''
+		kind = self.kind(pair)
+		if kind == 3: return
+
+		left, right = pair
+		pairs = self.pairs
+		left_group = left if kind & 2 else self.left_index.get(left)
+		right_group = right if kind & 1 else self.right_index.get(right)
+		candidates = ((left, right_group), (left_group, right), (left_group, right_group)) if kind == 0 and not class_only else ((left_group, right_group),)
+
+		for candidate in candidates:
+			if candidate in pairs and None not in candidate:
+				return candidate
+
+	def exceptions(self, delta=0, kinds=(0, 1, 2), class_only=False):
+		'''Yield (pair, value, fallback_pair, fallback_value) for exceptions within delta from their fallback.
+		
+		Args:
+			delta (int/float): Maximal difference from the fallback value
+			kinds tuple(int): Kinds of exception pairs checked (see .kind), (0,) for glyph-glyph pairs only
+			class_only (bool): Compare with the class-class pair only (see .fallback)
+		'''
+		pairs = self.pairs
+
+		for pair, value in pairs.items():
+			if self.kind(pair) not in kinds: continue
+			fallback_pair = self.fallback(pair, class_only)
+
+			if fallback_pair is not None and abs(pairs[fallback_pair] - value) <= delta:
+				yield pair, value, fallback_pair, pairs[fallback_pair]
+
+	def flats(self):
+		'''Yield (pair, value, group_pair) for glyph-glyph pairs whose glyphs are grouped, but have no class kerning'''
+		for pair, value in self.pairs.items():
+			left, right = pair
+			if self.kind(pair) or left not in self.left_index or right not in self.right_index: continue
+
+			group_pair = (self.left_index[left], self.right_index[right])
+			if group_pair not in self.pairs:
+				yield pair, value, group_pair
+
+	def orphans(self, glyph_names):
+		'''Yield (pair, value, missing_names) for pairs referencing glyphs not in glyph_names'''
+		glyph_names = glyph_names if isinstance(glyph_names, (set, frozenset, dict)) else set(glyph_names)
+
+		for pair, value in self.pairs.items():
+			missing = [name for name in pair if name not in self.groups and name not in glyph_names]
+			if missing: yield pair, value, missing
+
+	def orphan_members(self, glyph_names):
+		'''Group members not in glyph_names: dict(group_name: list(missing_names))'''
+		glyph_names = glyph_names if isinstance(glyph_names, (set, frozenset, dict)) else set(glyph_names)
+		orphans = {}
+
+		for group_name, (members, group_type) in self.groups.items():
+			missing = [name for name in members if name not in glyph_names]
+			if missing: orphans[group_name] = missing
+
+		return orphans
+
+
+# - Test ----------------------------
+if __name__ == '__main__':
+	groups = {	'O_L': (['O', 'Q', 'C'], 'KernLeft'),
+				'O_R': (['O', 'Q'], 'KernRight'),
+				'V_B': (['V', 'W'], 'KernBothSide'),
+				'A_B': (['A', 'Aacute'], 'KernBothSide')}
+
+	pairs = {	('V_B', 'A_B'): -80,
+				('V_B', 'O_R'): -40,
+				('W', 'A_B'): -60,
+				('V_B', 'Aacute'): -70,
+				('V', 'Aacute'): -90,
+				('O_L', 'V_B'): -30}
+
+	resolver = KerningResolver(pairs, groups, default=0)
+	print(resolver)
+	print(resolver.resolve_pairs([('V', 'A'), ('W', 'Aacute'), ('V', 'Aacute'), ('W', 'Q'), ('C', 'W'), ('H', 'H')]))
+	print(sorted(resolver.flatten()))
+
+	names = ['A', 'Aacute', 'C', 'O', 'V', 'W']
+	print(resolver.matrix(names))
+	print(all(resolver.matrix(names)[i][j] == resolver.resolve((names[i], names[j])) for i in range(len(names)) for j in range(len(names))))
+
+	pairs.update({('O', 'V'): -28, ('Q', 'A'): -20, ('V', 'Ghost'): -10})
+	analyzer = KerningAnalyzer(pairs, groups)
+	print(sorted(analyzer.exceptions(delta=5)))
+	print(sorted(analyzer.flats()))
+	print(list(analyzer.orphans(names)), analyzer.orphan_members(names))
+	print(kerning_mismatch({'Regular': {('A', 'V'): -80, ('T', 'o'): -40}, 'Bold': {('A', 'V'): -90}}, delta=5))
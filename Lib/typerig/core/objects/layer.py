@@ -10,28 +10,32 @@
 
 # - Dependencies ------------------------
 from __future__ import absolute_import, print_function, division
+import json
+import xml.etree.ElementTree as ET
 
 from typerig.core.objects.array import PointArray
 from typerig.core.objects.point import Point
-from typerig.core.objects.transform import Transform
+from typerig.core.objects.transform import Transform, identity
 from typerig.core.objects.utils import Bounds
+from typerig.core.objects.bvh import SegmentBVH
 
-from typerig.core.objects.atom import Container
+from typerig.core.objects.atom import Container, memoized
 from typerig.core.objects.shape import Shape
+from typerig.core.objects.delta import DeltaScale
 
 # - Init -------------------------------
-__version__ = '0.2.0'
+__version__ = '0.2.7'
 
 # - Classes -----------------------------
 class Layer(Container): 
-	__slots__ = ('name', 'stx', 'sty', 'transform', 'mark', 'advance_width', 'advance_height', 'identifier', 'parent', 'lib')
+	__slots__ = ('name', 'stx', 'sty', 'transform', 'mark', 'advance_width', 'advance_height', 'anchors', 'identifier', 'parent', 'lib')
 	
 	def __init__(self, data=None, **kwargs):
 		factory = kwargs.pop('default_factory', Shape)
 		super(Layer, self).__init__(data, default_factory=factory, **kwargs)
 		
 		self.stx, self.sty= None, None
-		self.transform = kwargs.pop('transform', Transform())
+		self.transform = kwargs.pop('transform', identity)
 		
 		# - Metadata
 		if not kwargs.pop('proxy', False): # Initialize in proxy mode
@@ -40,6 +44,7 @@ class Layer(Container):
 			self.identifier = kwargs.pop('identifier', None)
 			self.mark = kwargs.pop('mark', 0)
 			self.name = kwargs.pop('name', hash(self))
+			self.anchors = kwargs.pop('anchors', []) # list(tuple(name, x, y))
 	
 	# -- Internals ------------------------------
 	def __repr__(self):
@@ -97,13 +102,18 @@ class Layer(Container):
 		return selection
 
 	@property
-	def bounds(self):
+	@memoized
+	def _box(self):
 		assert len(self.data) > 0, 'Cannot return bounds for <{}> with length {}'.format(self.__class__.__name__, len(self.data))
-		contour_bounds = [shape.bounds for shape in self.data]
-		bounds = sum([[(bound.x, bound.y), (bound.xmax, bound.ymax)] for bound in contour_bounds],[])
-		return Bounds(bounds)
+		bounds = Bounds(sum([list(shape._box) for shape in self.data], []))
+		return ((bounds.x, bounds.y), (bounds.xmax, bounds.ymax))
+
+	@property
+	def bounds(self):
+		return Bounds(list(self._box))
 
 	@property
+	@memoized
 	def signature(self):
 		return hash(tuple([node.type for node in self.nodes]))
 
@@ -168,9 +178,14 @@ class Layer(Container):
 		self.advance_height = value
 
 	# - Delta related retrievers -----------
+	@property
+	@memoized
+	def _point_tuples(self):
+		return tuple(node.tuple for node in self.nodes)
+
 	@property
 	def point_array(self):
-		return PointArray([node.point for node in self.nodes])
+		return PointArray(self._point_tuples)
 
 	@point_array.setter
 	def point_array(self, other):
@@ -180,6 +195,18 @@ class Layer(Container):
 			for idx in range(len(layer_nodes)):
 				layer_nodes[idx].point = other[idx]
 
+	@property
+	def node_array(self):
+		return [node.tuple for node in self.nodes]
+
+	@node_array.setter
+	def node_array(self, other):
+		layer_nodes = self.nodes
+
+		if isinstance(other, (tuple, list)) and len(other) == len(layer_nodes):
+			for idx in range(len(layer_nodes)):
+				layer_nodes[idx].tuple = other[idx]
+
 	@property
 	def anchor_array(self):
 		#return [node.tuple for node in self.nodes]
@@ -206,6 +233,39 @@ class Layer(Container):
 			#self.ADV, self.VADV = other[1] # Skip VADV for now...
 			self.ADV = other[1][0]
 
+	# - Segment queries (bounding volume hierarchy) ---
+	@property
+	@memoized
+	def bvh(self):
+		'''Segment bounding volume hierarchy over all contours (see core.objects.bvh),
+		keys are (contour, segment_index). Built on first use and rebuilt only after the layer has been edited.
+		The index is shared between callers: query it, do not modify it.'''
+		segments, keys = [], []
+
+		for contour in self.contours:
+			if len(contour.data) < 2: continue
+			contour_segments = contour.segments
+			segments += contour_segments
+			keys += [(contour, idx) for idx in range(len(contour_segments))]
+
+		return SegmentBVH(segments, keys)
+
+	def query_box(self, box):
+		'''Segments whose bounds overlap box (xmin, ymin, xmax, ymax) or Bounds: list(((contour, segment_index), segment))'''
+		return self.bvh.query_box(box)
+
+	def query_line(self, line):
+		'''Segments whose bounds are crossed by line: list(((contour, segment_index), segment))'''
+		return self.bvh.query_line(line)
+
+	def intersect_line(self, line):
+		'''Crossings of all contours with line: list(((contour, segment_index), time, x, y))'''
+		return self.bvh.intersect_line(line)
+
+	def nearest_segment(self, point, max_distance=float('inf')):
+		'''Nearest segment to point: ((contour, segment_index), segment, time, distance)'''
+		return self.bvh.nearest(point, max_distance)
+
 	# - Functions --------------------------
 	def set_weight(self, wx, wy):
 		'''Set x and y weights (a.k.a. stems) for all nodes'''
@@ -276,10 +336,25 @@ class Layer(Container):
 
 		return func
 
-	def delta_scale_to(self, virtual_axis, width, height, fix_scale_direction=-1, main="node_array" ,extrapolate=False):
-		'''Delta Bruter: Brute-force to given dimensions'''
-		
-		# - Init
+	def delta_scale_to(self, virtual_axis, width, height, fix_scale_direction=-1, main="node_array" ,extrapolate=False, solver='brute', tolerance=.5):
+		'''Scale layer to given dimensions using Delta scaling.
+		Args:
+			virtual_axis -> dict(attrib: DeltaScale) : As built by Glyph.virtual_axis()
+			width, height -> float : Target dimensions
+			fix_scale_direction -> int : -1 independent X and Y scale; 0 Y follows X; 1 X follows Y
+			main -> str : Attribute of virtual_axis used to measure the bounds
+			extrapolate -> bool : Allow extrapolation beyond the masters
+			solver -> str : 'brute' (trial-and-error) or 'secant' (see __delta_solve)
+			tolerance -> float : Acceptable residual (secant solver only)
+
+		Returns:
+			tuple(int, tuple(float, float)): Iterations used and residual width and height error
+		'''
+		if solver == 'secant':
+			return self.__delta_solve(virtual_axis, width, height, fix_scale_direction, main, extrapolate, tolerance)
+
+		# - Delta Bruter: Brute-force to given dimensions
+		# -- Init
 		main_array = getattr(self, main)
 		main_bounds = Bounds(main_array)
 		process_axis = {}
@@ -341,21 +416,141 @@ class Layer(Container):
 		for attrib, data in process_axis.items():
 			setattr(self, attrib, data)
 
+		return sentinel, (diff_x, diff_y)
+
+	def __delta_solve(self, virtual_axis, width, height, fix_scale_direction=-1, main="node_array", extrapolate=False, tolerance=.5, cutoff=100):
+		'''Delta Solver: Secant method to given dimensions.
+		Bounds depend (piecewise) linearly on scale, so the secant steps are 
+		evaluated only on the extreme points of the main attribute. A full pass
+		verifies the result and restarts with new extremes if they have changed.
+		'''
+		# - Init
+		stems = (self.stx, self.sty)
+		target = (float(width), float(height))
+		solve = (fix_scale_direction != 1, fix_scale_direction != 0)
+		scaler = lambda delta_array, scale: delta_array.scale_by_stem(stems, tuple(scale), (0.,0.), (0.,0.), False, extrapolate)
+		
+		scale = [1., 1.]
+		prev_scale, prev_diff = None, None
+		iterations = 0
+		stalled = False
+
+		# - Helpers
+		def get_diff(data):
+			data_bounds = Bounds(data)
+			return [target[0] - data_bounds.width, target[1] - data_bounds.height]
+
+		def is_solved(diff):
+			return all([abs(diff[axis]) < tolerance for axis in (0, 1) if solve[axis]])
+
+		def step(scale, diff, prev_scale, prev_diff):
+			new_scale = scale[:]
+
+			for axis in (0, 1):
+				if not solve[axis]: continue
+				current = target[axis] - diff[axis]
+
+				if prev_scale is not None and prev_diff[axis] != diff[axis]:
+					new_scale[axis] = scale[axis] - diff[axis]*(scale[axis] - prev_scale[axis])/(diff[axis] - prev_diff[axis])
+				
+				elif current != 0:
+					new_scale[axis] = scale[axis]*target[axis]/current
+
+			if not solve[0]: new_scale[0] = new_scale[1]
+			if not solve[1]: new_scale[1] = new_scale[0]
+			return new_scale
+
+		# - Process
+		while True:
+			# -- Full pass: verify and find extreme points
+			main_data = scaler(virtual_axis[main], scale)
+			diff = get_diff(main_data)
+			iterations += 1
+
+			if is_solved(diff) or stalled or iterations >= cutoff: break
+			
+			x_values = [item[0] for item in main_data]
+			y_values = [item[1] for item in main_data]
+			extremes = sorted(set([x_values.index(min(x_values)), x_values.index(max(x_values)), y_values.index(min(y_values)), y_values.index(max(y_values))]))
+
+			x_data, y_data, stem_data = virtual_axis[main].dump()
+			probe = DeltaScale()
+			probe.load(([[row[idx] for idx in extremes] for row in x_data], [[row[idx] for idx in extremes] for row in y_data], stem_data))
+
+			# -- Secant steps over extremes only
+			stalled = True
+
+			while iterations < cutoff:
+				new_scale = step(scale, diff, prev_scale, prev_diff)
+				if new_scale == scale: break
+				
+				stalled = False
+				prev_scale, prev_diff = scale, diff
+				scale = new_scale
+				diff = get_diff(scaler(probe, scale))
+				iterations += 1
+
+				if is_solved(diff): break
+
+		# - Set Glyph
+		for attrib, delta_array in virtual_axis.items():
+			setattr(self, attrib, main_data if attrib == main else scaler(delta_array, scale))
+
+		return iterations, tuple(diff)
+
 	# -- IO Format ------------------------------
 	def to_VFJ(self):
-		raise NotImplementedError
+		layer_data = {	'name': self.name,
+						'advanceWidth': self.advance_width,
+						'advanceHeight': self.advance_height,
+						'elements': [shape.to_VFJ() for shape in self.shapes]}
 
-	@staticmethod
-	def from_VFJ(string):
-		raise NotImplementedError
+		if self.mark: layer_data['mark'] = self.mark
+		if self.identifier is not None: layer_data['identifier'] = self.identifier
+		if self.has_stems: layer_data['stems'] = list(self.stems)
+		if self.anchors: layer_data['anchors'] = [{'name': name, 'point': ' '.join(str(int(value)) if float(value).is_integer() else str(value) for value in (x, y))} for name, x, y in self.anchors]
+
+		return layer_data
 
 	@staticmethod
+	def from_VFJ(data):
+		if not isinstance(data, dict): data = json.loads(data)
+
+		new_layer = Layer([Shape.from_VFJ(shape_data) for shape_data in data.get('elements', [])],
+							name=data.get('name', None),
+							width=data.get('advanceWidth', 0.),
+							height=data.get('advanceHeight', 1000.),
+							mark=data.get('mark', 0),
+							identifier=data.get('identifier', None),
+							anchors=[(anchor['name'],) + tuple(map(float, anchor.get('point', '0 0').split())) for anchor in data.get('anchors', [])])
+
+		if 'stems' in data: new_layer.stems = data['stems']
+		return new_layer
+
 	def to_XML(self):
-		raise NotImplementedError
+		element = ET.Element('layer', name=str(self.name), width=repr(self.advance_width), height=repr(self.advance_height))
+		if self.mark: element.set('mark', str(self.mark))
+		if self.identifier is not None: element.set('identifier', str(self.identifier))
+		if self.has_stems: element.set('stems', ' '.join(map(repr, self.stems)))
+		element.extend([shape.to_XML() for shape in self.shapes])
+		element.extend([ET.Element('anchor', name=str(name), x=repr(x), y=repr(y)) for name, x, y in self.anchors])
+
+		return element
 
 	@staticmethod
-	def from_XML(string):
-		raise NotImplementedError
+	def from_XML(element):
+		if not ET.iselement(element): element = ET.fromstring(element)
+
+		new_layer = Layer([Shape.from_XML(child) for child in element if child.tag != 'anchor'],
+							name=element.get('name', None),
+							width=float(element.get('width', 0.)),
+							height=float(element.get('height', 1000.)),
+							mark=int(element.get('mark', 0)),
+							identifier=element.get('identifier', None),
+							anchors=[(child.get('name'), float(child.get('x')), float(child.get('y'))) for child in element if child.tag == 'anchor'])
+
+		if element.get('stems') is not None: new_layer.stems = list(map(float, element.get('stems').split()))
+		return new_layer
 
 
 if __name__ == '__main__':
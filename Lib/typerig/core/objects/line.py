@@ -15,7 +15,7 @@ import math
 from typerig.core.func.math import linInterp as lerp
 from typerig.core.func.math import isBetween
 from typerig.core.func.utils import isMultiInstance
-from typerig.core.objects.transform import Transform
+from typerig.core.objects.transform import Transform, identity
 from typerig.core.objects.point import Point, Void
 
 # - Init -------------------------------
@@ -46,7 +46,7 @@ class Line(object):
 			if isMultiInstance(argv, (float, int)):
 				self.p0, self.p1 = Point(argv[0], argv[1]), Point(argv[2], argv[3])
 
-		self.transform = Transform()
+		self.transform = identity
 
 	def __add__(self, other):
 		return self.__class__(self.p0 + other, self.p1 + other)
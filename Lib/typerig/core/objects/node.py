@@ -11,6 +11,7 @@
 # - Dependencies ------------------------
 from __future__ import absolute_import, print_function, division
 import math, copy
+import xml.etree.ElementTree as ET
 
 from typerig.core.func.geometry import ccw
 from typerig.core.func.math import ratfrac, randomize
@@ -19,46 +20,51 @@ from typerig.core.func.transform import adaptive_scale, lerp
 from typerig.core.objects.point import Point
 from typerig.core.objects.line import Line, Vector
 from typerig.core.objects.cubicbezier import CubicBezier
-from typerig.core.objects.transform import Transform
+from typerig.core.objects.transform import Transform, identity
 
 from typerig.core.func.utils import isMultiInstance
-from typerig.core.objects.atom import Member, Container
+from typerig.core.objects.atom import Member, Container, versioned
 
 # - Init -------------------------------
-__version__ = '0.5.0'
+__version__ = '0.5.5'
 node_types = {'on':'on', 'off':'off', 'curve':'curve', 'move':'move'}
 
 # - Classes -----------------------------
 class Node(Member): 
-	__slots__ = ('x', 'y', 'type', 'name', 'smooth', 'g2', 'selected', 'angle', 'transform', 'identifier','complex_math','weight', 'parent', 'lib')
+	__slots__ = ('_x', '_y', '_type', 'name', 'smooth', 'g2', 'selected', 'angle', 'transform', 'complex_math', 'weight') # 'identifier', 'parent', 'lib' inherited from Member
+	
+	# - Geometry: assignments invalidate values memoized by the parent contour and its parents
+	x = versioned('_x')
+	y = versioned('_y')
+	type = versioned('_type')
 
 	def __init__(self, *args, **kwargs):
 		super(Node, self).__init__(*args, **kwargs)
 		self.parent = kwargs.pop('parent', None)
 
-		# - Basics
+		# - Basics (a new node has nothing to invalidate: set slots directly)
 		if len(args) == 1:
 			if isinstance(args[0], self.__class__): # Clone
-				self.x, self.y = args[0].x, args[0].y
+				self._x, self._y = args[0].x, args[0].y
 
 			if isinstance(args[0], (tuple, list)):
-				self.x, self.y = args[0]
+				self._x, self._y = args[0]
 
 		elif len(args) == 2:
 			if isMultiInstance(args, (float, int)):
-				self.x, self.y = float(args[0]), float(args[1])
+				self._x, self._y = float(args[0]), float(args[1])
 		
 		else:
-			self.x, self.y = 0., 0.
+			self._x, self._y = 0., 0.
 
 		self.angle = kwargs.pop('angle', 0)
-		self.transform = kwargs.pop('transform', Transform())
+		self.transform = kwargs.pop('transform', identity)
 		self.complex_math = kwargs.pop('complex', True)
 		self.weight = Point(kwargs.pop('weight', (0.,0.)))
 
 		# - Metadata
 		if not kwargs.pop('proxy', False): # Initialize in proxy mode
-			self.type = kwargs.pop('type', node_types['on'])
+			self._type = kwargs.pop('type', node_types['on'])
 			self.name = kwargs.pop('name', '')
 			self.identifier = kwargs.pop('identifier', False)
 			self.smooth = kwargs.pop('smooth', False)
@@ -251,11 +257,19 @@ class Node(Member):
 		return self.prev_on.insert_after(time)
 
 	def insert_after_distance(self, distance): 
-		# Note distance is linear only (for now... for Cubic use .solve_distance_start())
+		# Note distance is measured along the curve (arc length) for cubic segments
+		segment = self.segment
+		if isinstance(segment, CubicBezier):
+			return self.insert_after(segment.solve_distance_start(distance))
+
 		return self.insert_after(ratfrac(distance, self.distance_to_next_on, 1.))
 
 	def insert_before_distance(self, distance):
-		# Note distance is linear only (for now... for Cubic use .solve_distance_start())
+		# Note distance is measured along the curve (arc length) for cubic segments
+		segment = self.prev_on.segment
+		if isinstance(segment, CubicBezier):
+			return self.insert_before(segment.solve_distance_end(distance))
+
 		return self.insert_before(1. - ratfrac(distance, self.distance_to_prev_on, 1.))
 
 	def remove(self):
@@ -601,7 +615,7 @@ class Node(Member):
 
 	@staticmethod
 	def from_VFJ(string):
-		string_list = string.split(' ')
+		string_list = string.split()
 		node_smooth = True if len(string_list) >= 3 and 's' in string_list else False
 		node_type = node_types['off'] if len(string_list) >= 3 and 'o' in string_list else node_types['on']
 		node_g2 = True if len(string_list) >= 3 and 'g2' in string_list else False
@@ -609,12 +623,25 @@ class Node(Member):
 		return Node(float(string_list[0]), float(string_list[1]), type=node_type, smooth=node_smooth, g2=node_g2, name=None, identifier=None)
 
 	@staticmethod
+	def nodes_from_VFJ(string):
+		'''FontLab VFJ node string: on-curve point and flags, preceded by the handles of
+		the curve segment ending at it; groups are separated by double spaces.
+		Ex: '0 400  50 700  200 700 s' -> [Node(0, 400, curve), Node(50, 700, curve), Node(200, 700, on, smooth)]
+		'''
+		groups = [group for group in string.strip().split('  ') if group.strip()]
+		handles = [Node(*[float(value) for value in group.split()[:2]], type=node_types['curve']) for group in groups[:-1]]
+		
+		return handles + [Node.from_VFJ(groups[-1])]
+
 	def to_XML(self):
-		raise NotImplementedError
+		element = ET.Element('node')
+		element.text = self.to_VFJ()
+		return element
 
 	@staticmethod
-	def from_XML(string):
-		raise NotImplementedError
+	def from_XML(element):
+		if not ET.iselement(element): element = ET.fromstring(element)
+		return Node.from_VFJ(element.text)
 
 
 class Knot(Member):
@@ -642,7 +669,7 @@ class Knot(Member):
 		self.identifier = kwargs.pop('identifier', False)
 		self.parent = kwargs.pop('parent', None)
 		self.angle = kwargs.pop('angle', 0)
-		self.transform = kwargs.pop('transform', Transform())
+		self.transform = kwargs.pop('transform', identity)
 		self.complex_math = kwargs.pop('complex', True)
 
 		# - Hobby Specific
@@ -782,4 +809,21 @@ if __name__ == '__main__':
 	print(n0)
 	n0.tuple = (1,2)
 	print(n0.tuple)
-	
+
+	# - Benchmark: memory footprint of a loaded core Font
+	import tracemalloc
+	from typerig.core.objects.node import Node # Same class as the one used by Contour
+	from typerig.core.objects.contour import Contour
+	from typerig.core.objects.shape import Shape
+	from typerig.core.objects.layer import Layer
+	from typerig.core.objects.glyph import Glyph
+	from typerig.core.objects.font import Font
+
+	glyph_count, masters, contours, nodes = 200, ['Regular', 'Bold', 'Condensed', 'Wide'], 2, 50
+	node_count = glyph_count*len(masters)*contours*nodes
+
+	tracemalloc.start()
+	font = Font([Glyph([Layer([Shape([Contour([Node(float(i), float(i + cid)) for i in range(nodes)], closed=True) for cid in range(contours)])], name=master) for master in masters], name='glyph{}'.format(gid)) for gid in range(glyph_count)])
+	memory_current, memory_peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	print('Font memory: {:.1f} MB; {:.1f} bytes per node ({} glyphs x {} masters, {} nodes)'.format(memory_current/1048576., memory_current/float(node_count), glyph_count, len(masters), node_count))
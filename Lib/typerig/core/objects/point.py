@@ -13,13 +13,15 @@ from __future__ import absolute_import, print_function, division
 import math
 
 from typerig.core.func.utils import isMultiInstance
-from typerig.core.objects.transform import Transform
+from typerig.core.objects.transform import Transform, identity
 
 # - Init -------------------------------
-__version__ = '0.27.2'
+__version__ = '0.28.0'
 
 # - Classes -----------------------------
 class Point(object): 
+	__slots__ = ('x', 'y', '__angle', 'transform', 'complex_math')
+
 	def __init__(self, *args, **kwargs):
 		if len(args) == 1:
 			if isinstance(args[0], self.__class__): # Clone
@@ -36,7 +38,7 @@ class Point(object):
 			self.x, self.y = 0., 0.
 
 		self.angle = kwargs.get('angle', 0)
-		self.transform = kwargs.get('transform', Transform())
+		self.transform = kwargs.get('transform', identity)
 		self.complex_math = kwargs.get('complex', True)
 
 	# -- Operators
@@ -286,6 +288,8 @@ class Point(object):
 		self.x, self.y = transform.applyTransformation(self.x, self.y)
 
 class Void(Point):
+	__slots__ = ()
+
 	def __init__(self, *argv):
 		super(Void, self).__init__(float('nan'), float('nan'))
 
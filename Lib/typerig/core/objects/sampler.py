@@ -0,0 +1,486 @@
+# MODULE: TypeRig / Core / Sampler (Object)
+# -----------------------------------------------------------
+# (C) Vassil Kateliev, 2020-2021 	(http://www.kateliev.com)
+# (C) Karandash Type Foundry 		(http://www.karandash.eu)
+#------------------------------------------------------------
+# www.typerig.com
+
+# No warranties. By using this you agree
+# that you use it at your own risk!
+
+# - Dependencies ------------------------
+from __future__ import absolute_import, print_function, division
+import os, io, json, time, hashlib, multiprocessing
+
+from typerig.core.func.geometry import poly_area
+
+try: # Optional: vectorized arrays
+	import numpy as np
+except ImportError:
+	np = None
+
+# - Init -------------------------------
+__version__ = '0.1.3'
+
+# - Functions ---------------------------
+def _xy(points):
+	'''Coordinate tuples from Point like objects or (x, y) tuples'''
+	return [(p.x, p.y) if hasattr(p, 'x') else p for p in points]
+
+def shoelace_area(points):
+	'''Absolute area of polygon (Points, (x, y) tuples or Nx2 array) by the shoelace formula'''
+	if np is not None:
+		xy = np.asarray(points if isinstance(points, np.ndarray) else _xy(points), dtype=float).reshape(-1, 2)
+		if len(xy) < 3: return 0.
+		x, y = xy[:, 0], xy[:, 1]
+		return abs(float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)))*0.5
+
+	return poly_area(_xy(points))
+
+def shoelace_areas(polygons):
+	'''Absolute areas of multiple polygons, computed in a single vectorized pass if NumPy is available'''
+	if np is None:
+		return [poly_area(_xy(points)) for points in polygons]
+
+	polygons = [np.asarray(points if isinstance(points, np.ndarray) else _xy(points), dtype=float).reshape(-1, 2) for points in polygons]
+	areas = [0.]*len(polygons)
+	valid = [idx for idx, xy in enumerate(polygons) if len(xy) >= 3]
+	if not len(valid): return areas
+
+	# - Concatenate polygons and wrap the "next vertex" index of each to its own start
+	lengths = np.array([len(polygons[idx]) for idx in valid])
+	starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+	xy = np.concatenate([polygons[idx] for idx in valid])
+	next_vertex = np.arange(1, len(xy) + 1)
+	next_vertex[starts + lengths - 1] = starts
+
+	x, y = xy[:, 0], xy[:, 1]
+	cross = x*y[next_vertex] - x[next_vertex]*y
+	
+	for idx, area in zip(valid, np.abs(np.add.reduceat(cross, starts))*0.5):
+		areas[idx] = float(area)
+
+	return areas
+
+# -- Sampling pipeline (headless) ---------
+def band_pass(points, cutout_depth=(10000, 10000), in_reverse=False):
+	'''Clamp (x, y) samples cutout_depth away from the left (or right if in_reverse) extreme'''
+	if not len(points): return []
+	cutout_depth_x, cutout_depth_y = cutout_depth
+
+	if not in_reverse:
+		cutout_x = min(p[0] for p in points) + cutout_depth_x
+		cutout_y = min(p[1] for p in points) + cutout_depth_y
+		return [(min(x, cutout_x), min(y, cutout_y)) for x, y in points]
+
+	cutout_x = max(p[0] for p in points) - cutout_depth_x
+	cutout_y = max(p[1] for p in points) - cutout_depth_y
+	return [(max(x, cutout_x), max(y, cutout_y)) for x, y in points]
+
+def close_poly(points, in_reverse=False, grow_value=0):
+	'''Close (x, y) samples to a polygon along the left (or right if in_reverse) extreme'''
+	if not len(points): return []
+	min_y = min(p[1] for p in points)
+	max_y = max(p[1] for p in points)
+	x = min(p[0] for p in points) - grow_value if not in_reverse else max(p[0] for p in points) + grow_value
+
+	return [(x, min_y)] + list(points) + [(x, max_y)]
+
+def sample_outline(segments, probes, mid_x, cutout=(100, 10000), margin_growth=0, scanline=None):
+	'''Sample outline segments with horizontal probes. Returns (left, mid, right) sample polygons'''
+	if scanline is None: scanline = ScanlineSampler()
+	left, right = [], []
+
+	for y, left_x, right_x, count in scanline.extremes(segments, probes):
+		if count >= 2:
+			left.append((left_x, y))
+			right.append((right_x, y))
+		
+		elif left_x < mid_x: # Single intersection fix
+			left.append((left_x, y))
+		else:
+			right.append((right_x, y))
+
+	left = band_pass(left, cutout, False)
+	right = band_pass(right, cutout, True)
+	mid = left + list(reversed(right))
+
+	return close_poly(left, False, margin_growth), mid, close_poly(right, True, margin_growth)
+
+def area_sidebearings(areas, area_mult, sample_window):
+	'''Side-bearings (lsb, rsb) from (left, mid, right) areas of negative space'''
+	left, mid, right = areas
+	window_height = max(sample_window) - min(sample_window) 
+	mid_prop = mid*area_mult
+
+	return (mid_prop - abs(left))/window_height, (mid_prop - abs(right))/window_height
+
+# -- Batch processing ---------------------
+_batch_state = {}
+
+def _batch_init(params):
+	'''Worker initializer: shared sampling parameters and a per process scanline cache'''
+	_batch_state.clear()
+	_batch_state.update(params)
+	_batch_state['scanline'] = ScanlineSampler()
+
+def _batch_work(task):
+	key, segments, mid_x = task
+	state = _batch_state
+
+	samples = sample_outline(segments, state['probes'], mid_x, state['cutout'], state['margin_growth'], state['scanline'])
+	areas = tuple(shoelace_areas(samples))
+
+	return key, areas, area_sidebearings(areas, state['area_mult'], state['sample_window'])
+
+def batch_sidebearings(tasks, probes, sample_window, area_mult=0.5, cutout=(100, 10000), margin_growth=0, processes=None, progress=None, cancel=None, chunk_size=8):
+	'''Sample and compute side-bearings for many outlines in a process pool.
+	
+	Args:
+		tasks list(tuple(key, segments, mid_x)): Outlines to process. Segments are tuples of 2 (line) or 4 (curve) (x, y) tuples
+		probes, sample_window, area_mult, cutout, margin_growth: Sampler parameters (see GlyphSampler)
+		processes (int): Worker processes, None for CPU count, 0 to run in the current process
+		progress (callable): Called as progress(done, total) after every finished task
+		cancel (callable): Polled after every finished task, return True to stop (ex. threading.Event().is_set)
+		chunk_size (int): Tasks sent to a worker at once
+
+	Returns:
+		dict {key: ((left_area, mid_area, right_area), (lsb, rsb))}: Partial if cancelled
+	'''
+	params = {'probes': list(probes), 'sample_window': tuple(sample_window), 'area_mult': area_mult, 'cutout': tuple(cutout), 'margin_growth': margin_growth}
+	results = {}
+	total = len(tasks)
+	pool = None
+
+	if processes == 0 or total < 2:
+		_batch_init(params)
+		process_results = (_batch_work(task) for task in tasks)
+	else:
+		pool = multiprocessing.Pool(processes, _batch_init, (params,))
+		process_results = pool.imap_unordered(_batch_work, tasks, chunk_size)
+
+	try:
+		for key, areas, sidebearings in process_results:
+			results[key] = (areas, sidebearings)
+			
+			if progress is not None: progress(len(results), total)
+			if cancel is not None and cancel(): break
+	finally:
+		if pool is not None:
+			pool.terminate()
+			pool.join()
+
+	return results
+
+# -- Caching -----------------------------
+def sample_key(segments, mid_x, params):
+	'''Content address (SHA1 hex) of an outline (segments, mid_x) sampled with given parameters'''
+	data = json.dumps([__version__, params, mid_x, segments], separators=(',', ':'))
+	return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+# - Classes -----------------------------
+class SampleCache(object):
+	'''Persistent content addressed cache for sampler results with LRU eviction.
+	Every entry is stored as JSON file <cache_path>/<key[:2]>/<key>.json, where key is
+	a content address (see sample_key), so edited outlines simply miss the cache. 
+	Access time (file mtime) defines the LRU order that is kept between sessions.
+
+	Constructor:
+		SampleCache(cache_path, max_entries=100000, max_bytes=256*1024**2)
+
+	Methods:
+		.get(key, default=None): Cached value, refreshes entry access time
+		.set(key, value): Store JSON serializable value, evicts least recently used entries over limits
+		.evict(): Enforce max_entries and max_bytes limits
+		.clear(): Remove all entries
+	'''
+	def __init__(self, cache_path, max_entries=100000, max_bytes=256*1024**2):
+		self.path = cache_path
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		self.__index = {} # key: [size, access_time]
+		self.__size = 0
+		
+		if not os.path.isdir(self.path): os.makedirs(self.path)
+		self.__scan()
+		self.evict()
+
+	def __len__(self):
+		return len(self.__index)
+
+	def __contains__(self, key):
+		return key in self.__index
+
+	def __repr__(self):
+		return '<{}: {}, Entries={}, Size={}>'.format(self.__class__.__name__, self.path, len(self), self.__size)
+
+	# - Internals ---------------------------
+	def __file(self, key):
+		return os.path.join(self.path, key[:2], key + '.json')
+
+	def __scan(self):
+		self.__index, self.__size = {}, 0
+
+		for shard in os.listdir(self.path):
+			shard_path = os.path.join(self.path, shard)
+			if not os.path.isdir(shard_path): continue
+
+			for file_name in os.listdir(shard_path):
+				if not file_name.endswith('.json'): continue
+				stat = os.stat(os.path.join(shard_path, file_name))
+				self.__index[file_name[:-5]] = [stat.st_size, stat.st_mtime]
+				self.__size += stat.st_size
+
+	def __drop(self, key):
+		size, access_time = self.__index.pop(key)
+		self.__size -= size
+
+		try:
+			os.remove(self.__file(key))
+		except OSError:
+			pass
+
+	# - Functions ---------------------------
+	def get(self, key, default=None):
+		if key not in self.__index: return default
+
+		try:
+			with io.open(self.__file(key), 'r', encoding='utf-8') as cache_file:
+				value = json.load(cache_file)
+		except (IOError, OSError, ValueError):
+			self.__drop(key)
+			return default
+
+		access_time = time.time()
+		self.__index[key][1] = access_time
+		os.utime(self.__file(key), (access_time, access_time))
+		
+		return value
+
+	def set(self, key, value):
+		data = json.dumps(value, separators=(',', ':'))
+		file_path = self.__file(key)
+		if not os.path.isdir(os.path.dirname(file_path)): os.makedirs(os.path.dirname(file_path))
+		
+		with open(file_path, 'w') as cache_file:
+			cache_file.write(data)
+
+		if key in self.__index: self.__size -= self.__index[key][0]
+		self.__index[key] = [len(data), time.time()]
+		self.__size += len(data)
+		self.evict()
+
+	def evict(self):
+		if len(self.__index) <= self.max_entries and self.__size <= self.max_bytes: return
+
+		for key in sorted(self.__index, key=lambda key: self.__index[key][1]):
+			if len(self.__index) <= self.max_entries and self.__size <= self.max_bytes: break
+			self.__drop(key)
+
+	def clear(self):
+		for key in list(self.__index):
+			self.__drop(key)
+
+class ScanlineSampler(object):
+	'''Sweep-line (scanline) sampler: finds all crossings of horizontal probes
+	with a set of line and cubic bezier segments in a single pass.
+
+	Segments are split into y-monotonic pieces, sorted by their lower y-extent
+	and swept bottom to top, keeping an active edge list, so that every probe
+	is tested only against the pieces spanning it. Monotonic splits of curves
+	are cached by control points, as the same outlines are resampled frequently.
+
+	Constructor:
+		ScanlineSampler(cache_size=10000)
+
+	Methods:
+		.monotonic(segment): Split segment (tuple of 2 or 4 (x, y) tuples) to y-monotonic pieces
+		.crossings(segments, probes): List of (y, [x crossings]) for sorted probes
+		.extremes(segments, probes): List of (y, min_x, max_x, crossings_count) for probes with crossings
+	'''
+	def __init__(self, cache_size=10000):
+		self.cache = {}
+		self.cache_size = cache_size
+		self.tolerance = 1e-7
+		self.iterations = 30
+
+	def __repr__(self):
+		return '<{}: Cached={}>'.format(self.__class__.__name__, len(self.cache))
+
+	# - Internals ---------------------------
+	@staticmethod
+	def __coeffs(p0, p1, p2, p3):
+		'''Power basis coefficients (a, b, c, d) of a cubic bezier component'''
+		return (-p0 + 3*p1 - 3*p2 + p3, 3*p0 - 6*p1 + 3*p2, -3*p0 + 3*p1, p0)
+
+	def __split_curve(self, segment):
+		(x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment
+		cx = self.__coeffs(x0, x1, x2, x3)
+		cy = self.__coeffs(y0, y1, y2, y3)
+		ay, by, cy1 = cy[:3]
+
+		# - Roots of y'(t) = 3ay*t^2 + 2by*t + cy inside (0, 1)
+		times = [0.]
+		qa, qb, qc = 3*ay, 2*by, cy1
+
+		if abs(qa) > 1e-12:
+			discriminant = qb*qb - 4*qa*qc
+
+			if discriminant > 0:
+				sd = discriminant**.5
+				times += sorted(t for t in ((-qb - sd)/(2*qa), (-qb + sd)/(2*qa)) if 0. < t < 1.)
+
+		elif abs(qb) > 1e-12:
+			t = -qc/qb
+			if 0. < t < 1.: times.append(t)
+
+		times.append(1.)
+
+		pieces = []
+		for t0, t1 in zip(times[:-1], times[1:]):
+			y_t0 = ((cy[0]*t0 + cy[1])*t0 + cy[2])*t0 + cy[3]
+			y_t1 = ((cy[0]*t1 + cy[1])*t1 + cy[2])*t1 + cy[3]
+
+			if y_t0 == y_t1: continue # Horizontal piece: crossings are given by its neighbours
+
+			if y_t0 < y_t1:
+				pieces.append((y_t0, y_t1, 1, (cx, cy, t0, t1)))
+			else:
+				pieces.append((y_t1, y_t0, 1, (cx, cy, t1, t0)))
+
+		return pieces
+
+	def __solve_curve(self, piece_data, y):
+		'''Safeguarded Newton solve of y(t) = y on a monotonic piece, returns x(t).
+		Time lo always maps to the lower y of the piece.'''
+		(ax, bx, cx, dx), (ay, by, cy, dy), lo, hi = piece_data
+		tolerance = self.tolerance
+
+		# - Initial guess by linear interpolation of the piece ends
+		y_lo = ((ay*lo + by)*lo + cy)*lo + dy
+		y_hi = ((ay*hi + by)*hi + cy)*hi + dy
+		t = lo + (hi - lo)*(y - y_lo)/(y_hi - y_lo)
+
+		for i in range(self.iterations):
+			f = ((ay*t + by)*t + cy)*t + dy - y
+			if abs(f) < tolerance: break
+
+			# - Shrink bracket
+			if f < 0: lo = t
+			else: hi = t
+
+			df = (3*ay*t + 2*by)*t + cy
+			t_new = t - f/df if df != 0 else .5*(lo + hi)
+
+			# - Fall back to bisection if Newton leaves the bracket
+			if not (min(lo, hi) < t_new < max(lo, hi)):
+				t_new = .5*(lo + hi)
+
+			t = t_new
+
+		return ((ax*t + bx)*t + cx)*t + dx
+
+	# - Functions ---------------------------
+	def monotonic(self, segment):
+		'''Split segment to y-monotonic pieces: list of (y_min, y_max, kind, data)'''
+		if len(segment) == 2:
+			(x0, y0), (x1, y1) = segment
+			if y0 == y1: return []
+			if y0 > y1: x0, y0, x1, y1 = x1, y1, x0, y0
+			return [(y0, y1, 0, (x0, y0, (x1 - x0)/(y1 - y0)))]
+
+		if len(segment) == 4:
+			key = tuple(segment)
+			pieces = self.cache.get(key)
+
+			if pieces is None:
+				if len(self.cache) >= self.cache_size: self.cache.clear()
+				pieces = self.cache[key] = self.__split_curve(segment)
+
+			return pieces
+
+		raise NotImplementedError('ERROR:\tUnsupported segment with {} points'.format(len(segment)))
+
+	def crossings(self, segments, probes):
+		'''Sweep probes (y values) over segments. Returns list of (y, [x crossings]) in ascending y order'''
+		pieces = sorted((piece for segment in segments for piece in self.monotonic(segment)), key=lambda piece: piece[0])
+		result = []
+		active = []
+		next_piece, piece_count = 0, len(pieces)
+
+		for y in sorted(probes):
+			# - Enter pieces starting below probe, leave pieces ending below it
+			while next_piece < piece_count and pieces[next_piece][0] <= y:
+				active.append(pieces[next_piece])
+				next_piece += 1
+
+			active = [piece for piece in active if piece[1] >= y]
+			probe_x = []
+
+			for y_min, y_max, kind, data in active:
+				if kind == 0:
+					x0, y0, slope = data
+					probe_x.append(x0 + (y - y0)*slope)
+				else:
+					probe_x.append(self.__solve_curve(data, y))
+
+			result.append((y, probe_x))
+
+		return result
+
+	def extremes(self, segments, probes):
+		'''Leftmost and rightmost crossings: list of (y, min_x, max_x, crossings_count)'''
+		return [(y, min(probe_x), max(probe_x), len(probe_x)) for y, probe_x in self.crossings(segments, probes) if len(probe_x)]
+
+
+# - Test ----------------------------
+if __name__ == '__main__':
+	import time
+	from typerig.core.objects.contour import Contour
+	from typerig.core.objects.node import Node
+
+	test = [Node(200.0, 280.0, type='on'),
+			Node(760.0, 280.0, type='on'),
+			Node(804.0, 280.0, type='curve'),
+			Node(840.0, 316.0, type='curve'),
+			Node(840.0, 360.0, type='on'),
+			Node(840.0, 600.0, type='on'),
+			Node(840.0, 644.0, type='curve'),
+			Node(804.0, 680.0, type='curve'),
+			Node(760.0, 680.0, type='on'),
+			Node(200.0, 680.0, type='on'),
+			Node(156.0, 680.0, type='curve'),
+			Node(120.0, 644.0, type='curve'),
+			Node(120.0, 600.0, type='on'),
+			Node(120.0, 360.0, type='on'),
+			Node(120.0, 316.0, type='curve'),
+			Node(156.0, 280.0, type='curve')]
+
+	segments = [segment.tuple for segment in Contour(test, closed=True).segments]
+	probes = list(range(-200, 1000, 5))
+	sampler = ScanlineSampler()
+	print(sampler.extremes(segments, [300, 500, 679]))
+	print(shoelace_areas([[(0, 0), (100, 0), (100, 100), (0, 100)], [(0, 0), (10, 0)], [n.tuple for n in test]]))
+
+	# - Benchmark: Sweep vs. probe x segment intersection (as in proxy GlyphSampler before v0.3.0)
+	from typerig.core.objects.line import Line
+	contour_segments = Contour(test, closed=True).segments
+
+	start = time.time()
+	for i in range(10): sampler.extremes(segments, probes)
+	print('Sweep: {:.4f}s; {}'.format(time.time() - start, sampler))
+
+	start = time.time()
+	for i in range(10):
+		for y in probes:
+			probe = Line((0, y), (1000, y))
+			[segment & probe for segment in contour_segments]
+	print('Probe x segment: {:.4f}s'.format(time.time() - start))
+
+	# - Batch: font wide side-bearings
+	tasks = [(('glyph_{}'.format(gid), 'Regular'), segments, 480.) for gid in range(200)]
+	report = lambda done, total: print('Progress: {}/{}'.format(done, total)) if done % 100 == 0 else None
+	
+	start = time.time()
+	font_sb = batch_sidebearings(tasks, probes, (-200, 1000), 0.5, (100, 10000), 0, processes=2, progress=report)
+	print('Batch: {:.4f}s; {}'.format(time.time() - start, font_sb[('glyph_0', 'Regular')]))
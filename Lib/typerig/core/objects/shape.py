@@ -10,16 +10,18 @@
 
 # - Dependencies ------------------------
 from __future__ import absolute_import, print_function, division
+import json
+import xml.etree.ElementTree as ET
 
 from typerig.core.objects.point import Point
-from typerig.core.objects.transform import Transform
+from typerig.core.objects.transform import Transform, identity
 from typerig.core.objects.utils import Bounds
 
-from typerig.core.objects.atom import Container
+from typerig.core.objects.atom import Container, memoized
 from typerig.core.objects.contour import Contour
 
 # - Init -------------------------------
-__version__ = '0.1.6'
+__version__ = '0.1.9'
 
 # - Classes -----------------------------
 class Shape(Container):
@@ -29,7 +31,7 @@ class Shape(Container):
 		factory = kwargs.pop('default_factory', Contour)
 		super(Shape, self).__init__(data, default_factory=factory, **kwargs)
 		
-		self.transform = kwargs.pop('transform', Transform())
+		self.transform = kwargs.pop('transform', identity)
 
 		# - Metadata
 		if not kwargs.pop('proxy', False): # Initialize in proxy mode
@@ -70,15 +72,24 @@ class Shape(Container):
 		return selection
 	
 	@property
-	def bounds(self):
+	@memoized
+	def _box(self):
 		assert len(self.data) > 0, 'Cannot return bounds for <{}> with length {}'.format(self.__class__.__name__, len(self.data))
-		contour_bounds = [contour.bounds for contour in self.data]
-		bounds = sum([[(bound.x, bound.y), (bound.xmax, bound.ymax)] for bound in contour_bounds],[])
-		return Bounds(bounds)
+		bounds = Bounds(sum([list(contour._box) for contour in self.data], []))
+		return ((bounds.x, bounds.y), (bounds.xmax, bounds.ymax))
+
+	@property
+	def bounds(self):
+		return Bounds(list(self._box))
+
+	@property
+	@memoized
+	def _point_tuples(self):
+		return tuple(node.tuple for node in self.nodes)
 
 	@property
 	def point_array(self):
-		return PointArray([node.point for node in self.nodes])
+		return PointArray(self._point_tuples)
 
 	@point_array.setter
 	def point_array(self, other):
@@ -154,19 +165,41 @@ class Shape(Container):
 
 	# -- IO Format ------------------------------
 	def to_VFJ(self):
-		raise NotImplementedError
+		shape_data = {'elementData': {'contours': [contour.to_VFJ() for contour in self.contours]}}
+		if self.name: shape_data['name'] = self.name
+		if self.identifier is not None: shape_data['identifier'] = self.identifier
+		if self.transform != identity: shape_data['transform'] = list(self.transform)
+		
+		return shape_data
 
 	@staticmethod
-	def from_VFJ(string):
-		raise NotImplementedError
+	def from_VFJ(data):
+		if not isinstance(data, dict): data = json.loads(data)
+		element_data = data.get('elementData', {})
+
+		return Shape([Contour.from_VFJ(contour_data) for contour_data in element_data.get('contours', [])],
+						name=data.get('name', ''),
+						identifier=data.get('identifier', None),
+						transform=Transform(*data['transform']) if 'transform' in data else identity)
 
-	@staticmethod
 	def to_XML(self):
-		raise NotImplementedError
+		element = ET.Element('shape')
+		if self.name: element.set('name', self.name)
+		if self.identifier is not None: element.set('identifier', str(self.identifier))
+		if self.transform != identity: element.set('transform', ' '.join(map(repr, self.transform)))
+		element.extend([contour.to_XML() for contour in self.contours])
+		
+		return element
 
 	@staticmethod
-	def from_XML(string):
-		raise NotImplementedError
+	def from_XML(element):
+		if not ET.iselement(element): element = ET.fromstring(element)
+		transform = element.get('transform')
+
+		return Shape([Contour.from_XML(child) for child in element],
+						name=element.get('name', ''),
+						identifier=element.get('identifier', None),
+						transform=Transform(*map(float, transform.split())) if transform is not None else identity)
 
 
 if __name__ == '__main__':
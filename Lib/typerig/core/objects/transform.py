@@ -14,14 +14,22 @@ from __future__ import absolute_import, print_function, division
 import math
 
 # - Init -------------------------------
-__version__ = '0.26.3'
+__version__ = '0.26.4'
 
 # - Objects ----------------------------------------------------
 # -- Affine transformations ------------------------------------
 class Transform(object):
-	'''Affine transformations (Object)'''
+	'''Affine transformations (Object). Immutable: all operations return a new Transform.'''
+	__slots__ = ('__affine',)
+
 	def __init__(self, xx=1.0, xy=0.0, yx=0.0, yy=1.0, dx=0.0, dy=0.0):
-		self.__affine = list(map(float, (xx, xy, yx, yy, dx, dy)))
+		self.__affine = tuple(map(float, (xx, xy, yx, yy, dx, dy)))
+
+	def __copy__(self):
+		return self
+
+	def __deepcopy__(self, memo):
+		return self
 
 	def __normSinCos(self, v):
 		EPSILON = 1e-15
@@ -101,10 +109,11 @@ class Transform(object):
 	def __getslice__(self, i, j):
 		return self.__affine[i:j]
 
-	def __cmp__(self, other):
-		xx1, xy1, yx1, yy1, dx1, dy1 = list(map(float(self.__affine)))
-		xx2, xy2, yx2, yy2, dx2, dy2 = list(map(float(other)))
-		return cmp((xx1, xy1, yx1, yy1, dx1, dy1), (xx2, xy2, yx2, yy2, dx2, dy2))
+	def __eq__(self, other):
+		return isinstance(other, self.__class__) and self.__affine == tuple(other)
+
+	def __ne__(self, other):
+		return not self.__eq__(other)
 
 	def __hash__(self):
 		return hash(self.__affine)
@@ -113,5 +122,8 @@ class Transform(object):
 		return '<%s [%s %s %s %s %s %s]>' %((self.__class__.__name__,) + tuple(map(str, self.__affine)))
 
 
+# - Shared identity transform (safe to share, as Transform is immutable)
+identity = Transform()
+
 if __name__ == '__main__':
 	pass
\ No newline at end of file
@@ -35,7 +35,7 @@ from typerig.proxy.fl.gui.widgets import getProcessGlyphs
 import typerig.proxy.fl.gui.dialogs as TRDialogs
 
 # - Init ----------------------------------------------------------------------------
-__version__ = '2.78'
+__version__ = '2.79'
 active_workspace = pWorkspace()
 
 # - Keep compatibility for basestring checks
@@ -1128,12 +1128,9 @@ class TRNodeActionCollector(object):
 					normal_line_A = Line(node_A.tuple, (normal_A + node_A.tuple).tuple).solve_length(1000,0) # Extend the resulting line to 1000 u
 					normal_line_B = Line(node_B.tuple, (normal_B + node_B.tuple).tuple).solve_length(1000,0)
 					
-					intersect_A_time, _ = curve_A.intersect_line(normal_line_B)
-					intersect_B_time, _ = curve_B.intersect_line(normal_line_A)
-					
-					# -- Cleanup and sort intersection results [[x_crossing_times], [y_crossing_times]] reduced to single list.
-					intersect_A_time = sorted(intersect_A_time[0] + intersect_A_time[1])
-					intersect_B_time = sorted([1 - t for t in intersect_B_time[0]] + intersect_B_time[1]) # !!! Reverse the time because of contour direction !!! Find a better way
+					# -- Sorted crossing times within the normal lines (curve times run from the segment start)
+					intersect_A_time = [time for line_index, time, x, y in curve_A.intersect_lines(normal_line_B)]
+					intersect_B_time = [time for line_index, time, x, y in curve_B.intersect_lines(normal_line_A)]
 					
 					# - Set flags that determine where nodes will be inserted and which of nodes A or B should be removed
 					cap_flags = (False, False)
@@ -21,10 +21,13 @@ import PythonQt as pqt
 
 from typerig.core.objects.collection import treeDict
 from typerig.core.objects.collection import extBiDict
+from typerig.core.objects.collection import vfj_decoder, vfj_encoder
+from typerig.core.fileio.vfj import VFJparser, VFJindex
+from typerig.core.fileio.trk import TRKparser
 from typerig.proxy.fl.objects.glyph import pGlyph, eGlyph
 
 # - Init ---------------------------------
-__version__ = '0.28.9'
+__version__ = '0.29.3'
 
 # - Keep compatibility for basestring checks
 try:
@@ -902,6 +905,24 @@ class pFont(object):
 
 		return save_pairs
 
+	def kerning_snapshot(self, file_path, layers=None, mark_groups='@'):
+		'''Save kerning pairs and groups to a binary kerning snapshot (.trk), see core.fileio.trk
+		Args:
+			file_path (String): Snapshot file path
+			layers (None, list(String)): Masters to save, all masters if None
+			mark_groups (String): Group mark used while dumping kerning
+
+		Returns:
+			list(String): Masters saved
+		'''
+		layers = self.masters() if layers is None else layers
+		master_data = [(layer, (self.kerning_dump(layer, mark_groups), self.kerning_groups_to_dict(layer))) for layer in layers]
+
+		with TRKparser(file_path, 'w') as writer:
+			writer.dump(master_data, mark_groups)
+
+		return layers
+
 	def kerning_groups(self, layer=None):
 		'''Return the fonts kerning groups object (fgKerningGroups) no matter the reference.'''
 		return self.kerning(layer).groups
@@ -1015,6 +1036,11 @@ class jFont(object):
 	Methods:
 		.data(): Access to VFJ font
 		.load(file_path): Load VFJ font from path
+		.iterload(file_path): Incrementally read VFJ font yielding (key, value) records
+		.iterglyphs(file_path): Incrementally read VFJ font yielding glyphs only
+		.index(file_path): Random access glyph index (sidecar) for VFJ font
+		.load_glyph(glyph_name): Load a single glyph by name using the glyph index
+		.load_glyphs(glyph_names): Load multiple glyphs by name using the glyph index
 		.save_as(file_path): Save VFJ font to path
 		.save(): Save VFJ (overwrite)
 	'''
@@ -1024,6 +1050,7 @@ class jFont(object):
 		self.data = None
 		self.source = None
 		self.path = None
+		self.glyph_index = None
 
 		if source is not None:
 			if isinstance(source, basestring):
@@ -1041,6 +1068,40 @@ class jFont(object):
 		self.path = file_path
 		return True
 
+	def iterload(self, file_path=None, stream_keys=('masters', 'glyphs')):
+		'''Incremental load: yields (key, value) records in file order, streaming 
+		the members in stream_keys one element at a time. Does not populate .data.
+		'''
+		if file_path is None: file_path = self.path
+
+		with VFJparser(file_path, stream_keys) as reader:
+			for record in reader:
+				yield record
+
+	def iterglyphs(self, file_path=None):
+		'''Incremental load: yields VFJ glyphs one at a time'''
+		for key, value in self.iterload(file_path):
+			if key == 'glyphs': yield value
+
+	def index(self, file_path=None):
+		'''Random access glyph index, rebuilt only if the VFJ file has changed'''
+		if file_path is None: file_path = self.path
+
+		if self.glyph_index is None or self.glyph_index.path != file_path:
+			self.glyph_index = VFJindex(file_path)
+		else:
+			self.glyph_index.update()
+
+		return self.glyph_index
+
+	def load_glyph(self, glyph_name, file_path=None):
+		'''Load a single glyph (by name) deserializing only its record'''
+		return self.index(file_path).glyph(glyph_name)
+
+	def load_glyphs(self, glyph_names, file_path=None):
+		'''Load multiple glyphs (by name) deserializing only their records: list in glyph_names order, KeyError for unknown names'''
+		return self.index(file_path).glyphs(glyph_names)
+
 	def save_as(self, file_path):
 		with open(file_path, 'w') as exportFile:
 			json.dump(self.data, exportFile, cls=vfj_encoder)
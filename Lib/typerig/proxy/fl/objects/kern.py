@@ -16,9 +16,10 @@ import fontgate as fgt
 import PythonQt as pqt
 
 from typerig.core.objects.collection import extBiDict
+from typerig.core.objects.kerning import group_index, KerningAnalyzer
 
 # - Init ---------------------------------
-__version__ = '0.26.6'
+__version__ = '0.27.3'
 
 # - Keep compatibility for basestring checks
 try:
@@ -36,6 +37,11 @@ class pKerning(object):
 	Attributes:
 		.fg (fgKerning): Original Fontgate Kerning object 
 		.groups (fgKerningGroups): Fontgate Group kerning object
+
+	Indexes:
+		Pair and group membership lookups are served by indexes built once on demand
+		and invalidated by the mutators of this proxy. If the fgKerning object is modified 
+		directly (outside pKerning) call .resetIndex().
 	'''
 	def __init__(self, fgKerningObject, externalGroupData=None):
 		self.fg = self.kerning = fgKerningObject
@@ -49,12 +55,77 @@ class pKerning(object):
 
 		self.__kern_group_type = {'L':'KernLeft', 'R':'KernRight', 'B': 'KernBothSide'}
 		self.__kern_pair_mode = ('glyphMode', 'groupMode')
+		self.__pair_index = None
+		self.__group_index = None
+		self.__resolver = None
 		
 		#self.groups = self.groups()
 		
 	def __repr__(self):
 		return '<%s pairs=%s groups=%s external=%s>' % (self.__class__.__name__, len(self.kerning), len(self.groups().keys()), self.useExternalGroupData)
 
+	# - Indexes ---------------------------------------------
+	def resetIndex(self, pairs=True, groups=True):
+		'''Invalidate lookup indexes, they are rebuilt on next use'''
+		if pairs: self.__pair_index = None
+		if groups: self.__group_index = None
+		self.__resolver = None
+
+	def pairIndex(self):
+		'''Pair index: {(left_name, right_name, left_mode, right_mode): value}'''
+		if self.__pair_index is None:
+			self.__pair_index = {(pair.left.id, pair.right.id, pair.left.mode, pair.right.mode): value for pair, value in self.fg.items()}
+
+		return self.__pair_index
+
+	def groupIndex(self):
+		'''Group membership index: ({glyph_name: left_group}, {glyph_name: right_group}).
+		Left and right groups take precedence over groups kerning on both sides.'''
+		if self.__group_index is None:
+			self.__group_index = group_index(self.groupsAsDict())
+
+		return self.__group_index
+
+	def resolver(self):
+		'''Flattened kerning resolver (see core.objects.kerning.KerningResolver): 
+		effective values for glyph pairs by glyph-glyph, glyph-class, class-glyph, class-class precedence'''
+		return self.analyzer()
+
+	def analyzer(self):
+		'''Kerning analyzer (see core.objects.kerning.KerningAnalyzer): redundant exceptions,
+		flat pairs and orphans. Shares the indexes of the resolver.'''
+		if self.__resolver is None:
+			pairs = {(left, right): value for (left, right, left_mode, right_mode), value in self.pairIndex().items()}
+			self.__resolver = KerningAnalyzer(pairs, self.groupsAsDict())
+
+		return self.__resolver
+
+	def getExceptions(self, delta=0, kinds=(0, 1, 2), classOnly=False):
+		'''Redundant exceptions: list((pair, value, fallback_pair, fallback_value)) within delta from their fallback.
+		kinds: pair kinds checked - 0 glyph-glyph, 1 glyph-class, 2 class-glyph; classOnly: compare with class-class pairs only.
+		Use kinds=(0,), classOnly=True for glyph-glyph exceptions of class kerning only.'''
+		return list(self.analyzer().exceptions(delta, kinds, classOnly))
+
+	def getFlats(self):
+		'''Glyph pairs that could be extended to class kerning: list((pair, value, group_pair))'''
+		return list(self.analyzer().flats())
+
+	def getOrphans(self, glyphNames):
+		'''Pairs referencing glyphs missing from glyphNames: list((pair, value, missing_names))'''
+		return list(self.analyzer().orphans(glyphNames))
+
+	def resolvePair(self, pairTuple):
+		'''Effective kern value for glyph pair (left, right), None if not kerned'''
+		return self.resolver().resolve(pairTuple)
+
+	def resolvePairs(self, pairTupleList):
+		'''Effective kern values for a list of glyph pairs'''
+		return self.resolver().resolve_pairs(pairTupleList)
+
+	def getMatrix(self, leftNames, rightNames=None):
+		'''Dense matrix of effective kern values for a glyph subset'''
+		return self.resolver().matrix(leftNames, rightNames)
+
 	# - Basic functions -------------------------------------
 	def clear(self):
 		clear_list = []
@@ -66,6 +137,20 @@ class pKerning(object):
 		for delete_pair in clear_list: # Dumb but safe...
 			self.fg.remove(delete_pair)	
 
+		self.resetIndex(groups=False)
+
+	def removePairs(self, pairTupleList):
+		'''Remove kern pairs given as (left, right) names. The pair objects stored in the
+		kerning are removed, so glyph and group modes are kept as they are (a name alone
+		does not tell a glyph from a group of the same name).'''
+		stored_pairs = {(pair.left.id, pair.right.id): pair for pair in self.fg.keys()}
+
+		for pairTuple in pairTupleList:
+			pair = stored_pairs.get(tuple(pairTuple))
+			if pair is not None: self.fg.remove(pair)
+
+		self.resetIndex(groups=False)
+
 	def groups(self):
 		if not self.useExternalGroupData:
 			return self.fg.groups
@@ -75,6 +160,7 @@ class pKerning(object):
 	def setExternalGroupData(self, externalGroupData):
 		self.external_groups = externalGroupData
 		self.useExternalGroupData = True	
+		self.resetIndex(pairs=False)
 
 	def storeExternalGroupData(self):
 		for key, value in self.useExternalGroupData.items():
@@ -83,6 +169,7 @@ class pKerning(object):
 	def resetGroups(self):
 		# - Delete all group kerning at given layer
 		self.groups().clear()	
+		self.resetIndex(pairs=False)
 
 	def asDict(self):
 		return self.fg.asDict()
@@ -114,13 +201,17 @@ class pKerning(object):
 		for key, value in groupDict.items():
 			kerning_groups[key] = value
 
+		self.resetIndex(pairs=False)
+
 	def removeGroup(self, key):
 		'''Remove a group from fonts kerning groups at given layer.'''
 		del self.groups()[key]
+		self.resetIndex(pairs=False)
 
 	def renameGroup(self, oldkey, newkey):
 		'''Rename a group in fonts kerning groups at given layer.'''
 		self.groups().rename(oldkey, newkey)
+		self.resetIndex()
 
 	def addGroup(self, key, glyphNameList, type):
 		'''Adds a new group to fonts kerning groups.
@@ -134,123 +225,69 @@ class pKerning(object):
 			None
 		'''
 		self.groups()[key] = (glyphNameList, self.__kern_group_type[type.upper()])
+		self.resetIndex(pairs=False)
 
 	def getPairGroups(self, pairTuple):
-		left_in_group = None
-		right_in_group = None
 		left, right = pairTuple
-		layer_groups = self.groupsBiDict()
-
-		try:
-			left_in_group = layer_groups['KernLeft'].inverse[left][0]
-		except KeyError:
-			try:
-				left_in_group = layer_groups['KernBothSide'].inverse[left][0]
-			except KeyError:
-				left_in_group = left
-
-		try:
-			right_in_group = layer_groups['KernRight'].inverse[right][0]
-		except KeyError:
-			try:
-				right_in_group = layer_groups['KernBothSide'].inverse[right][0]
-			except KeyError:
-				right_in_group = right
-
-		return (left_in_group, right_in_group)
+		left_index, right_index = self.groupIndex()
+
+		return (left_index.get(left, left), right_index.get(right, right))
 
 	def setPair(self, pairTuple, modeTuple=(0,0)):
 		pair, value = pairTuple
 		left, right = pair
 		modeLeft, modeRight = modeTuple
-		groupsBiDict = self.groupsBiDict()
-
-		if modeLeft:
-			if len(groupsBiDict.keys()):
-				if left in groupsBiDict['KernLeft'].inverse:
-					left = groupsBiDict['KernLeft'].inverse[left][0]
-
-				elif left in groupsBiDict['KernBothSide'].inverse:
-					left = groupsBiDict['KernBothSide'].inverse[left][0]
+		left_index, right_index = self.groupIndex()
 
-		if modeRight:
-			if right in groupsBiDict['KernRight'].inverse:
-				right = groupsBiDict['KernRight'].inverse[right][0]
-
-			elif right in groupsBiDict['KernBothSide'].inverse:
-				right = groupsBiDict['KernBothSide'].inverse[right][0]
+		if modeLeft: left = left_index.get(left, left)
+		if modeRight: right = right_index.get(right, right)
 		
 		self.fg[left, right] = value
+		self.resetIndex(groups=False)
 	
 	def setPairs(self, pairTupleList, extend=False):
 		modeLeft, modeRight = (1,1) if extend else (0,0)
-		groupsBiDict = self.groupsBiDict()
+		left_index, right_index = self.groupIndex()
 
 		for pairTuple in pairTupleList:
 			pair, value = pairTuple
 			left, right = pair
 			
-			if modeLeft:
-				if len(groupsBiDict.keys()):
-					if left in groupsBiDict['KernLeft'].inverse:
-						left = groupsBiDict['KernLeft'].inverse[left][0]
-
-					elif left in groupsBiDict['KernBothSide'].inverse:
-						left = groupsBiDict['KernBothSide'].inverse[left][0]
-
-			if modeRight:
-				if right in groupsBiDict['KernRight'].inverse:
-					right = groupsBiDict['KernRight'].inverse[right][0]
-
-				elif right in groupsBiDict['KernBothSide'].inverse:
-					right = groupsBiDict['KernBothSide'].inverse[right][0]
+			if modeLeft: left = left_index.get(left, left)
+			if modeRight: right = right_index.get(right, right)
 			
 			self.fg[left, right] = value	
 
-	def getPairObject(self, pairTuple):
-		left, right = pairTuple
-		modeLeft, modeRight = 0, 0
-		groupsBiDict = self.groupsBiDict()
-		
-		if len(groupsBiDict.keys()):
-			if left in groupsBiDict['KernLeft'].inverse:
-				left = groupsBiDict['KernLeft'].inverse[left]
-				modeLeft = 1
+		self.resetIndex(groups=False)
 
-			elif left in groupsBiDict['KernBothSide'].inverse:
-				left = groupsBiDict['KernBothSide'].inverse[left]
-				modeLeft = 1
-
-			if right in groupsBiDict['KernRight'].inverse:
-				right = groupsBiDict['KernRight'].inverse[right]
-				modeRight = 1
+	def __resolvePair(self, pairTuple):
+		'''Resolve glyph pair to (left, right, modeLeft, modeRight) using group membership'''
+		left, right = pairTuple
+		left_index, right_index = self.groupIndex()
+		modeLeft, modeRight = int(left in left_index), int(right in right_index)
 
-			elif right in groupsBiDict['KernBothSide'].inverse:
-				right = groupsBiDict['KernBothSide'].inverse[right]
-				modeRight = 1
+		return left_index.get(left, left), right_index.get(right, right), modeLeft, modeRight
 
-		
-		return self.newPair(left[0], right[0], modeLeft, modeRight)
+	def getPairObject(self, pairTuple):
+		return self.newPair(*self.__resolvePair(pairTuple))
 
 	def getPair(self, pairTuple):
-		pairObject = self.getPairObject(pairTuple)
-		kern_pairs = self.fg.keys()
+		left, right, modeLeft, modeRight = self.__resolvePair(pairTuple)
+		pair_key = (left, right, self.__kern_pair_mode[modeLeft], self.__kern_pair_mode[modeRight])
+		pair_index = self.pairIndex()
 
-		if pairObject in kern_pairs:
-			return (pairObject, self.fg[kern_pairs.index(pairObject)])
+		if pair_key in pair_index:
+			return (self.newPair(left, right, modeLeft, modeRight), pair_index[pair_key])
 
 	def getKerningForLeaders(self, transformLeft=None, transformRight=None):
 		''' Now in FL6 we do not have leaders, but this returns the first glyph name in the group '''
 		# !!! TODO: Add sorting for unicode to get more meaningful results - for instance i want to get /O as group leader not /Odieresis
-		kerning_data = self.fg.items()
+		kerning_groups = self.groups()
 		return_data = []
 
-		for kern_pair, kern_value in kerning_data:
-			left_name, right_name = kern_pair.left.id, kern_pair.right.id
-			left_mode, right_mode = kern_pair.left.mode, kern_pair.right.mode
-
-			left_leader = left_name if left_mode == self.__kern_pair_mode[0] else self.groups()[left_name][0][0]
-			right_leader = right_name if right_mode == self.__kern_pair_mode[0] else self.groups()[right_name][0][0]
+		for (left_name, right_name, left_mode, right_mode), kern_value in self.pairIndex().items():
+			left_leader = left_name if left_mode == self.__kern_pair_mode[0] else kerning_groups[left_name][0][0]
+			right_leader = right_name if right_mode == self.__kern_pair_mode[0] else kerning_groups[right_name][0][0]
 
 			left_leader = left_leader if transformLeft is None else transformLeft(left_leader)
 			right_leader = right_leader if transformRight is None else transformRight(right_leader)
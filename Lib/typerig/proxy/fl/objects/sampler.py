@@ -14,12 +14,15 @@ import fontlab as fl6
 import fontgate as fgt
 import PythonQt as pqt
 
-from typerig.core.objects.point import Point, Void
+from typerig.core.objects.point import Point
 from typerig.proxy.fl.objects.base import Line, Curve
 from typerig.core.func.math import linspread
+from typerig.core.objects.sampler import ScanlineSampler, shoelace_area, shoelace_areas
+from typerig.core.objects.sampler import band_pass, close_poly, area_sidebearings, batch_sidebearings
+from typerig.core.objects.sampler import sample_outline, sample_key, SampleCache
 
 # - Init -----------------------------
-__version__ = '0.2.4'
+__version__ = '0.3.4'
 
 # - Keep compatibility for basestring checks
 try:
@@ -48,6 +51,8 @@ class GlyphSampler(object):
 
 		.margin_growth (int): Grow margin outside the glyph BBoX
 		.cutout_x, .cutout_y: Cutout values defining how deep (x) or hight (y) the probing is done
+		.scanline (ScanlineSampler): Sweep-line engine, keeps cache of monotonic curve splits
+		.sample_cache (SampleCache): Persistent cache keyed by outline and sampler parameters, None if disabled (see .setCache)
 
 	Methods:
 		...
@@ -62,6 +67,8 @@ class GlyphSampler(object):
 		
 		self.data_samples = {}
 		self.data_area = {}
+		self.scanline = ScanlineSampler()
+		self.sample_cache = None
 		
 		self.use_quantizer = False
 		self.margin_growth = 0
@@ -85,46 +92,30 @@ class GlyphSampler(object):
 	def getRange(self, quantized=False):
 		return self.sample_quantas if quantized else self.sample_range
 
+	# - Cache -------------------------
+	def setCache(self, cache_path=None, max_entries=100000, max_bytes=256*1024**2):
+		'''Enable persistent sample cache at cache_path, disable if None'''
+		self.sample_cache = SampleCache(cache_path, max_entries, max_bytes) if cache_path is not None else None
+
+	def getCacheKey(self, layer_segments, mid_x):
+		'''Content address of a layer outline together with all parameters that affect sampling'''
+		sampler_params = [self.sample_window, self.sample_frequency, self.cutout_x, self.cutout_y, self.use_quantizer, self.margin_growth]
+		return sample_key(layer_segments, mid_x, sampler_params)
+
 	# - Filters -----------------------
 	@staticmethod   
 	def filterBandPass(point_list, cutout_depth=(10000, 10000), in_reverse=False):
-		min_x, max_x, min_y, max_y = GlyphSampler.getBounds(point_list)
-		cutout_depth_x, cutout_depth_y = cutout_depth
-		return_list = []
-
-		cutout_value_x = [min_x, max_x][in_reverse] + cutout_depth_x*[1, -1][in_reverse]
-		cutout_value_y = [min_y, max_y][in_reverse] + cutout_depth_y*[1, -1][in_reverse]
-		
-		for p in point_list:
-			px, py = p.tuple
-			if [px > cutout_value_x, px < cutout_value_x][in_reverse]: px = cutout_value_x
-			if [py > cutout_value_y, py < cutout_value_y][in_reverse]: py = cutout_value_y
-
-			return_list.append(Point(px, py))
-
-		return return_list
+		return [Point(x, y) for x, y in band_pass([p.tuple for p in point_list], cutout_depth, in_reverse)]
 
 	@staticmethod
 	def filterClosePoly(point_list, in_reverse=False, grow_value=0):
-		min_x, max_x, min_y, max_y = GlyphSampler.getBounds(point_list)
-		x = min_x - grow_value if not in_reverse else max_x + grow_value
-
-		point_list.insert(0, Point(x, min_y))
-		point_list.append(Point(x, max_y))
-
+		point_list[:] = [Point(x, y) for x, y in close_poly([p.tuple for p in point_list], in_reverse, grow_value)]
 		return point_list
 
 	# - Getters ---------------------------------
 	@staticmethod
 	def getArea(point_list):
-		corners = len(point_list) 
-		area = 0.0
-		
-		for i in range(corners):
-			j = (i + 1) % corners
-			area += abs(point_list[i].x*point_list[j].y - point_list[j].x*point_list[i].y)
-
-		return area*0.5
+		return shoelace_area(point_list)
 
 	@staticmethod
 	def getBounds(point_list):
@@ -143,73 +134,71 @@ class GlyphSampler(object):
 
 	# - Glyph sampling ------------------------------------ 
 	@staticmethod
-	def getSamples(glyph, layer, sampling_range):
-		layer_bounds = glyph.getBounds(layer)
-		layer_contours = glyph.contours(layer)
+	def getSegments(glyph, layer):
+		'''Layer outline as list of segments: tuples of 2 (line) or 4 (curve) (x, y) tuples'''
+		layer_segments = []
 
-		min_x = int(layer_bounds.x()) #- delta
-		max_x = int(layer_bounds.width() + min_x)  
-		mid_x = (min_x + max_x)*0.5
-		
-		max_x += 100 # Boundary error compensation?! TO FIX! Presumable problem with Line().hasPoint()
-		
-		min_y = int(layer_bounds.y())
-		max_y = int(layer_bounds.height() + min_y)
-
-		ipoi_left, ipoi_right = [], [] # Intersections points of interest
+		for contour in glyph.contours(layer):
+			for segment in contour.segments():
+				if segment.countPoints == 2:
+					layer_segments.append(Line(segment).tuple)
+				elif segment.countPoints == 4:
+					layer_segments.append(Curve(segment).tuple)
 
-		probe_list = [Line((min_x, y), (max_x, y)) for y in sampling_range if min_y <= y <= max_y] # Create all horizontal slicing lines (proves)
-		prepare_segments = sum([contour.segments() for contour in layer_contours],[])
-		tr_segments = []
+		return layer_segments
 
-		for segment in prepare_segments:
-			if segment.countPoints == 2:
-				temp_tr_segment = Line(segment)
-			elif segment.countPoints == 4:
-				temp_tr_segment = Curve(segment)
+	@staticmethod
+	def getSamples(glyph, layer, sampling_range, scanline=None):
+		'''Leftmost and rightmost outline crossings of all horizontal probes in sampling_range, found in a single sweep'''
+		if scanline is None: scanline = ScanlineSampler()
 
-			tr_segments.append(temp_tr_segment)
+		layer_bounds = glyph.getBounds(layer)
+		min_x = int(layer_bounds.x())
+		max_x = int(layer_bounds.width() + min_x)  
+		mid_x = (min_x + max_x)*0.5
 
-		for probe in probe_list:
-			temp_probe_poi = []
+		ipoi_left, ipoi_right = [], [] # Intersections points of interest
 
-			for tr_segment in tr_segments:
-				intersection = tr_segment & probe
+		for y, left_x, right_x, count in scanline.extremes(GlyphSampler.getSegments(glyph, layer), sampling_range):
+			if count >= 2:
+				ipoi_left.append(Point(left_x, y))
+				ipoi_right.append(Point(right_x, y))
 
-				if len(intersection) and not isinstance(intersection, Void):
-					if isinstance(intersection, list):
-						temp_probe_poi += intersection
-					else:
-						temp_probe_poi.append(intersection)
-			
-			if len(temp_probe_poi) >= 2:
-				ipoi_left.append(min(temp_probe_poi, key= lambda p: p.x))
-				ipoi_right.append(max(temp_probe_poi, key= lambda p: p.x))
-			
-			elif len(temp_probe_poi) == 1: # Single intersection fix
-				qpoi = temp_probe_poi[0]   # Questionable poi
-				if qpoi.x < mid_x: 
-					ipoi_left.append(qpoi)
+			else: # Single intersection fix
+				if left_x < mid_x: 
+					ipoi_left.append(Point(left_x, y))
 				else:
-					ipoi_right.append(qpoi)
+					ipoi_right.append(Point(right_x, y))
 
 		return ipoi_left, ipoi_right
 
+	@staticmethod
+	def exportOutline(glyph, layer):
+		'''Layer outline as plain data: (segments, mid_x)'''
+		layer_bounds = glyph.getBounds(layer)
+		min_x = int(layer_bounds.x())
+		max_x = int(layer_bounds.width() + min_x)
+
+		return GlyphSampler.getSegments(glyph, layer), (min_x + max_x)*0.5
+
 	def sampleGlyph(self, glyph, layer=None, cache_data=True):
 		# - Get initial data
 		layer_data = {}
 		layer_name = layer if layer is not None else glyph.layer(layer).name
-		sample_left, sample_right = self.getSamples(glyph, layer, self.getRange(self.use_quantizer))
-		
-		# - Process samples
-		sample_left = GlyphSampler.filterBandPass(sample_left, (self.cutout_x, self.cutout_y), False)
-		sample_right = GlyphSampler.filterBandPass(sample_right, (self.cutout_x, self.cutout_y), True)
-		sample_mid = sample_left + list(reversed(sample_right))
+		layer_segments, mid_x = self.exportOutline(glyph, layer)
 		
-		sample_left = GlyphSampler.filterClosePoly(sample_left, False, self.margin_growth)
-		sample_right = GlyphSampler.filterClosePoly(sample_right, True, self.margin_growth)
+		# - Sample or reuse persistent cache
+		cache_key = self.getCacheKey(layer_segments, mid_x) if self.sample_cache is not None else None
+		cached = self.sample_cache.get(cache_key, {}) if cache_key is not None else {}
+		samples = cached.get('samples')
+
+		if samples is None:
+			samples = sample_outline(layer_segments, self.getRange(self.use_quantizer), mid_x, (self.cutout_x, self.cutout_y), self.margin_growth, self.scanline)
+			
+			if cache_key is not None:
+				self.sample_cache.set(cache_key, {'samples': samples, 'areas': shoelace_areas(samples)})
 
-		layer_data[layer_name] = (sample_left, sample_mid, sample_right)
+		layer_data[layer_name] = tuple([Point(x, y) for x, y in polygon] for polygon in samples)
 
 		# - Cache
 		if cache_data: self.data_samples.setdefault(glyph.name, {}).update(layer_data)
@@ -221,24 +210,17 @@ class GlyphSampler(object):
 		layer_name = layer if layer is not None else glyph.layer(layer).name
 		layer_area = {}
 		
-		if self.data_samples.has_key(glyph_name) and not resample:
-			if self.data_samples[glyph_name].has_key(layer_name):
+		# - In memory samples are not validated against outline changes, the persistent cache is
+		if glyph_name in self.data_samples and not resample and self.sample_cache is None:
+			if layer_name in self.data_samples[glyph_name]:
 				layer_data = self.data_samples[glyph_name][layer_name]
 			else:
 				layer_data = self.sampleGlyph(glyph, layer_name, True)
 		else:
 			layer_data = self.sampleGlyph(glyph, layer_name, True)
 
-		left, mid, right = layer_data
-		contour_left =  GlyphSampler.getContour(left, True)
-		contour_mid =   GlyphSampler.getContour(mid, True)
-		contour_right = GlyphSampler.getContour(right, True)
-
-		area_left = abs(contour_left.area())
-		area_mid = abs(contour_mid.area())
-		area_right = abs(contour_right.area())
-
-		layer_area[layer_name] = (area_left, area_mid, area_right)
+		# - Headless: areas are computed directly on the sample polygons
+		layer_area[layer_name] = tuple(shoelace_areas(layer_data))
 
 		if cache_data: self.data_area.setdefault(glyph_name, {}).update(layer_area)
 
@@ -250,7 +232,7 @@ class GlyphSampler(object):
 		layer_name = layer if layer is not None else glyph.layer(layer).name
 		mask_layer_name = self._mask_layer_prefix + layer_name + self._mask_layer_suffix
 		
-		if self.data_samples.has_key(glyph_name) and self.data_samples[glyph_name].has_key(layer_name):
+		if glyph_name in self.data_samples and layer_name in self.data_samples[glyph_name]:
 			
 			if glyph.hasLayer(mask_layer_name):
 				mask_layer = glyph.layer(mask_layer_name)
@@ -291,6 +273,9 @@ class MetricSampler(GlyphSampler):
 
 	Methods:
 		.getGlyphSB(glyph (pGlyph), layer (Str), area_mult (Float), resample (Bool), draw (Bool))
+		.exportOutlines(glyphs (list[pGlyph]), layers (list[Str]))
+		.getFontSB(glyphs (list[pGlyph]), layers (list[Str]), area_mult (Float), processes (Int), progress (callable), cancel (callable))
+		.setFontSB(font_sb (dict), glyphs (list[pGlyph]), mode (Str))
 	'''
 
 	def __init__(self, p_font_object):
@@ -311,23 +296,16 @@ class MetricSampler(GlyphSampler):
 	# - Modular/static -----------------------
 	@staticmethod
 	def getSB(area_tuple, area_mult, sample_window, x_height, font_upm):
-		left, mid, right = area_tuple
-
-		window_height = max(sample_window) - min(sample_window) 
-		mid_prop = mid*area_mult
-
-		lsb = (mid_prop - abs(left))/window_height
-		rsb = (mid_prop - abs(right))/window_height
-
-		return lsb, rsb
+		return area_sidebearings(area_tuple, area_mult, sample_window)
 
 	# - Dynamic --------------------------------
 	def getGlyphSB(self, glyph, layer=None, area_mult=0.5, resample=False, draw=False):
 		glyph_name = glyph.name
 
-		try:
+		# - With a sample cache the outline is always validated (see sampleGlyphArea)
+		if self.sample_cache is None and glyph_name in self.data_area and layer in self.data_area[glyph_name]:
 			glyph_areas = self.data_area[glyph_name][layer]
-		except KeyError:
+		else:
 			glyph_areas = self.sampleGlyphArea(glyph, layer, resample, True)
 
 		if draw: self.drawGlyphArea(glyph, layer)
@@ -338,6 +316,80 @@ class MetricSampler(GlyphSampler):
 		
 		return MetricSampler.getSB(glyph_areas, area_mult, glyph_window, glyph_x_height, glyph_upm)
 
+	# - Batch ----------------------------------
+	def exportOutlines(self, glyphs, layers=None):
+		'''Export every glyph/layer outline once as plain data for headless processing.
+		Returns list of ((glyph_name, layer_name), segments, mid_x); empty layers are skipped.
+		'''
+		if layers is None: layers = self.font.masters()
+		outlines = []
+
+		for glyph in glyphs:
+			for layer in layers:
+				if glyph.layer(layer) is None: continue
+				layer_segments, mid_x = self.exportOutline(glyph, layer)
+				if not len(layer_segments): continue
+				
+				outlines.append(((glyph.name, layer), layer_segments, mid_x))
+
+		return outlines
+
+	def getFontSB(self, glyphs=None, layers=None, area_mult=0.5, processes=None, progress=None, cancel=None):
+		'''Font wide side-bearings: samples all glyphs x layers in a process pool (see core.objects.sampler.batch_sidebearings).
+		Note: Inside FontLab point multiprocessing.set_executable() to a standalone Python or use processes=0.
+		
+		Returns:
+			dict {glyph_name: {layer_name: (lsb, rsb)}}: Partial if cancelled
+		'''
+		if glyphs is None: glyphs = self.font.pGlyphs()
+		outlines = self.exportOutlines(glyphs, layers)
+		results = {}
+
+		# - Resample only outlines missing from the persistent cache
+		if self.sample_cache is not None:
+			outline_keys = {outline[0]: self.getCacheKey(*outline[1:]) for outline in outlines}
+			missing = []
+
+			for outline in outlines:
+				cached = self.sample_cache.get(outline_keys[outline[0]])
+				
+				if cached is not None:
+					results[outline[0]] = (tuple(cached['areas']), area_sidebearings(cached['areas'], area_mult, self.sample_window))
+				else:
+					missing.append(outline)
+
+			outlines = missing
+
+		new_results = batch_sidebearings(outlines, self.getRange(self.use_quantizer), self.sample_window, area_mult, (self.cutout_x, self.cutout_y), self.margin_growth, processes, progress, cancel)
+		results.update(new_results)
+
+		if self.sample_cache is not None:
+			for key, (areas, sidebearings) in new_results.items():
+				self.sample_cache.set(outline_keys[key], {'areas': list(areas)})
+
+		font_sb = {}
+
+		for (glyph_name, layer_name), (areas, sidebearings) in results.items():
+			self.data_area.setdefault(glyph_name, {})[layer_name] = areas
+			font_sb.setdefault(glyph_name, {})[layer_name] = sidebearings
+
+		return font_sb
+
+	def setFontSB(self, font_sb, glyphs=None, mode='bth'):
+		'''Write side-bearings from getFontSB back to the font with a single font update. Mode: 'lsb', 'rsb' or 'bth' (both)'''
+		if glyphs is None: glyphs = self.font.pGlyphs()
+		glyph_lookup = {glyph.name: glyph for glyph in glyphs}
+
+		for glyph_name, layer_sb in font_sb.items():
+			glyph = glyph_lookup.get(glyph_name)
+			if glyph is None: continue
+
+			for layer_name, (lsb, rsb) in layer_sb.items():
+				if mode != 'rsb': glyph.setLSB(int(lsb), layer_name)
+				if mode != 'lsb': glyph.setRSB(int(rsb), layer_name)
+
+		self.font.updateObject(self.font.fl, 'Set Metrics for {} glyphs @ {}.'.format(len(font_sb), '; '.join(self.font.masters())))
+
 
 # - Test ----------------------
 if __name__ == '__main__':
@@ -11,13 +11,13 @@
 from __future__ import absolute_import, print_function
 import os, warnings
 
-from functools import reduce
-
 import fontlab as fl6
 import fontgate as fgt
 
 from typerig.proxy.fl.objects.font import pFont
 from typerig.proxy.fl.objects.kern import pKerning
+from typerig.core.fileio.trk import TRKparser
+from typerig.core.objects.kerning import kerning_mismatch
 from typerig.core.base.message import *
 
 from PythonQt import QtCore
@@ -29,8 +29,9 @@ global pLayers
 global pMode
 pLayers = None
 pMode = 0
-app_name, app_version = 'TypeRig | Cleanup', '1.9'
+app_name, app_version = 'TypeRig | Cleanup', '2.2'
 temp_group_prefix = '_'
+file_format_trk = 'TypeRig Binary Kerning (*.trk)'
 
 # - Sub widgets ------------------------
 class TRkernClean(QtGui.QGridLayout):
@@ -43,11 +44,14 @@ class TRkernClean(QtGui.QGridLayout):
 		self.btn_exceptions_remove = QtGui.QPushButton('Clear')
 		self.btn_exceptions_flats = QtGui.QPushButton('Report Extendable Flat Pairs')
 		self.btn_report_mismatch = QtGui.QPushButton('Report Pair Mis-match')
+		self.btn_snapshot_save = QtGui.QPushButton('Save Snapshot')
+		self.btn_snapshot_compare = QtGui.QPushButton('Compare to Snapshot')
 
 		self.cmb_all_fonts = QtGui.QComboBox()
 		self.cmb_layers = QtGui.QComboBox()
 
 		self.chk_exceptions_fix_groups = QtGui.QCheckBox('Fix Group Names')
+		self.chk_exceptions_class = QtGui.QCheckBox('Include glyph-class exceptions')
 
 		self.spn_exceptions_delta = QtGui.QSpinBox()
 		self.spn_exceptions_delta.setValue(5)
@@ -55,7 +59,10 @@ class TRkernClean(QtGui.QGridLayout):
 		
 		self.btn_exceptions_report.setToolTip('Report exceptions of class kerning within value given')
 		self.btn_exceptions_remove.setToolTip('Remove exceptions of class kerning within value given')
+		self.chk_exceptions_class.setToolTip('Off: glyph-glyph exceptions of class-class pairs only.\nOn: also glyph-class and class-glyph exceptions of class-class pairs,\nand glyph-glyph exceptions of glyph-class and class-glyph pairs (Clear removes more pairs).')
 		self.btn_report_mismatch.setToolTip('Report kerning pairs that are not present in all masters')
+		self.btn_snapshot_save.setToolTip('Save kerning of all masters to a binary kerning snapshot (.trk)')
+		self.btn_snapshot_compare.setToolTip('Report kerning pairs added, removed or changed since a binary kerning snapshot (.trk)')
 
 		self.btn_font_refresh.clicked.connect(lambda:self.fonts_refresh())
 		self.cmb_all_fonts.currentIndexChanged.connect(lambda:self.fonts_changed())
@@ -63,6 +70,8 @@ class TRkernClean(QtGui.QGridLayout):
 		self.btn_exceptions_remove.clicked.connect(lambda: self.kern_exceptions(True, False))
 		self.btn_exceptions_flats.clicked.connect(lambda: self.kern_exceptions(False, True))
 		self.btn_report_mismatch.clicked.connect(self.report_mismatch)
+		self.btn_snapshot_save.clicked.connect(self.snapshot_save)
+		self.btn_snapshot_compare.clicked.connect(self.snapshot_compare)
 
 		# -- Build
 		self.addWidget(QtGui.QLabel('Process Font:'),				0, 0, 1, 6)
@@ -71,14 +80,17 @@ class TRkernClean(QtGui.QGridLayout):
 		self.addWidget(QtGui.QLabel('\nKerning: Owerview'), 		2, 0, 1, 6)
 		self.addWidget(self.btn_exceptions_flats, 					3, 0, 1, 6)
 		self.addWidget(self.btn_report_mismatch, 					4, 0, 1, 6)
+		self.addWidget(self.btn_snapshot_save, 						5, 0, 1, 3)
+		self.addWidget(self.btn_snapshot_compare, 					5, 3, 1, 3)
 		self.addWidget(QtGui.QLabel('\nKerning: Clean exceptions'), 6, 0, 1, 6)
 		self.addWidget(QtGui.QLabel('Layer:'), 						7, 0, 1, 1)
 		self.addWidget(self.cmb_layers, 							7, 1, 1, 5)
 		self.addWidget(QtGui.QLabel('Delta:'),						8, 0, 1, 1)
 		self.addWidget(self.spn_exceptions_delta, 					8, 1, 1, 2)
 		self.addWidget(self.chk_exceptions_fix_groups, 				8, 3, 1, 3)
-		self.addWidget(self.btn_exceptions_report, 					9, 0, 1, 3)
-		self.addWidget(self.btn_exceptions_remove, 					9, 3, 1, 3)
+		self.addWidget(self.chk_exceptions_class, 					9, 0, 1, 6)
+		self.addWidget(self.btn_exceptions_report, 					10, 0, 1, 3)
+		self.addWidget(self.btn_exceptions_remove, 					10, 3, 1, 3)
 
 		# - Init
 		self.fonts_refresh()
@@ -104,24 +116,62 @@ class TRkernClean(QtGui.QGridLayout):
 		# - Init
 		font_kerning = []
 
-		# - Process
 		for layer in self.font.masters():
-			layer_kerning = self.font.kerning_dump(layer, pairs_only=True)
+			layer_kerning = dict(self.font.kerning_dump(layer))
 			if len(layer_kerning):
-				font_kerning.append(set(layer_kerning))
+				font_kerning.append((layer, layer_kerning))
 
-
-		mismatch = list(reduce(set.union, font_kerning) - reduce(set.intersection, font_kerning))
+		# - Process
+		layers, mismatch = kerning_mismatch(font_kerning, missing_only=True)
 		print('\nFONT: %s;\tPairs not present in all masters:\t %s\n' %(self.font.PSfullName, len(mismatch)) + '-'*60)
 
-		for pair in mismatch:
-			print('MIS-MATCH: %s | %s' %pair)
+		for pair, values in sorted(mismatch.items()):
+			missing_layers = [layer for layer, value in zip(layers, values) if value is None]
+			print('MIS-MATCH: %s | %s;\tMissing in: %s' %(pair[0], pair[1], ', '.join(missing_layers)))
+
+	def snapshot_save(self):
+		font_path = os.path.split(self.font.fg.path)[0]
+		save_path = QtGui.QFileDialog.getSaveFileName(None, 'Save kerning snapshot', font_path, file_format_trk)
+
+		if len(save_path):
+			saved_layers = self.font.kerning_snapshot(save_path)
+			output(7, app_name, 'Font: %s; Kerning snapshot saved: %s; Masters: %s.' %(self.font.PSfullName, save_path, len(saved_layers)))
+
+	def snapshot_compare(self):
+		font_path = os.path.split(self.font.fg.path)[0]
+		load_path = QtGui.QFileDialog.getOpenFileName(None, 'Compare kerning to snapshot', font_path, file_format_trk)
+
+		if not len(load_path): return
+
+		with TRKparser(load_path) as reader:
+			snapshot = {master: dict(reader.kerning_dump(master)) for master in reader.masters()}
+
+		output(6, app_name, 'Font: %s; Kerning snapshot loaded: %s.' %(self.font.PSfullName, load_path))
+
+		for layer in self.font.masters():
+			if layer not in snapshot:
+				warnings.warn('Master not found in snapshot: %s' %layer, KernWarning)
+				continue
+
+			current, previous = dict(self.font.kerning_dump(layer)), snapshot[layer]
+			added = sorted(set(current) - set(previous))
+			removed = sorted(set(previous) - set(current))
+			changed = sorted(pair for pair in set(current) & set(previous) if current[pair] != previous[pair])
+
+			print('\nFONT: %s;\tLAYER:\t %s;\tAdded: %s;\tRemoved: %s;\tChanged: %s\n' %(self.font.PSfullName, layer, len(added), len(removed), len(changed)) + '-'*60)
+
+			for pair in added:
+				print('ADD:\t %s | %s %s' %(pair[0], pair[1], current[pair]))
+
+			for pair in removed:
+				print('DEL:\t %s | %s %s' %(pair[0], pair[1], previous[pair]))
+
+			for pair in changed:
+				print('CHANGE:\t %s | %s %s -> %s' %(pair[0], pair[1], previous[pair], current[pair]))
 
 	def kern_exceptions(self, clear_exceptions=False, report_flats=False):
 		# - Init
 		work_layers = self.font.masters() if self.cmb_layers.currentIndex == 0 else [self.cmb_layers.currentText]
-		delete_pairs = []
-		extend_pairs = []
 
 		for layer in work_layers:
 			# - Init
@@ -133,62 +183,33 @@ class TRkernClean(QtGui.QGridLayout):
 					# !!! Fuckin' BUG - keys are in unicode but rename takes only ascii?!?!
 					fg_layer_kerning.groups.rename(group_name.encode('ascii','ignore'), temp_group_prefix + group_name.encode('ascii','ignore'))
 
-			# - Get group data
+			# - Analyze
 			layer_kerning = pKerning(fg_layer_kerning)
-			layer_groups = layer_kerning.groupsBiDict()
 			print('\nFONT: %s;\tLAYER:\t %s\n' %(self.font.PSfullName, layer) + '-'*60)
 
-			# - Process
-			for pair, value in layer_kerning.fg.items():
-				left_in_group = None
-				right_in_group = None
+			if report_flats:
+				extend_pairs = layer_kerning.getFlats()
+
+				for pair, value, group_pair in extend_pairs:
+					print('WARN:\t Plain pair: %s | %s %s;\tCould be EXTENDED to class kerning: %s | %s.' %(pair[0], pair[1], value, group_pair[0], group_pair[1]))
 
-				if pair.left.mode == 'groupMode' and pair.right.mode == 'groupMode':
-					pass
+				output(0, app_name, 'Found flat pairs that could be extended: %s;\tLayer: %s.\n' %(len(extend_pairs), layer))
+
+			else:
+				if self.chk_exceptions_class.isChecked():
+					delete_pairs = layer_kerning.getExceptions(self.spn_exceptions_delta.value)
 				else:
-					try:
-						left_in_group = layer_groups['KernLeft'].inverse[pair.left.id]
-					except KeyError:
-						try:
-							left_in_group = layer_groups['KernBothSide'].inverse[pair.left.id]
-						except KeyError:
-							left_in_group = None
-
-					try:
-						right_in_group = layer_groups['KernRight'].inverse[pair.right.id]
-					except KeyError:
-						try:
-							right_in_group = layer_groups['KernBothSide'].inverse[pair.right.id]
-						except KeyError:
-							right_in_group = None
-
-					if left_in_group is not None and right_in_group is not None:
-						group_value = layer_kerning.fg[left_in_group[0], right_in_group[0]]
-						
-						if group_value is not None:
-							if abs(group_value - value) <= self.spn_exceptions_delta.value:
-								delete_pairs.append((pair.left.id, pair.right.id))
-								
-								if not clear_exceptions and not report_flats:
-									print('FOUND:\t Exception: %s | %s %s;\tFrom: %s | %s %s.' %(pair.left.id, pair.right.id, value, left_in_group[0], right_in_group[0], group_value))
-						else:
-							extend_pairs.append((pair.left.id, pair.right.id, left_in_group, right_in_group))
-							
-							if report_flats:
-								print('WARN:\t Plain pair: %s | %s %s;\tCould be EXTENDED to class kerning: %s | %s.' %(pair.left.id, pair.right.id, value, left_in_group[0], right_in_group[0]))
-
-			if clear_exceptions:
-				# - Remove pairs
-				for pair in delete_pairs:
-					layer_kerning.fg.remove(pair)
-
-				output(0, app_name, 'Removed exception pairs: %s;\tLayer: %s.\n' %(len(delete_pairs), layer))
-			
-			if not clear_exceptions and not report_flats:
-				output(0, app_name, 'Found exception pairs: %s;\tLayer: %s.\n' %(len(delete_pairs), layer))
+					delete_pairs = layer_kerning.getExceptions(self.spn_exceptions_delta.value, kinds=(0,), classOnly=True)
 
-			if report_flats:
-				output(0, app_name, 'Found flat pairs that could be extended: %s;\tLayer: %s.\n' %(len(extend_pairs), layer))				
+				if clear_exceptions:
+					layer_kerning.removePairs([pair for pair, value, group_pair, group_value in delete_pairs])
+					output(0, app_name, 'Removed exception pairs: %s;\tLayer: %s.\n' %(len(delete_pairs), layer))
+
+				else:
+					for pair, value, group_pair, group_value in delete_pairs:
+						print('FOUND:\t Exception: %s | %s %s;\tFrom: %s | %s %s.' %(pair[0], pair[1], value, group_pair[0], group_pair[1], group_value))
+
+					output(0, app_name, 'Found exception pairs: %s;\tLayer: %s.\n' %(len(delete_pairs), layer))
 
 			# - Un-Fix groups
 			if self.chk_exceptions_fix_groups.isChecked():
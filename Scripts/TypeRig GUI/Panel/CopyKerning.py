@@ -17,13 +17,14 @@ import fontgate as fgt
 
 from typerig.proxy.fl.objects.font import pFont
 from typerig.core.objects.collection import extBiDict
+from typerig.core.fileio.trk import TRKparser
 from typerig.core.base.message import *
 
 from PythonQt import QtCore
 from typerig.proxy.fl.gui import QtGui
 
 # - Init --------------------------------
-app_name, app_version = 'Copy Kernig', '2.9'
+app_name, app_version = 'Copy Kernig', '3.0'
 
 # -- Strings 
 str_help = '''
@@ -41,7 +42,7 @@ syn_adjust = '@'
 syn_comment = '#'
 syn_equal = '='
 
-fileFormats = ['TypeRig JSON Raw Classes (*.json)', 'FontLab JSON Classes (*.json)']
+fileFormats = ['TypeRig JSON Raw Classes (*.json)', 'FontLab JSON Classes (*.json)', 'TypeRig Binary Kerning (*.trk)']
 
 # - Functions ----------------------------------------------------------------
 def json_class_dumb_decoder(jsonData):
@@ -154,7 +155,15 @@ class tool_tab(QtGui.QWidget):
 		fontPath = os.path.split(self.active_font.fg.path)[0]
 		fname = QtGui.QFileDialog.getOpenFileName(self, 'Load kerning classes from file', fontPath, ';;'.join(fileFormats))
 		
-		if fname != None:
+		if fname != None and fname.endswith('.trk'): # A TypeRig binary kerning snapshot
+			with TRKparser(fname) as reader:
+				self.update_data({master: reader.kerning_groups(master) for master in reader.masters()})
+
+			output(6, app_name, 'Font:%s; TypeRig Binary Kerning classes loaded from: %s.' %(self.active_font.name, fname))
+			self.btn_loadFile.setChecked(True)
+			self.btn_loadFont.setChecked(False)
+
+		elif fname != None:
 			with open(fname, 'r') as importFile:
 				source_data = json.load(importFile)
 
@@ -9,7 +9,7 @@
 
 # - Dependencies -----------------
 from __future__ import absolute_import, print_function
-import warnings
+import warnings, tempfile, hashlib
 
 import fontlab as fl6
 import fontgate as fgt
@@ -19,6 +19,7 @@ from typerig.proxy.fl.objects.font import pFont
 
 from typerig.core.base.message import *
 from typerig.core.objects.array import PointArray
+from typerig.core.objects.fingerprint import FingerprintCache, layer_fingerprint, fingerprint_diff
 
 from PythonQt import QtCore
 from typerig.proxy.fl.gui import QtGui
@@ -26,7 +27,7 @@ from typerig.proxy.fl.gui.widgets import getProcessGlyphs, fontMarkColors
 from typerig.proxy.fl.gui.dialogs import TRLayerSelectDLG
 
 # - Init ---------------------------
-app_name, app_version = 'TR | Comparator', '0.91'
+app_name, app_version = 'TR | Comparator', '0.96'
 
 # - Configuration ----------------------
 # -- Colors
@@ -45,6 +46,9 @@ column_delimiter = ' | '
 glyph_suffix_separator = '.'
 fileFormats = 'Audit Record (*.txt);;'
 
+# -- Fingerprints: persisted between runs, one file per font
+fingerprint_folder = os.path.join(tempfile.gettempdir(), 'TypeRig', 'Comparator')
+
 # - Helpers ----------------------------
 def depth_test(tree_item):
 	# Return the nesting depth of a QTreeWidgetItem
@@ -57,6 +61,27 @@ def depth_test(tree_item):
 
 	return depth
 
+def fingerprint_file(font):
+	# Fingerprint cache file for given font (pFont), None for unsaved fonts: kept in memory for the run only
+	if not font.path: return None
+	font_name = os.path.splitext(os.path.split(font.path)[1])[0]
+	font_key = hashlib.sha1(font.path.encode('utf-8')).hexdigest()[:12]
+	return os.path.join(fingerprint_folder, '{}-{}.json'.format(font_name, font_key))
+
+def glyph_stamp(glyph):
+	# Changes whenever the glyph (eGlyph) is edited or layers are added/removed.
+	# Relies on lastModified: edits that do not update it (ex. scripts writing through fontgate) are not seen.
+	return '{}; {}'.format(glyph.version().toString('yyyy-MM-dd hh:mm:ss.zzz'), len(glyph.layers()))
+
+def fingerprint_layer(glyph, layer_name):
+	# Fingerprint of glyph (eGlyph) layer: outline, anchors and metrics
+	work_layer = glyph.layer(layer_name)
+	contours = [[(node.x, node.y) for node in contour.nodes()] for contour in glyph.contours(layer_name)]
+	anchors = [(anchor.name, anchor.point.x(), anchor.point.y()) for anchor in glyph.anchors(layer_name)]
+	metrics = (work_layer.advanceWidth, work_layer.advanceHeight)
+	
+	return layer_fingerprint(contours, anchors, metrics)
+
 def draw_diff(glyph_A, glyph_B, layer_name_A, layer_name_B):
 	# - Init
 	shape_A = fl6.flShape()
@@ -110,8 +135,9 @@ def draw_diff(glyph_A, glyph_B, layer_name_A, layer_name_B):
 
 # - Classes ----------------------------
 class fontComparator(object):
-	def __init__(self, font_A, font_B, report_hook, progress_hook):
+	def __init__(self, font_A, font_B, report_hook, progress_hook, use_cache=True):
 		self.report = report_hook
+		self.use_cache = use_cache
 		self.process_bank = {}
 		self.progress = progress_hook
 		self.font_A = font_A
@@ -132,16 +158,51 @@ class fontComparator(object):
 		self.progress.setValue(all_glyph_counter)
 		glyph_count = len(process_glyphs)
 		
-		# - Process glyphs
+		# - Process glyphs (process_layers: list of layer names or dict glyph_name: layer names)
 		for idx, glyph in enumerate(process_glyphs):
 			work_glyph = eGlyph(glyph, self.font_A.fg)
-			process_function(work_glyph, process_layers)
+			glyph_layers = process_layers.get(work_glyph.name, []) if isinstance(process_layers, dict) else process_layers
+			process_function(work_glyph, glyph_layers)
 		
 			# - Set progress
 			current_progress = idx*100/glyph_count
 			self.progress.setValue(current_progress)
 			QtGui.QApplication.processEvents()
 
+	def __fingerprints(self, font, process_layers):
+		'''Fingerprints dict(glyph_name: dict(layer_name: fingerprint)) of all glyphs in font.
+		Layers are read only for glyphs changed since the previous run, others come from the cache.
+		Without use_cache all layers are read and the cache is refreshed.'''
+		fingerprints = {}
+		self.progress.setValue(0)
+
+		with FingerprintCache(fingerprint_file(font)) as cache:
+			all_glyphs = font.glyphs()
+			glyph_count = len(all_glyphs)
+
+			for idx, glyph in enumerate(all_glyphs):
+				work_glyph = eGlyph(glyph, font.fg)
+				stamp = glyph_stamp(work_glyph)
+				glyph_fingerprints = fingerprints[work_glyph.name] = {}
+
+				for layer_name in process_layers:
+					fingerprint = cache.get(work_glyph.name, stamp, layer_name) if self.use_cache else None
+
+					if fingerprint is None:
+						if work_glyph.layer(layer_name) is None: continue
+						fingerprint = fingerprint_layer(work_glyph, layer_name)
+						cache.set(work_glyph.name, stamp, layer_name, fingerprint)
+
+					glyph_fingerprints[layer_name] = fingerprint
+
+				if idx % 100 == 0:
+					self.progress.setValue(idx*100/glyph_count)
+					QtGui.QApplication.processEvents()
+
+			cache.prune(fingerprints.keys())
+
+		return fingerprints
+
 	# -- Functions --------------------------
 	def __make_font_diff(self, glyph, process_layers, time_diff=False):	
 		# - Init
@@ -297,10 +358,24 @@ class fontComparator(object):
 				self.__write_process(glyph_missing_msg[0], {glyph.name : None})
 	
 		# - Init
-		source_glyphs = self.font_A.glyphs()
+		fingerprints_A = self.__fingerprints(self.font_A, process_layers)
+		fingerprints_B = self.__fingerprints(self.font_B, process_layers)
+		source_glyphs, source_layers = [], {}
+
+		# - Deep diff only glyphs missing in destination or with different outline fingerprints
+		for glyph in self.font_A.glyphs():
+			if glyph.name not in fingerprints_B:
+				changed_layers = process_layers
+			else:
+				glyph_A, glyph_B = fingerprints_A[glyph.name], fingerprints_B[glyph.name]
+				changed_layers = [layer_name for layer_name in process_layers if fingerprint_diff(glyph_A.get(layer_name), glyph_B.get(layer_name), ('outline',))]
+
+			if len(changed_layers):
+				source_glyphs.append(glyph)
+				source_layers[glyph.name] = changed_layers
 
 		# - Process
-		self.__iter_glyphs(source_glyphs, make_font_diff, process_layers)
+		self.__iter_glyphs(source_glyphs, make_font_diff, source_layers)
 
 	# --- Layers Diff: Compare layers within single font
 	def compare_layers(self, process_layers=[]):
@@ -337,7 +412,11 @@ class fontComparator(object):
 
 		# - Init
 		if len(process_layers) > 1:
-			source_glyphs = self.font_A.glyphs()
+			fingerprints = self.__fingerprints(self.font_A, process_layers[:2])
+			first_layer, second_layer = process_layers[:2]
+
+			# - Deep diff only glyphs whose layers differ in outline, anchors or metrics
+			source_glyphs = [glyph for glyph in self.font_A.glyphs() if fingerprint_diff(fingerprints[glyph.name].get(first_layer), fingerprints[glyph.name].get(second_layer), ('outline', 'anchors', 'metrics'))]
 
 			# - Process
 			self.__iter_glyphs(source_glyphs, make_layer_diff, process_layers)
@@ -440,6 +519,9 @@ class TRComparator(QtGui.QDialog):
 		# --- Operations
 		self.brn_process_actions = QtGui.QPushButton('Run')
 		self.brn_process_actions.clicked.connect(self.font_process)
+		self.chk_fingerprint_cache = QtGui.QCheckBox('Use fingerprint cache')
+		self.chk_fingerprint_cache.setChecked(True)
+		self.chk_fingerprint_cache.setToolTip('Glyphs not modified since the previous run are not read again.\nEdits that do not update the glyph modification time (ex. scripts writing through fontgate) are not detected:\nuncheck to read all glyphs and refresh the cache.')
 
 		# --- Audit
 		self.btn_audit_reset = QtGui.QPushButton('Clear Record')
@@ -474,6 +556,7 @@ class TRComparator(QtGui.QDialog):
 		lay_actions.addWidget(self.cmb_select_action)
 		#lay_actions.addWidget(QtGui.QLabel('Mark processed glyphs with:'))
 		#lay_actions.addWidget(self.cmb_select_color)
+		lay_actions.addWidget(self.chk_fingerprint_cache)
 		lay_actions.addWidget(self.brn_process_actions)
 		self.box_action.setLayout(lay_actions)
 
@@ -589,7 +672,8 @@ class TRComparator(QtGui.QDialog):
 		self.audit_report = {}
 		
 		# - Run Tests
-		compare_fonts = fontComparator(self.font_src, self.font_dst, self.audit_report, self.progress)
+		use_cache = self.chk_fingerprint_cache.isChecked()
+		compare_fonts = fontComparator(self.font_src, self.font_dst, self.audit_report, self.progress, use_cache)
 		getattr(compare_fonts, process_type)(self.pLayers)
 		
 		# - Set report plane
@@ -599,6 +683,9 @@ class TRComparator(QtGui.QDialog):
 			self.audit_tree.collapseAll()
 		
 		output(0, app_name, 'Destination Font: %s; Processing Finished!' %os.path.split(self.font_dst.path)[1])
+		
+		if use_cache:
+			output(0, app_name, 'Fingerprint cache used: glyphs are re-read only if their modification time changed. Uncheck "Use fingerprint cache" after edits made by scripts.')
 		self.progress.setValue(0)
 
 # - Run ----------------------